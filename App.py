@@ -1,468 +1,366 @@
-from flask import Flask, request, send_from_directory, render_template
+from flask import Flask, request, send_file, render_template, jsonify, url_for
+from flask import Response, stream_with_context, g
+from markupsafe import Markup, escape
+import atexit
+import json
 import os
-import google.generativeai as genai
 import re
-from servico_banco import salvar_trabalho
+import time
+from datetime import date
+from io import BytesIO
 from servico_banco import listar_trabalhos
-from docx import Document
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.shared import Pt, RGBColor
-from docx.shared import Cm
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.lib.enums import TA_JUSTIFY
+from servico_banco import obter_trabalho, registrar_artefato
+from servico_banco import buscar_trabalhos, INICIO_DESTAQUE, FIM_DESTAQUE
+from database import estatisticas_pool
 from dotenv import load_dotenv
-from reportlab.platypus import KeepTogether
-from reportlab.pdfgen import canvas
-from flask import render_template 
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
-import webbrowser
 import threading
+import fila_tarefas
+from fila_tarefas import FilaTarefas, FilaCheia, RegistroTarefas
+from fila_gravacao import FilaGravacao
+from renderizadores import TIPOS_MIME, nome_seguro
+import executor_renderizacao
+import armazem_artefatos
+import limpeza_artefatos
+from envio_arquivos import enviar_arquivo
+import gerador_artigos
+import metricas
+import aquecimento
+from gerador_artigos import cache, gerar_artigo_abnt, gerar_artigo_abnt_stream
 
 # Carregar a chave de API do arquivo .env
 load_dotenv()
 
-app = Flask(__name__)
-
-# Configuração da API Gemini
-api_key = os.getenv("API_KEY")
-genai.configure(api_key=api_key)
-modelo = genai.GenerativeModel(model_name="gemini-2.0-flash")
-
-# Diretório para salvar os arquivos gerados
-OUTPUT_DIR = "output_files"
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
-
-# Função para formatar o título com a primeira letra de cada palavra em maiúscula
-def formatar_titulo(titulo):
-    return titulo.title()
-
-# Função para remover os asteriscos de qualquer parte do texto
-def remover_asteriscos(texto):
-    return re.sub(r"\*+", "", texto)
-
-def adicionar_paginacao(canvas_obj, doc_obj):
-    canvas_obj.setFont("Times-Roman", 12)
-    pagina = canvas_obj.getPageNumber()
-    largura, altura = A4
-    canvas_obj.drawRightString(largura - 2 * cm, altura - 1.5 * cm, str(pagina))
-    
-def adicionar_num_pagina_word(doc):
-    section = doc.sections[0]
-    header = section.header
-    par = header.paragraphs[0] if header.paragraphs else header.add_paragraph()
-    par.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-
-    # Inserir campo de número de página
-    run = par.add_run()
-    fldChar1 = OxmlElement('w:fldChar')
-    fldChar1.set(qn('w:fldCharType'), 'begin')
-    instrText = OxmlElement('w:instrText')
-    instrText.text = 'PAGE'
-    fldChar2 = OxmlElement('w:fldChar')
-    fldChar2.set(qn('w:fldCharType'), 'end')
-    run._r.append(fldChar1)
-    run._r.append(instrText)
-    run._r.append(fldChar2)
-    run.font.name = 'Times New Roman'
-    run.font.size = Pt(12)
-
-# Função para formatar parágrafos com recuo de 1,25 cm e espaçamento entre parágrafos de 1,5
-def formatar_paragrafos(doc):
-    for paragrafo in doc.paragraphs:
-        if not paragrafo.style.name.startswith('Heading'):
-            paragrafo.paragraph_format.left_indent = Cm(1.25)
-            paragrafo.paragraph_format.line_spacing = 1.5
-        else:
-            paragrafo.paragraph_format.left_indent = Cm(0)
-            
-
-
-# Função para gerar o artigo
-def gerar_artigo_abnt(titulo, tema, autor):
-    titulo = formatar_titulo(titulo)
-
-    prompt = f"""
-    Gere um artigo acadêmico completo e bem estruturado sobre **"{tema}"** com o título **"{titulo}"**, seguindo rigorosamente as normas da ABNT. O artigo deve conter as seguintes seções obrigatórias, com seus respectivos conteúdos e tamanhos mínimos:
-
-    **1. Título**
-    - Deve aparecer centralizado no início.
-
-    **2. Resumo (em português)**
-    - Um parágrafo entre 150 a 250 palavras que sintetize os principais pontos do artigo.
-    
-    **3. Palavras-chave (em português)**
-    - De 3 a 5 palavras separadas por ponto e vírgula (;).
-
-    **4. Abstract (em inglês)**
-    - Um parágrafo com a tradução do resumo, entre 150 a 250 palavras.
-    - Sintetize os principais pontos do artigo em inglês.
-    
-    **5. Keywords (em inglês)**
-    - Tradução das palavras-chave, entre 3 e 5 termos separados por ponto e vírgula (;).
-
-    **6. Introdução**
-    - Apresente o tema, justificativa, problema e objetivo da pesquisa.
-    - Mínimo de 200 palavras.
-
-    **7. Revisão de Literatura**
-    - Discorra sobre conceitos teóricos importantes sobre o tema.
-    - Utilize ao menos 2 citações no estilo ABNT: (SOBRENOME, ano, p.xx).
-    - Mínimo de 300 palavras.
-
-    **8. Metodologia**
-    - Descreva os métodos e procedimentos adotados para desenvolver o trabalho.
-    - Pode incluir abordagem qualitativa/quantitativa, revisão bibliográfica, etc.
-    - Mínimo de 200 palavras.
-
-    **9. Resultados e Discussão**
-    - Apresente os principais resultados esperados ou obtidos.
-    - Relacione com a literatura citada.
-    - Mínimo de 300 palavras.
-
-    **10. Conclusão**
-    - Retome os objetivos, destaque as contribuições e proponha trabalhos futuros.
-    - Mínimo de 150 palavras.
-
-    **11. Referências**
-    - Liste pelo menos **3 referências no formato ABNT.**
-    - Exemplo: SOBRENOME, Nome. *Título do Livro ou Artigo*. Local: Editora, Ano.
-    """
-    resposta = modelo.generate_content(prompt)
-    return resposta.text
-
-# Função para salvar o texto no PDF com formatação correta
-def salvar_em_pdf(titulo, texto, autor):
-    nome_arquivo = os.path.join(OUTPUT_DIR, titulo.replace(" ", "_") + ".pdf")
-    doc = SimpleDocTemplate(nome_arquivo, pagesize=A4,
-                            rightMargin=2*cm, leftMargin=3*cm,
-                            topMargin=3*cm, bottomMargin=2*cm)
-
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Titulo', fontSize=12, fontName='Times-Roman', alignment=1,
-                              spaceAfter=12, spaceBefore=12, leading=14, allowHTML=True))
-    styles.add(ParagraphStyle(name='Secao', fontSize=12, fontName='Times-Roman', alignment=0,
-                              spaceAfter=12, spaceBefore=12, leading=14, firstLineIndent=0, allowHTML=True))
-    styles.add(ParagraphStyle(name='Texto', fontSize=12, fontName='Times-Roman', alignment=TA_JUSTIFY,
-                              firstLineIndent=1.25 * cm, spaceAfter=10, leading=18, allowHTML=True))
-    styles.add(ParagraphStyle(name='TextoSemRecuo', fontSize=12, fontName='Times-Roman', alignment=TA_JUSTIFY,
-                              firstLineIndent=0, spaceAfter=10, leading=18, allowHTML=True))
-
-    elementos = []
-
-    # Título do trabalho
-    titulo_upper = titulo.upper()
-    elementos.append(Paragraph(f"<b>{titulo_upper}</b>", styles['Titulo']))
-    elementos.append(Spacer(1, 0.6*cm))
-
-    # Autor
-    autor_sem_quebra = autor.replace(" ", "\u00A0")
-    autor_para_pdf = Paragraph(
-        autor_sem_quebra,
-        ParagraphStyle(
-            'AutorDireita',
-            parent=styles['TextoSemRecuo'],
-            alignment=2,
-            spaceAfter=12,
-            fontName='Times-Roman',
-            fontSize=12,
-        )
-    )
-    elementos.append(autor_para_pdf)
-    elementos.append(Spacer(1, 1.2 * cm))
-
-    # Regex para seções
-    padroes = {
-        "Resumo": re.compile(r"^\s*\d{0,2}\.?\s*resumo\s*:?\s*(.*)$", re.IGNORECASE),
-        "Palavras-chave": re.compile(r"^\s*\d{0,2}\.?\s*palavras-chave\s*:?\s*(.*)$", re.IGNORECASE),
-        "Abstract": re.compile(r"^\s*\d{0,2}\.?\s*abstract\s*:?\s*(.*)$", re.IGNORECASE),
-        "Keywords": re.compile(r"^\s*\d{0,2}\.?\s*keywords\s*:?\s*(.*)$", re.IGNORECASE),
-        "Introdução": re.compile(r"^\s*\d{0,2}\.?\s*introdução\s*:?\s*(.*)$", re.IGNORECASE),
-        "Revisão de Literatura": re.compile(r"^\s*\d{0,2}\.?\s*revis[aã]o de literatura\s*:?\s*(.*)$", re.IGNORECASE),
-        "Metodologia": re.compile(r"^\s*\d{0,2}\.?\s*metodologia\s*:?\s*(.*)$", re.IGNORECASE),
-        "Resultados e Discussão": re.compile(r"^\s*\d{0,2}\.?\s*resultados e discussão\s*:?\s*(.*)$", re.IGNORECASE),
-        "Conclusão": re.compile(r"^\s*\d{0,2}\.?\s*conclus[aã]o\s*:?\s*(.*)$", re.IGNORECASE),
-        "Referências": re.compile(r"^\s*\d{0,2}\.?\s*refer[eê]ncias\s*:?\s*(.*)$", re.IGNORECASE)
-    }
-
-    conteudo = {}
-    atual = None
-    aguardando_conteudo_direto = False
-    ultima_secao = None
-
-    for linha in texto.splitlines():
-        linha_limpa = remover_asteriscos(linha.strip())
-        if not linha_limpa:
-            continue
-
-        mudou_secao = False
-        for nome_secao, padrao in padroes.items():
-            match = padrao.match(linha_limpa)
-            if match:
-                atual = nome_secao
-                if atual not in conteudo:
-                    conteudo[atual] = []
-
-                inline = match.group(1).strip()
-                if inline:
-                    conteudo[atual].append(inline)
-                    aguardando_conteudo_direto = False
-                else:
-                    aguardando_conteudo_direto = True
-                    ultima_secao = atual
-                mudou_secao = True
-                break
-
-        if not mudou_secao:
-            if aguardando_conteudo_direto and ultima_secao:
-                conteudo[ultima_secao].append(linha_limpa)
-            elif atual:
-                conteudo[atual].append(linha_limpa)
-
-    secoes_ordenadas = [
-        ("1", "Introdução"),
-        ("2", "Revisão de Literatura"),
-        ("3", "Metodologia"),
-        ("4", "Resultados e Discussão"),
-        ("5", "Conclusão")
-    ]
-    extras = ["Resumo", "Palavras-chave", "Abstract", "Keywords"]
-
-    for entrada in extras + [nome for _, nome in secoes_ordenadas]:
-        if entrada in extras:
-            titulo = None
-        else:
-            numero = next((num for num, nome in secoes_ordenadas if nome == entrada), "")
-            titulo = f"<b>{numero} {entrada.upper()}</b>"
-            elementos.append(Paragraph(titulo, styles['Secao']))
-
-        if entrada in conteudo and conteudo[entrada]:
-            for i, paragrafo in enumerate(conteudo[entrada]):
-                if entrada in extras and i == 0:
-                    texto_completo = f"<b>{entrada.upper()}:</b> {paragrafo}"
-                    estilo = styles['TextoSemRecuo']
-                else:
-                    texto_completo = paragrafo
-                    estilo = styles['Texto']
-                elementos.append(Paragraph(texto_completo, estilo))
-                elementos.append(Spacer(1, 0.4 * cm))
-        else:
-            elementos.append(Paragraph("Conteúdo não disponível.", styles['Texto']))
-
-    if "Referências" in conteudo:
-        elementos.append(Paragraph("<b>REFERÊNCIAS</b>", styles['Secao']))
-        for paragrafo in conteudo["Referências"]:
-            elementos.append(Paragraph(paragrafo, styles['TextoSemRecuo']))
-            elementos.append(Spacer(1, 0.4 * cm))
-
-    doc.build(elementos, onFirstPage=adicionar_paginacao, onLaterPages=adicionar_paginacao)
-    return nome_arquivo
-
-# Função para salvar no DOCX com formatação correta
-def salvar_em_docx(titulo, texto, autor):
-    doc = Document()
-    titulo_original = titulo  # Para nome do arquivo
-
-    # Título principal
-    titulo_paragrafo = doc.add_paragraph()
-    titulo_paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run_titulo = titulo_paragrafo.add_run(titulo.upper())
-    run_titulo.font.name = "Times New Roman"
-    run_titulo.font.size = Pt(12)
-    run_titulo.bold = True
-    run_titulo.font.color.rgb = RGBColor(0, 0, 0)
-
-    # Autor
-    par_autor = doc.add_paragraph(autor)
-    par_autor.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    par_autor.paragraph_format.space_after = Pt(20)
-    par_autor.paragraph_format.space_before = Pt(24)
-    run_autor = par_autor.runs[0]
-    run_autor.font.name = "Times New Roman"
-    run_autor.font.size = Pt(12)
-    run_autor.font.color.rgb = RGBColor(0, 0, 0)
-
-    # Regex para seções
-    padroes = {
-        "Resumo": re.compile(r"^\s*\d{0,2}\.?\s*resumo\s*:?\s*(.*)$", re.IGNORECASE),
-        "Palavras-chave": re.compile(r"^\s*\d{0,2}\.?\s*palavras-chave\s*:?\s*(.*)$", re.IGNORECASE),
-        "Abstract": re.compile(r"^\s*\d{0,2}\.?\s*abstract\s*:?\s*(.*)$", re.IGNORECASE),
-        "Keywords": re.compile(r"^\s*\d{0,2}\.?\s*keywords\s*:?\s*(.*)$", re.IGNORECASE),
-        "Introdução": re.compile(r"^\s*\d{0,2}\.?\s*introdução\s*:?\s*(.*)$", re.IGNORECASE),
-        "Revisão de Literatura": re.compile(r"^\s*\d{0,2}\.?\s*revis[aã]o de literatura\s*:?\s*(.*)$", re.IGNORECASE),
-        "Metodologia": re.compile(r"^\s*\d{0,2}\.?\s*metodologia\s*:?\s*(.*)$", re.IGNORECASE),
-        "Resultados e Discussão": re.compile(r"^\s*\d{0,2}\.?\s*resultados e discussão\s*:?\s*(.*)$", re.IGNORECASE),
-        "Conclusão": re.compile(r"^\s*\d{0,2}\.?\s*conclus[aã]o\s*:?\s*(.*)$", re.IGNORECASE),
-        "Referências": re.compile(r"^\s*\d{0,2}\.?\s*refer[eê]ncias\s*:?\s*(.*)$", re.IGNORECASE)
-    }
+# A pasta dos templates tem T maiúsculo; o padrão do Flask ("templates")
+# só funciona em sistemas de arquivos que ignoram maiúsculas
+app = Flask(__name__, template_folder="Templates")
 
-    conteudo = {}
-    atual = None
-    aguardando_conteudo_direto = False
-    ultima_secao = None
-
-    for linha in texto.splitlines():
-        linha_limpa = remover_asteriscos(linha.strip())
-        if not linha_limpa:
-            continue
-
-        mudou_secao = False
-        for nome_secao, padrao in padroes.items():
-            match = padrao.match(linha_limpa)
-            if match:
-                atual = nome_secao
-                if atual not in conteudo:
-                    conteudo[atual] = []
-
-                inline = match.group(1).strip()
-                if inline:
-                    conteudo[atual].append(inline)
-                    aguardando_conteudo_direto = False
-                else:
-                    aguardando_conteudo_direto = True
-                    ultima_secao = atual
-                mudou_secao = True
-                break
-
-        if not mudou_secao:
-            if aguardando_conteudo_direto and ultima_secao:
-                conteudo[ultima_secao].append(linha_limpa)
-            elif atual:
-                conteudo[atual].append(linha_limpa)
-
-    secoes_ordenadas = [
-        ("1", "Introdução"),
-        ("2", "Revisão de Literatura"),
-        ("3", "Metodologia"),
-        ("4", "Resultados e Discussão"),
-        ("5", "Conclusão")
-    ]
-    extras = ["Resumo", "Palavras-chave", "Abstract", "Keywords"]
-
-    # Monta o corpo do artigo
-    for entrada in extras + [nome for _, nome in secoes_ordenadas]:
-        if entrada in extras:
-            titulo_secao = entrada.upper()
-        else:
-            numero = next(num for num, nome in secoes_ordenadas if nome == entrada)
-            titulo_secao = f"{numero} {entrada.upper()}"
-
-        if entrada not in extras:
-            heading = doc.add_heading(level=1)
-            run_heading = heading.add_run(titulo_secao)
-            run_heading.bold = True
-            run_heading.font.name = "Times New Roman"
-            run_heading.font.size = Pt(12)
-            run_heading.font.color.rgb = RGBColor(0, 0, 0)
-            heading.paragraph_format.space_after = Pt(12)
-
-        if entrada in conteudo:
-            for i, paragrafo in enumerate(conteudo[entrada]):
-                if entrada in extras and i == 0:
-                    p = doc.add_paragraph()
-                    run_titulo = p.add_run(f"{entrada.upper()}: ")
-                    run_titulo.bold = True
-                    run_titulo.font.name = "Times New Roman"
-                    run_titulo.font.size = Pt(12)
-                    run_titulo.font.color.rgb = RGBColor(0, 0, 0)
-
-                    run_texto = p.add_run(paragrafo)
-                    run_texto.font.name = "Times New Roman"
-                    run_texto.font.size = Pt(12)
-                    run_texto.font.color.rgb = RGBColor(0, 0, 0)
-                    recuo = Cm(0)
-                else:
-                    p = doc.add_paragraph()
-                    run = p.add_run(paragrafo)
-                    run.font.name = "Times New Roman"
-                    run.font.size = Pt(12)
-                    run.font.color.rgb = RGBColor(0, 0, 0)
-                    recuo = Cm(0) if entrada in extras else Cm(1.25)
-
-                p.paragraph_format.first_line_indent = recuo
-                p.paragraph_format.line_spacing = 1.5
-                p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-        else:
-            doc.add_paragraph("Conteúdo não disponível.")
-
-    # Adiciona Referências no final
-    if "Referências" in conteudo:
-        heading = doc.add_heading(level=1)
-        run_heading = heading.add_run("REFERÊNCIAS")
-        run_heading.bold = True
-        run_heading.font.name = "Times New Roman"
-        run_heading.font.size = Pt(12)
-        run_heading.font.color.rgb = RGBColor(0, 0, 0)
-        heading.paragraph_format.space_after = Pt(10)
-
-        for paragrafo in conteudo["Referências"]:
-            p = doc.add_paragraph()
-            run = p.add_run(paragrafo)
-            run.font.name = "Times New Roman"
-            run.font.size = Pt(12)
-            run.font.color.rgb = RGBColor(0, 0, 0)
-            p.paragraph_format.first_line_indent = Cm(0)
-            p.paragraph_format.line_spacing = 1.5
-            p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    nome_limpo = re.sub(r'[^\w\s-]', '', titulo_original).strip()
-    nome_final = "_".join(nome_limpo.split())
-    nome_arquivo = os.path.join(OUTPUT_DIR, nome_final + ".docx")
-
-    adicionar_num_pagina_word(doc)
-
-    doc.save(nome_arquivo)
-    return nome_arquivo
+# Configuração da fila de geração
+WORKERS_GERACAO = int(os.getenv("WORKERS_GERACAO", "4"))
+TAMANHO_FILA = int(os.getenv("TAMANHO_FILA", "32"))
+# Registro das tarefas compartilhado pelos workers do servidor de produção
+TAREFAS_ARQUIVO = os.getenv("TAREFAS_ARQUIVO", "tarefas.sqlite3")
 
 # Rota para a página inicial 
 @app.route('/')
 def home():
     return render_template('index.html')
 
-# Rota para gerar o trabalho e permitir o download
+# Executa todas as etapas de uma tarefa de geração fora da requisição
+def processar_tarefa(tarefa):
+    titulo = tarefa.dados["titulo"]
+    tema = tarefa.dados["tema"]
+    autor = tarefa.dados["autor"]
+
+    # No modo streaming o texto já chega pronto e só falta salvar e gerar os arquivos
+    trabalho = tarefa.dados.get("trabalho")
+    if trabalho is None:
+        tarefa.avancar(fila_tarefas.GERANDO)
+        trabalho = gerar_artigo_abnt(titulo, tema, autor, modo=tarefa.dados.get("modo"))
+
+    # Só o texto é salvo; cada formato é gerado no primeiro download. A
+    # gravação no banco acontece em segundo plano e o id chega depois; se o
+    # banco estiver fora do ar e o trabalho for para a pasta de espera, o id
+    # fica None (ele pode acabar gravado por outro processo).
+    tarefa.avancar(fila_tarefas.SALVANDO)
+    resultado = {"trabalho": trabalho, "id_trabalho": None}
+    futuro = gravacao.enviar(titulo, tema, autor, trabalho)
+
+    # Com a tarefa já concluída, o registro compartilhado é regravado para os
+    # outros workers verem o id; antes disso, a gravação do CONCLUIDO já leva o id
+    def registrar_id(futuro):
+        if futuro.exception() is None:
+            resultado["id_trabalho"] = futuro.result()
+            if tarefa.finalizada and tarefa.registro is not None:
+                tarefa.registro.gravar(tarefa)
+    futuro.add_done_callback(registrar_id)
+
+    return resultado
+
+fila = FilaTarefas(processar_tarefa, workers=WORKERS_GERACAO, capacidade=TAMANHO_FILA,
+                   registro=RegistroTarefas(TAREFAS_ARQUIVO))
+metricas.Medidor("fila_tarefas_tamanho", "Tarefas de geração aguardando na fila.", funcao=fila.tamanho)
+
+# Gravação dos trabalhos no banco em lotes, fora das tarefas de geração.
+# Ao encerrar o processo, o que ainda estiver na fila é gravado (ou guardado em disco).
+gravacao = FilaGravacao()
+atexit.register(gravacao.esvaziar)
+metricas.Medidor("gravacao_fila_tamanho", "Trabalhos aguardando gravação no banco.", funcao=gravacao.tamanho)
+metricas.Medidor("gravacao_lotes_em_espera", "Lotes guardados em disco aguardando o banco voltar.",
+                 funcao=gravacao.lotes_em_espera)
+metricas.Medidor("gravacao_pendente_mais_antiga_segundos", "Idade do trabalho mais antigo ainda não gravado.",
+                 funcao=gravacao.idade_pendente_mais_antiga)
+
+# Duração e quantidade de requisições em andamento por rota (o modelo da rota,
+# não a URL, para não criar uma série por id)
+@app.before_request
+def iniciar_medicao():
+    g.rota = request.url_rule.rule if request.url_rule else "desconhecida"
+    g.inicio_requisicao = time.perf_counter()
+    metricas.HTTP_EM_ANDAMENTO.somar(1, rota=g.rota)
+
+@app.teardown_request
+def encerrar_medicao(erro=None):
+    if "inicio_requisicao" not in g:
+        return
+    metricas.HTTP_EM_ANDAMENTO.somar(-1, rota=g.rota)
+    metricas.HTTP_LATENCIA.observar(time.perf_counter() - g.inicio_requisicao, rota=g.rota, metodo=request.method)
+
+# A limpeza de output_files e a gravação no banco rodam em segundo plano em
+# cada processo do servidor, que também é aquecido (no gunicorn isso já
+# acontece ao iniciar o worker)
+@app.before_request
+def iniciar_segundo_plano():
+    limpeza_artefatos.iniciar_varredor()
+    gravacao.iniciar()
+    aquecimento.iniciar()
+
+# O processo está de pé e atendendo (liveness)
+@app.route('/saude')
+def saude():
+    return jsonify(status="ok", pid=os.getpid())
+
+# O worker pode receber tráfego (readiness): o pool do banco tem conexões
+# abertas e o cliente do Gemini foi criado. Responde 503 enquanto não estiver.
+@app.route('/pronto')
+def pronto():
+    estado = aquecimento.estado()
+    return jsonify(estado), 200 if estado["pronto"] else 503
+
+# Métricas no formato de texto do Prometheus
+@app.route('/metrics')
+def exportar_metricas():
+    return Response(metricas.exportar(), content_type=metricas.TIPO_CONTEUDO)
+
+# Rota para enfileirar a geração do trabalho; devolve o id da tarefa imediatamente
 @app.route('/gerar_trabalho', methods=['POST'])
 def gerar_trabalho():
     autor = request.form.get('autor')
     titulo = request.form.get('titulo')
     tema = request.form.get('tema')
+    modo = request.form.get('modo')
 
     if not titulo or not tema:
         return "Erro: Título e Tema são obrigatórios", 400
 
-    trabalho = gerar_artigo_abnt(titulo, tema, autor)
+    try:
+        tarefa = fila.enviar(titulo=titulo, tema=tema, autor=autor, modo=modo)
+    except FilaCheia:
+        return "Erro: Muitos trabalhos em geração, tente novamente em instantes", 503
+
+    return jsonify(id=tarefa.id,
+                   status=url_for('status_tarefa', id_tarefa=tarefa.id),
+                   resultado=url_for('resultado_tarefa', id_tarefa=tarefa.id)), 202
+
+# Rota consultada pela página para acompanhar a etapa atual da tarefa
+@app.route('/tarefas/<id_tarefa>')
+def status_tarefa(id_tarefa):
+    tarefa = fila.obter(id_tarefa)
+    if not tarefa:
+        return jsonify(erro="Tarefa não encontrada"), 404
+    return jsonify(tarefa.para_dict())
+
+# Mostrar página com os dois botões quando a tarefa terminar
+@app.route('/tarefas/<id_tarefa>/resultado')
+def resultado_tarefa(id_tarefa):
+    tarefa = fila.obter(id_tarefa)
+    if not tarefa:
+        return "Tarefa não encontrada", 404
+    if tarefa.etapa == fila_tarefas.FALHOU:
+        return f"Erro ao gerar o trabalho: {tarefa.erro}", 500
+    if tarefa.etapa != fila_tarefas.CONCLUIDO:
+        return "Trabalho ainda em geração", 409
+
+    resultado = tarefa.resultado
+    return render_template('download.html', id_trabalho=resultado["id_trabalho"],
+                       preview=resultado["trabalho"], titulo=tarefa.dados["titulo"], autor=tarefa.dados["autor"])
+
+
+# Formata um evento no padrão Server-Sent Events
+def evento_sse(evento, dados):
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+# Página de prévia que recebe o artigo em tempo real
+@app.route('/previa')
+def previa():
+    autor = request.args.get('autor')
+    titulo = request.args.get('titulo')
+    tema = request.args.get('tema')
 
-    # SALVAR NO BANCO
-    salvar_trabalho(titulo, tema, autor, trabalho, pdf=True, docx=True)
+    if not titulo or not tema:
+        return "Erro: Título e Tema são obrigatórios", 400
 
-    # Gerar arquivos
-    nome_docx = os.path.basename(salvar_em_docx(titulo, trabalho, autor))
-    nome_pdf = os.path.basename(salvar_em_pdf(titulo, trabalho, autor))
+    url_stream = url_for('gerar_trabalho_stream', titulo=titulo, tema=tema, autor=autor,
+                         modo=request.args.get('modo'))
+    return render_template('download.html', preview="", titulo=titulo, autor=autor,
+                           url_stream=url_stream)
 
-    # Mostrar página com os dois botões
-    return render_template('download.html', nome_docx=nome_docx, nome_pdf=nome_pdf,
-                       preview=trabalho, titulo=titulo, autor=autor)
+# Envia o artigo trecho a trecho; o salvamento e os arquivos começam quando o stream termina
+@app.route('/gerar_trabalho/stream')
+def gerar_trabalho_stream():
+    autor = request.args.get('autor')
+    titulo = request.args.get('titulo')
+    tema = request.args.get('tema')
+    modo = request.args.get('modo')
 
+    if not titulo or not tema:
+        return "Erro: Título e Tema são obrigatórios", 400
 
+    def eventos():
+        partes = []
+        try:
+            for parte in gerar_artigo_abnt_stream(titulo, tema, autor, modo=modo):
+                partes.append(parte)
+                yield evento_sse("trecho", {"texto": parte})
+        except Exception as e:
+            print("❌ Erro durante o streaming do artigo:", e)
+            yield evento_sse("erro", {"erro": str(e)})
+            return
+
+        trabalho = "".join(partes)
+        try:
+            tarefa = fila.enviar(titulo=titulo, tema=tema, autor=autor, trabalho=trabalho)
+        except FilaCheia:
+            yield evento_sse("erro", {"erro": "Fila cheia: o trabalho não foi salvo, mas ainda pode ser baixado."})
+            return
+        yield evento_sse("fim", {"id": tarefa.id, "status": url_for('status_tarefa', id_tarefa=tarefa.id)})
+
+    return Response(stream_with_context(eventos()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Contadores do cache de artigos
+@app.route('/cache/estatisticas')
+def estatisticas_cache():
+    return jsonify(cache.estatisticas())
+
+# Chamadas, novas tentativas e estado do disjuntor do cliente do Gemini
+@app.route('/gemini/estatisticas')
+def estatisticas_gemini():
+    return jsonify(gerador_artigos.obter_modelo().estatisticas())
+
+# Arquivos gerados versus reaproveitados pelo armazém de artefatos, e o
+# espaço em disco e as remoções da limpeza
+@app.route('/artefatos/estatisticas')
+def estatisticas_artefatos():
+    return jsonify({**armazem_artefatos.estatisticas(), "limpeza": limpeza_artefatos.estatisticas()})
+
+# Estatísticas do pool de conexões com o banco
+@app.route('/banco/estatisticas')
+def estatisticas_banco():
+    return jsonify(estatisticas_pool())
+
+# Estatísticas da gravação em segundo plano
+@app.route('/gravacao/estatisticas')
+def estatisticas_gravacao():
+    return jsonify(gravacao.estatisticas())
+
+# Download pelo id do trabalho. O arquivo é gerado a partir do texto salvo
+# no primeiro pedido e reaproveitado nos seguintes; pedidos simultâneos
+# pelo mesmo arquivo esperam uma única geração. O ETag vem do hash do
+# artefato, então um download repetido recebe 304 e um retomado recebe 206.
+@app.route('/trabalhos/<int:id_trabalho>/download/<formato>')
+def baixar_trabalho(id_trabalho, formato):
+    if formato not in armazem_artefatos.FORMATOS:
+        return "Formato inválido", 400
+    trabalho = obter_trabalho(id_trabalho)
+    if not trabalho:
+        return "Trabalho não encontrado", 404
+
+    artefatos = armazem_artefatos.obter_ou_renderizar(trabalho["titulo"], trabalho["texto_gerado"],
+                                                      trabalho["autor"], formatos=(formato,))
+    hash_artefato, tamanho = artefatos[formato]
+    if trabalho[f"hash_{formato}"] != hash_artefato:
+        registrar_artefato(id_trabalho, formato, hash_artefato, tamanho)
+
+    return enviar_arquivo(armazem_artefatos.caminho_artefato(hash_artefato, formato),
+                          f"{nome_seguro(trabalho['titulo']) or 'trabalho'}.{formato}", mimetype=TIPOS_MIME[formato])
+
+# Download pelo nome do arquivo. Um artefato gerado em outro nó é trazido
+# do armazenamento compartilhado para o cache local antes de ser enviado.
 @app.route('/download/<nome_arquivo>')
 def baixar_arquivo(nome_arquivo):
     if '..' in nome_arquivo or nome_arquivo.startswith('/'):
         return "Arquivo inválido", 400
-    caminho = os.path.join(OUTPUT_DIR, nome_arquivo)
-    if not os.path.isfile(caminho):
+    caminho = armazem_artefatos.obter_local(nome_arquivo)
+    if caminho is None:
         return "Arquivo não encontrado", 404
-    return send_from_directory(OUTPUT_DIR, nome_arquivo, as_attachment=True)
+    return enviar_arquivo(caminho, nome_arquivo)
+
+# Converte "AAAA-MM-DD" em data, ignorando valores inválidos
+def ler_data(valor):
+    try:
+        return date.fromisoformat(valor) if valor else None
+    except ValueError:
+        return None
+
+# Número inteiro da query string, limitado a [minimo, maximo]
+def ler_inteiro(nome, padrao, minimo=1, maximo=100):
+    try:
+        return min(max(int(request.args.get(nome, padrao)), minimo), maximo)
+    except ValueError:
+        return padrao
+
+# Trecho da busca com os termos encontrados em <mark>; o resto do texto é
+# escapado e perde as marcações de markdown (**, ##) do artigo
+@app.template_filter('destaque')
+def destaque(trecho):
+    texto = str(escape(re.sub(r"[*#]+", "", trecho or "")))
+    return Markup(texto.replace(INICIO_DESTAQUE, "<mark>").replace(FIM_DESTAQUE, "</mark>"))
+
+# Busca textual nos trabalhos, em JSON
+@app.route('/trabalhos/busca')
+def buscar():
+    termo = request.args.get('q', '').strip()
+    if not termo:
+        return jsonify({"erro": "Informe o termo de busca em q."}), 400
+    resultado = buscar_trabalhos(termo, limite=ler_inteiro('por_pagina', 20),
+                                 pagina=ler_inteiro('pagina', 1, maximo=1000))
+    colunas = ("id", "titulo", "autor", "data_criacao", "gerado_pdf", "gerado_docx", "relevancia", "trecho")
+    trabalhos = [dict(zip(colunas, linha)) for linha in resultado["trabalhos"]]
+    for trabalho in trabalhos:
+        trabalho["data_criacao"] = trabalho["data_criacao"].isoformat()
+        trabalho["trecho"] = str(destaque(trabalho["trecho"]))
+    return jsonify({"trabalhos": trabalhos, "pagina": resultado["pagina"], "tem_mais": resultado["tem_mais"],
+                    "total": resultado["total"], "truncado": resultado["truncado"]})
 
 @app.route('/trabalhos')
 def trabalhos():
-    lista = listar_trabalhos()
-    return render_template('trabalhos.html', trabalhos=lista)
+    por_pagina = ler_inteiro('por_pagina', 20)
+
+    # Com um termo de busca, a lista vira o resultado da busca, do mais relevante ao menos
+    termo = request.args.get('q', '').strip()
+    if termo:
+        pagina = ler_inteiro('pagina', 1, maximo=1000)
+        resultado = buscar_trabalhos(termo, limite=por_pagina, pagina=pagina)
+        pagina = resultado['pagina']
+        filtros = {'q': termo, 'por_pagina': por_pagina}
+        return render_template('trabalhos.html', trabalhos=resultado['trabalhos'], busca=termo,
+                               total=resultado['total'], truncado=resultado['truncado'],
+                               anterior=pagina - 1 if pagina > 1 else None,
+                               proximo=pagina + 1 if resultado['tem_mais'] else None,
+                               filtros=filtros, filtros_ativos=filtros)
+
+    filtros = {
+        'autor': request.args.get('autor', '').strip(),
+        'de': request.args.get('de', ''),
+        'ate': request.args.get('ate', ''),
+        'por_pagina': por_pagina,
+    }
+    pagina = listar_trabalhos(limite=por_pagina,
+                              cursor=request.args.get('cursor'),
+                              anteriores=request.args.get('direcao') == 'anterior',
+                              autor=filtros['autor'] or None,
+                              data_inicio=ler_data(filtros['de']),
+                              data_fim=ler_data(filtros['ate']))
+
+    # Só repassa nos links os filtros que estão preenchidos
+    filtros_ativos = {chave: valor for chave, valor in filtros.items() if valor}
+    return render_template('trabalhos.html', trabalhos=pagina['trabalhos'],
+                           anterior=pagina['anterior'], proximo=pagina['proximo'],
+                           filtros=filtros, filtros_ativos=filtros_ativos)
 
 # Iniciar o servidor Flask
 def abrir_navegador():
+    import webbrowser
     webbrowser.open_new("http://127.0.0.1:5000")
 
 @app.route('/baixar_trabalho_editado', methods=['POST'])
@@ -475,15 +373,16 @@ def baixar_trabalho_editado():
     if not texto or not titulo:
         return "Erro: Texto e Título são obrigatórios", 400
 
-    if formato == 'pdf':
-        caminho = salvar_em_pdf(titulo, texto, autor)
-    else:
-        caminho = salvar_em_docx(titulo, texto, autor)
-
-    nome_arquivo = os.path.basename(caminho)
-    return send_from_directory(OUTPUT_DIR, nome_arquivo, as_attachment=True)
+    # O arquivo editado é gerado na memória e enviado direto, sem passar pelo disco
+    formato = 'pdf' if formato == 'pdf' else 'docx'
+    dados = executor_renderizacao.renderizar_em_bytes(formato, titulo, texto, autor)
+    resposta = send_file(BytesIO(dados), mimetype=TIPOS_MIME[formato], as_attachment=True,
+                         download_name=f"{nome_seguro(titulo) or 'trabalho'}.{formato}")
+    resposta.content_length = len(dados)
+    return resposta
 
 
+# Servidor de desenvolvimento; em produção use o gunicorn (gunicorn.conf.py)
 if __name__ == "__main__":
     threading.Timer(1.0, abrir_navegador).start()
     app.run(debug=True, use_reloader=False)
\ No newline at end of file
@@ -0,0 +1,79 @@
+# Aquecimento e prontidão dos processos do servidor de produção
+# (gunicorn.conf.py). O processo mestre carrega, antes do fork, o que é
+# igual em todos os workers; cada worker abre depois o que não pode ser
+# herdado: as conexões com o banco, o cliente do Gemini e o pool de
+# renderização. /pronto só responde 200 quando o banco e o Gemini estão prontos.
+import os
+import threading
+import time
+import database
+import executor_renderizacao
+import gerador_artigos
+
+_estado = {"banco": False, "renderizacao": False, "aquecido_em": None}
+_lock = threading.Lock()
+_pid = None
+
+
+# No mestre, com o app já importado (preload_app): compila os templates,
+# que ficam no cache do Jinja herdado pelos workers, e importa o SDK do
+# Gemini, o módulo mais pesado. Os prompts são montados na importação de
+# gerador_artigos. Nada aqui abre conexões, que não sobrevivem ao fork.
+def antes_do_fork(app):
+    inicio = time.perf_counter()
+    for nome in app.jinja_env.list_templates():
+        app.jinja_env.get_template(nome)
+    if not os.getenv("GEMINI_FALSO"):
+        import google.generativeai
+    print(f"✅ Aplicação carregada no processo mestre em {time.perf_counter() - inicio:.2f} s.")
+
+def _aquecer_banco():
+    espera = 1.0
+    while True:
+        try:
+            with database.conexao():
+                pass
+            _estado["banco"] = True
+            return
+        except Exception as e:
+            print(f"⚠️  Banco indisponível ao aquecer o worker {os.getpid()}; nova tentativa em {espera:.0f} s:", e)
+            time.sleep(espera)
+            espera = min(30.0, espera * 2)
+
+def _aquecer():
+    inicio = time.perf_counter()
+    gerador_artigos.obter_modelo()
+    try:
+        executor_renderizacao.aquecer()
+        _estado["renderizacao"] = True
+    except Exception as e:
+        print("❌ Erro ao aquecer o pool de renderização:", e)
+    _aquecer_banco()
+    _estado["aquecido_em"] = time.time()
+    print(f"✅ Worker {os.getpid()} pronto em {time.perf_counter() - inicio:.2f} s.")
+
+# Aquece o processo atual em segundo plano (uma vez por processo), para que
+# o worker já aceite conexões enquanto isso
+def iniciar():
+    global _pid
+    if _pid == os.getpid():
+        return
+    with _lock:
+        if _pid == os.getpid():
+            return
+        _estado.update(banco=False, renderizacao=False, aquecido_em=None)
+        threading.Thread(target=_aquecer, name="aquecimento", daemon=True).start()
+        _pid = os.getpid()
+
+# Pronto quando o pool do banco tem conexões abertas neste processo e o
+# cliente do Gemini foi criado. O disjuntor do Gemini é informado, mas não
+# tira o worker do balanceador: histórico e downloads continuam funcionando.
+def estado():
+    pool = database.estatisticas_pool()
+    banco = _estado["banco"] and pool["em_uso"] + pool["ociosas"] > 0
+    gemini = gerador_artigos.modelo is not None
+    dados = {"pronto": banco and gemini, "pid": os.getpid(), "banco": banco, "gemini": gemini,
+             "renderizacao": _estado["renderizacao"], "aquecido_em": _estado["aquecido_em"]}
+    if gemini and hasattr(gerador_artigos.modelo, "disjuntor"):
+        dados["gemini_disjuntor"] = gerador_artigos.modelo.disjuntor.estado
+    return dados
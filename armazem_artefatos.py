@@ -0,0 +1,210 @@
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import ExitStack, contextmanager
+import armazenamento
+import executor_renderizacao
+from renderizadores import OUTPUT_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: a coordenação fica só entre as threads do processo
+    fcntl = None
+
+# Mude sempre que a formatação do PDF ou do DOCX mudar, para que os
+# arquivos antigos não sejam reaproveitados com o layout velho
+VERSAO_LAYOUT = "2"
+FORMATOS = ("docx", "pdf")
+
+# Nome dos arquivos do armazém: o hash seguido do formato
+PADRAO_ARTEFATO = re.compile(r"^([0-9a-f]{64})\.(\w+)$")
+
+# O último acesso só é regravado se for mais antigo que isso, para não
+# escrever no disco a cada download
+INTERVALO_MARCAR_ACESSO = 60
+
+_estatisticas = {"renderizados": 0, "reaproveitados": 0, "aguardados": 0,
+                 "trazidos_armazenamento": 0, "enviados_armazenamento": 0, "falhas_armazenamento": 0}
+_lock = threading.Lock()
+_em_andamento = {}
+
+
+# O arquivo é identificado pelo conteúdo que aparece nele: dois pedidos com
+# o mesmo texto, título e autor produzem exatamente o mesmo artefato. Os dois
+# motores de DOCX (MOTOR_DOCX) geram arquivos diferentes, então o motor também
+# entra no hash; trocar de motor não reaproveita (nem valida o ETag de) um
+# arquivo gerado pelo outro.
+def calcular_hash(titulo, texto, autor, formato):
+    partes = [VERSAO_LAYOUT, formato, titulo or "", autor or "", texto or ""]
+    if formato == "docx":
+        partes.insert(2, executor_renderizacao.MOTOR_DOCX)
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+def caminho_artefato(hash_artefato, formato):
+    return os.path.join(OUTPUT_DIR, f"{hash_artefato}.{formato}")
+
+# Guarda o instante do último download no atime do arquivo, que a limpeza
+# usa para remover primeiro os menos usados. O mtime é mantido porque faz
+# parte do ETag. Funciona mesmo com o disco montado com noatime.
+def marcar_acesso(caminho, estado=None):
+    try:
+        estado = estado or os.stat(caminho)
+        agora = time.time_ns()
+        if agora - estado.st_atime_ns > INTERVALO_MARCAR_ACESSO * 1_000_000_000:
+            os.utime(caminho, ns=(agora, estado.st_mtime_ns))
+    except OSError:
+        pass
+
+# Trava entre processos (workers do servidor) para que só um deles gere o
+# mesmo arquivo. Usa 256 arquivos de trava fixos, escolhidos pelo prefixo do hash.
+# Com `bloquear=False` não espera: devolve False se outro processo tiver a trava.
+@contextmanager
+def _trava_entre_processos(prefixo, bloquear=True):
+    if fcntl is None:
+        yield True
+        return
+    pasta = os.path.join(OUTPUT_DIR, ".travas")
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, prefixo + ".lock"), "a") as arquivo:
+        try:
+            fcntl.flock(arquivo, fcntl.LOCK_EX if bloquear else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+# Copia o arquivo do armazenamento compartilhado para o cache local.
+# Devolve False se ele não estiver lá (ou se o armazenamento falhar, caso
+# em que o arquivo é gerado de novo).
+def _trazer(caminho):
+    backend = armazenamento.obter()
+    if backend.serve_como_cache:
+        return False
+    temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        with backend.abrir(os.path.basename(caminho)) as origem, open(temporario, "wb") as destino:
+            shutil.copyfileobj(origem, destino, armazenamento.TAMANHO_BLOCO)
+        os.replace(temporario, caminho)
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        print("⚠️  Falha ao ler do armazenamento:", e)
+        _estatisticas["falhas_armazenamento"] += 1
+        return False
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    _estatisticas["trazidos_armazenamento"] += 1
+    return True
+
+# Envia um arquivo recém-gerado para o armazenamento compartilhado. Se
+# falhar, o download continua sendo servido pelo cache deste nó.
+def _enviar(caminho):
+    backend = armazenamento.obter()
+    if backend.serve_como_cache:
+        return
+    try:
+        with open(caminho, "rb") as arquivo:
+            backend.gravar(os.path.basename(caminho), arquivo)
+        _estatisticas["enviados_armazenamento"] += 1
+    except Exception as e:
+        print("⚠️  Falha ao gravar no armazenamento:", e)
+        _estatisticas["falhas_armazenamento"] += 1
+
+# Gera os formatos pendentes em paralelo. Os arquivos são gravados com nome
+# temporário e renomeados no fim, então um download nunca vê um arquivo pela metade.
+def _renderizar_pendentes(titulo, texto, autor, conteudo, pendentes):
+    with ExitStack() as pilha:
+        for prefixo in sorted({hash_artefato[:2] for hash_artefato, _ in pendentes.values()}):
+            pilha.enter_context(_trava_entre_processos(prefixo))
+
+        # Outro processo pode ter gerado o arquivo enquanto esperávamos a
+        # trava, ou outro nó pode já tê-lo no armazenamento compartilhado
+        faltando = {formato: caminho for formato, (_, caminho) in pendentes.items()
+                    if not os.path.isfile(caminho) and not _trazer(caminho)}
+        if not faltando:
+            return
+
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        destinos = {formato: f"{caminho}.{uuid.uuid4().hex}.tmp" for formato, caminho in faltando.items()}
+        try:
+            executor_renderizacao.renderizar_formatos(titulo, texto, autor, conteudo,
+                                                      formatos=list(faltando), destinos=destinos)
+            for formato, caminho in faltando.items():
+                os.replace(destinos[formato], caminho)
+                _estatisticas["renderizados"] += 1
+                _enviar(caminho)
+        finally:
+            for temporario in destinos.values():
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+
+# Devolve {formato: (hash, tamanho_em_bytes)}, gerando só os formatos que
+# ainda não existem no disco. Pedidos simultâneos pelo mesmo arquivo
+# esperam uma única geração em vez de gerarem cada um a sua cópia.
+def obter_ou_renderizar(titulo, texto, autor, conteudo=None, formatos=FORMATOS):
+    hashes = {}
+    meus = {}
+    de_outros = {}
+    for formato in formatos:
+        hash_artefato = calcular_hash(titulo, texto, autor, formato)
+        caminho = caminho_artefato(hash_artefato, formato)
+        hashes[formato] = (hash_artefato, caminho)
+        if os.path.isfile(caminho):
+            marcar_acesso(caminho)
+            _estatisticas["reaproveitados"] += 1
+            continue
+        with _lock:
+            futuro = _em_andamento.get(caminho)
+            if futuro is None:
+                futuro = _em_andamento[caminho] = Future()
+                meus[formato] = futuro
+            else:
+                de_outros[formato] = futuro
+
+    if meus:
+        try:
+            _renderizar_pendentes(titulo, texto, autor, conteudo, {formato: hashes[formato] for formato in meus})
+        except Exception as e:
+            for futuro in meus.values():
+                futuro.set_exception(e)
+            raise
+        else:
+            for futuro in meus.values():
+                futuro.set_result(None)
+        finally:
+            with _lock:
+                for formato in meus:
+                    del _em_andamento[hashes[formato][1]]
+
+    for futuro in de_outros.values():
+        futuro.result()
+        _estatisticas["aguardados"] += 1
+
+    return {formato: (hash_artefato, os.path.getsize(caminho))
+            for formato, (hash_artefato, caminho) in hashes.items()}
+
+# Caminho no cache local de um arquivo pedido pelo nome, trazendo-o do
+# armazenamento compartilhado se preciso. Devolve None se ele não existir.
+def obter_local(nome_arquivo):
+    caminho = os.path.join(OUTPUT_DIR, nome_arquivo)
+    if os.path.isfile(caminho):
+        return caminho
+    if not PADRAO_ARTEFATO.match(nome_arquivo):
+        return None
+    with _trava_entre_processos(nome_arquivo[:2]):
+        if os.path.isfile(caminho) or _trazer(caminho):
+            return caminho
+    return None
+
+def estatisticas():
+    return dict(_estatisticas, armazenamento=armazenamento.ARMAZENAMENTO)
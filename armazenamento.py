@@ -0,0 +1,196 @@
+# Onde os arquivos gerados ficam guardados. output_files/ continua sendo o
+# cache local de cada nó (é dele que os downloads são servidos, com ETag,
+# Range e sendfile); o armazenamento escolhido em ARMAZENAMENTO é a origem
+# compartilhada, para que um arquivo gerado num nó possa ser baixado em
+# qualquer outro.
+#
+#   local     uma pasta (ARMAZENAMENTO_PASTA, padrão output_files/); com
+#             uma pasta de rede montada em todos os nós, vira compartilhado
+#   postgres  large objects no mesmo banco dos trabalhos
+#   s3        um bucket S3 ou compatível (MinIO, moto), via boto3
+#
+# Todo backend lê e grava em blocos, sem carregar o arquivo inteiro na memória.
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from renderizadores import OUTPUT_DIR
+from database import conexao
+from metricas import BANCO_LATENCIA
+
+ARMAZENAMENTO = os.getenv("ARMAZENAMENTO", "local").strip().lower()
+TAMANHO_BLOCO = 1024 * 1024
+
+
+class ArmazenamentoLocal:
+    def __init__(self, pasta=OUTPUT_DIR):
+        self.pasta = pasta
+        # Na configuração padrão a pasta é o próprio cache e não há o que copiar
+        self.serve_como_cache = os.path.abspath(pasta) == os.path.abspath(OUTPUT_DIR)
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, chave)
+
+    def existe(self, chave):
+        return os.path.isfile(self._caminho(chave))
+
+    def gravar(self, chave, arquivo):
+        destino = self._caminho(chave)
+        os.makedirs(self.pasta, exist_ok=True)
+        temporario = f"{destino}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temporario, "wb") as saida:
+                shutil.copyfileobj(arquivo, saida, TAMANHO_BLOCO)
+            os.replace(temporario, destino)
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    # Levanta FileNotFoundError se a chave não existir
+    @contextmanager
+    def abrir(self, chave):
+        with open(self._caminho(chave), "rb") as arquivo:
+            yield arquivo
+
+    def remover(self, chave):
+        try:
+            os.remove(self._caminho(chave))
+        except FileNotFoundError:
+            pass
+
+
+# Cada arquivo é um large object; a tabela artefatos_armazenados liga a
+# chave ao oid (migracoes/003_artefatos_armazenados.sql). Large objects são
+# lidos e gravados em blocos, ao contrário de uma coluna bytea.
+class ArmazenamentoPostgres:
+    serve_como_cache = False
+
+    def existe(self, chave):
+        with BANCO_LATENCIA.medir(operacao="artefato_existe"), conexao() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1 FROM artefatos_armazenados WHERE chave = %s", (chave,))
+                encontrado = cur.fetchone() is not None
+            conn.rollback()
+        return encontrado
+
+    def gravar(self, chave, arquivo):
+        with BANCO_LATENCIA.medir(operacao="artefato_gravar"), conexao() as conn:
+            objeto = conn.lobject(0, "wb")
+            tamanho = 0
+            while True:
+                bloco = arquivo.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+                tamanho += objeto.write(bloco)
+            objeto.close()
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO artefatos_armazenados (chave, oid, tamanho) VALUES (%s, %s, %s)
+                    ON CONFLICT (chave) DO NOTHING
+                    RETURNING chave
+                """, (chave, objeto.oid, tamanho))
+                inserido = cur.fetchone() is not None
+            # Outro nó gravou o mesmo arquivo antes: desfazer a transação descarta o large object
+            if inserido:
+                conn.commit()
+            else:
+                conn.rollback()
+
+    @contextmanager
+    def abrir(self, chave):
+        with conexao() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT oid FROM artefatos_armazenados WHERE chave = %s", (chave,))
+                linha = cur.fetchone()
+            if linha is None:
+                conn.rollback()
+                raise FileNotFoundError(chave)
+            objeto = conn.lobject(linha[0], "rb")
+            try:
+                yield objeto
+            finally:
+                objeto.close()
+                conn.rollback()
+
+    def remover(self, chave):
+        with BANCO_LATENCIA.medir(operacao="artefato_remover"), conexao() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM artefatos_armazenados WHERE chave = %s RETURNING oid", (chave,))
+                linha = cur.fetchone()
+                if linha is not None:
+                    cur.execute("SELECT lo_unlink(%s)", (linha[0],))
+            conn.commit()
+
+
+# Bucket S3 ou compatível. S3_ENDPOINT_URL aponta para um servidor
+# compatível (MinIO, moto); as credenciais seguem as variáveis do boto3.
+class ArmazenamentoS3:
+    serve_como_cache = False
+
+    def __init__(self, bucket, prefixo="", endpoint_url=None):
+        import boto3
+        from botocore.exceptions import ClientError
+        self._erro_cliente = ClientError
+        self.cliente = boto3.client("s3", endpoint_url=endpoint_url or None)
+        self.bucket = bucket
+        self.prefixo = prefixo
+
+    def _nao_encontrado(self, erro):
+        codigo = erro.response.get("Error", {}).get("Code")
+        return codigo in ("404", "NoSuchKey", "NotFound")
+
+    def existe(self, chave):
+        try:
+            self.cliente.head_object(Bucket=self.bucket, Key=self.prefixo + chave)
+            return True
+        except self._erro_cliente as e:
+            if self._nao_encontrado(e):
+                return False
+            raise
+
+    # upload_fileobj lê o arquivo em partes e usa upload multipart nos grandes
+    def gravar(self, chave, arquivo):
+        self.cliente.upload_fileobj(arquivo, self.bucket, self.prefixo + chave)
+
+    @contextmanager
+    def abrir(self, chave):
+        try:
+            resposta = self.cliente.get_object(Bucket=self.bucket, Key=self.prefixo + chave)
+        except self._erro_cliente as e:
+            if self._nao_encontrado(e):
+                raise FileNotFoundError(chave) from e
+            raise
+        corpo = resposta["Body"]
+        try:
+            yield corpo
+        finally:
+            corpo.close()
+
+    def remover(self, chave):
+        self.cliente.delete_object(Bucket=self.bucket, Key=self.prefixo + chave)
+
+
+def criar_armazenamento(tipo=ARMAZENAMENTO):
+    if tipo == "local":
+        return ArmazenamentoLocal(os.getenv("ARMAZENAMENTO_PASTA", OUTPUT_DIR))
+    if tipo == "postgres":
+        return ArmazenamentoPostgres()
+    if tipo == "s3":
+        return ArmazenamentoS3(os.environ["S3_BUCKET"], os.getenv("S3_PREFIXO", ""), os.getenv("S3_ENDPOINT_URL"))
+    raise ValueError(f"Armazenamento desconhecido: {tipo!r} (use local, postgres ou s3)")
+
+_armazenamento = None
+_pid = None
+_lock = threading.Lock()
+
+# Backend configurado, criado no primeiro uso (e de novo após um fork,
+# porque o cliente do S3 mantém conexões abertas)
+def obter():
+    global _armazenamento, _pid
+    if _pid != os.getpid():
+        with _lock:
+            if _pid != os.getpid():
+                _armazenamento = criar_armazenamento()
+                _pid = os.getpid()
+    return _armazenamento
@@ -0,0 +1,56 @@
+# Artigos sintéticos no formato das respostas do Gemini (cabeçalhos em
+# negrito, citações e referências), usados pelo modelo falso (modelo_falso.py)
+# e pelos benchmarks.
+import random
+
+# Frases usadas para montar parágrafos de tamanho previsível
+FRASES = [
+    "A pesquisa analisa o tema a partir de diferentes perspectivas teóricas.",
+    "Segundo SILVA (2020, p. 15), o conceito exige uma abordagem interdisciplinar.",
+    "Os resultados indicam uma relação consistente entre as variáveis observadas.",
+    "A metodologia adotada combina revisão bibliográfica e análise qualitativa.",
+    "Conforme SOUZA (2018, p. 42), a literatura ainda apresenta lacunas relevantes.",
+    "Os dados coletados foram organizados em categorias para facilitar a discussão.",
+    "Essa constatação reforça a importância de políticas educacionais contínuas.",
+    "Por fim, recomenda-se a ampliação do estudo para outros contextos regionais.",
+]
+
+CABECALHOS = [
+    "**Introdução**",
+    "**Revisão de Literatura**",
+    "**Metodologia**",
+    "**Resultados e Discussão**",
+    "**Conclusão**",
+]
+
+
+def paragrafo(gerador, frases=6):
+    return " ".join(gerador.choice(FRASES) for _ in range(frases))
+
+# Monta um artigo no mesmo formato devolvido pelo Gemini, com
+# `paragrafos_por_secao` parágrafos em cada seção do corpo
+def gerar_artigo(paragrafos_por_secao=4, semente=42):
+    gerador = random.Random(semente)
+    linhas = [
+        "## Artigo Sintético",
+        "",
+        "**Resumo:** " + paragrafo(gerador, 10),
+        "",
+        "**Palavras-chave:** educação; tecnologia; ensino",
+        "",
+        "**Abstract:** " + paragrafo(gerador, 10),
+        "",
+        "**Keywords:** education; technology; teaching",
+        "",
+    ]
+    for numero, cabecalho in enumerate(CABECALHOS, start=1):
+        linhas.append(f"{numero}. {cabecalho}")
+        linhas.append("")
+        for _ in range(paragrafos_por_secao):
+            linhas.append(paragrafo(gerador))
+            linhas.append("")
+    linhas.append("**Referências**")
+    linhas.append("")
+    for i in range(max(3, paragrafos_por_secao)):
+        linhas.append(f"SOBRENOME{i}, Nome. *Título da Obra {i}*. São Paulo: Editora, 20{i % 25:02d}.")
+    return "\n".join(linhas)
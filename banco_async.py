@@ -0,0 +1,61 @@
+# Acesso assíncrono ao banco para o servidor ASGI (servidor_async.py), com o
+# pool do psycopg 3 (pip install "psycopg[binary]" psycopg-pool). Usa os
+# mesmos parâmetros de conexão e limites do pool de database.py; o psycopg2
+# continua sendo o driver do servidor Flask e dos scripts.
+import os
+from database import _parametros_conexao
+from metricas import BANCO_LATENCIA
+
+_pool = None
+
+
+# Abre o pool no loop de eventos do servidor (na inicialização do app). Não
+# espera o banco responder: as conexões são feitas em segundo plano, e uma
+# consulta com o banco fora do ar falha depois de DB_POOL_TIMEOUT.
+async def abrir():
+    global _pool
+    if _pool is not None:
+        return
+    from psycopg.conninfo import make_conninfo
+    from psycopg_pool import AsyncConnectionPool
+    pool = AsyncConnectionPool(make_conninfo(**_parametros_conexao()),
+                               min_size=int(os.getenv("DB_POOL_MIN", "1")),
+                               max_size=int(os.getenv("DB_POOL_MAX", "10")),
+                               timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+                               # Como em database.py, cada conexão é validada antes de ser entregue
+                               check=AsyncConnectionPool.check_connection,
+                               open=False)
+    await pool.open(wait=False)
+    _pool = pool
+
+async def fechar():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+# Insere um trabalho e devolve o id. A chave (um UUID) é a mesma usada pela
+# gravação em segundo plano: se o trabalho já tiver sido gravado com ela,
+# nada é inserido e o retorno é None.
+async def inserir_trabalho(titulo, tema, autor, texto, chave):
+    with BANCO_LATENCIA.medir(operacao="inserir_async"):
+        async with _pool.connection() as conn:
+            cur = await conn.execute("""
+                INSERT INTO trabalhos (titulo, tema, autor, texto_gerado, gerado_pdf, gerado_docx, chave_gravacao)
+                VALUES (%s, %s, %s, %s, TRUE, TRUE, %s::uuid)
+                ON CONFLICT (chave_gravacao) DO NOTHING
+                RETURNING id
+            """, (titulo, tema, autor, texto, chave))
+            linha = await cur.fetchone()
+    return linha[0] if linha else None
+
+def estatisticas():
+    if _pool is None:
+        return {}
+    dados = _pool.get_stats()
+    return {"minimo": _pool.min_size, "maximo": _pool.max_size,
+            "em_uso": dados.get("pool_size", 0) - dados.get("pool_available", 0),
+            "ociosas": dados.get("pool_available", 0),
+            "aguardando": dados.get("requests_waiting", 0),
+            "esperas": dados.get("requests_num", 0),
+            "timeouts": dados.get("requests_errors", 0)}
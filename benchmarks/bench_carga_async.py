@@ -0,0 +1,136 @@
+# Teste de carga do servidor Flask com threads (App.py) contra o servidor
+# ASGI (servidor_async.py). Cada servidor sobe num processo próprio com o
+# modelo falso do Gemini, que demora `latencia` segundos por chamada, e
+# recebe `clientes` gerações simultâneas pela rota de streaming (SSE), que
+# prende a requisição até o fim da geração. Para cada um mostra a vazão, a
+# latência e o pico de threads e de memória do processo do servidor.
+#
+# Os artigos gerados ("Carga ...") são gravados no banco configurado no .env.
+#
+# Uso: python -m benchmarks.bench_carga_async [--clientes 300] [--latencia 2] [--servidores flask,async]
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMANDOS = {
+    "flask": [sys.executable, "-c", "import sys, App; App.app.run(port=int(sys.argv[1]), threaded=True)"],
+    "async": [sys.executable, "-m", "uvicorn", "servidor_async:app", "--log-level", "warning", "--port"],
+}
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def aguardar_porta(porta, processo, timeout=30):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("O servidor terminou antes de abrir a porta.")
+        try:
+            socket.create_connection(("127.0.0.1", porta), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"O servidor não abriu a porta {porta} em {timeout} s.")
+
+# Lê threads e memória residente do processo em /proc (só no Linux)
+def uso_processo(pid):
+    uso = {}
+    try:
+        with open(f"/proc/{pid}/status") as arquivo:
+            for linha in arquivo:
+                if linha.startswith("Threads:"):
+                    uso["threads"] = int(linha.split()[1])
+                elif linha.startswith("VmRSS:"):
+                    uso["memoria_mb"] = int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return uso
+
+def gerar(porta, titulo):
+    inicio = time.perf_counter()
+    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=300)
+    try:
+        conexao.request("GET", "/gerar_trabalho/stream?" + urlencode({"titulo": titulo, "tema": "carga", "autor": "Teste"}))
+        resposta = conexao.getresponse()
+        corpo = resposta.read()
+    except OSError:
+        return False, time.perf_counter() - inicio
+    finally:
+        conexao.close()
+    return resposta.status == 200 and b"event: fim" in corpo, time.perf_counter() - inicio
+
+def percentil(valores, fracao):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(fracao * len(valores)))] if valores else 0.0
+
+def medir(servidor, clientes, latencia):
+    porta = porta_livre()
+    pasta = tempfile.mkdtemp(prefix="bench_carga_")
+    ambiente = dict(os.environ, GEMINI_FALSO="1", GEMINI_FALSO_LATENCIA=str(latencia),
+                    # Cota e limite de chamadas fora do caminho: o que se mede é o servidor
+                    GEMINI_SIMULTANEAS="100000", GEMINI_RPM="10000000", GEMINI_TPM="10000000000",
+                    TAMANHO_FILA="100000", TAREFAS_SIMULTANEAS_ASYNC="100000",
+                    CACHE_ARTIGOS_ARQUIVO=os.path.join(pasta, "cache.sqlite3"),
+                    SPOOL_GRAVACAO=os.path.join(pasta, "spool"), ARTEFATOS_INTERVALO_LIMPEZA="0")
+    processo = subprocess.Popen(COMANDOS[servidor] + [str(porta)], cwd=RAIZ, env=ambiente,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        aguardar_porta(porta, processo)
+        picos = {"threads": 0, "memoria_mb": 0.0}
+        fim = threading.Event()
+
+        def amostrar():
+            while not fim.wait(0.1):
+                for nome, valor in uso_processo(processo.pid).items():
+                    picos[nome] = max(picos[nome], valor)
+
+        amostrador = threading.Thread(target=amostrar, daemon=True)
+        amostrador.start()
+        marca = f"{servidor} {time.time():.0f}"
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clientes) as executor:
+            resultados = list(executor.map(lambda i: gerar(porta, f"Carga {marca} {i}"), range(clientes)))
+        total = time.perf_counter() - inicio
+        fim.set()
+        amostrador.join()
+    finally:
+        processo.terminate()
+        processo.wait(timeout=30)
+
+    latencias = [duracao for ok, duracao in resultados if ok]
+    return {"concluidas": len(latencias), "erros": clientes - len(latencias), "total_s": total,
+            "vazao": len(latencias) / total, "p50_s": percentil(latencias, 0.5), "p95_s": percentil(latencias, 0.95),
+            "max_s": max(latencias, default=0.0), **picos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga: Flask com threads contra o servidor ASGI")
+    parser.add_argument("--clientes", type=int, default=300)
+    parser.add_argument("--latencia", type=float, default=2.0, help="segundos por chamada ao Gemini falso")
+    parser.add_argument("--servidores", default="flask,async")
+    argumentos = parser.parse_args()
+
+    print(f"{argumentos.clientes} gerações simultâneas, {argumentos.latencia:.1f} s por chamada ao Gemini\n")
+    print(f"{'servidor':>8} {'ok':>5} {'erros':>5} {'total':>7} {'ger/s':>7} {'p50':>6} {'p95':>6} {'máx':>6} "
+          f"{'threads':>7} {'memória':>9}")
+    for servidor in argumentos.servidores.split(","):
+        r = medir(servidor, argumentos.clientes, argumentos.latencia)
+        print(f"{servidor:>8} {r['concluidas']:5d} {r['erros']:5d} {r['total_s']:6.1f}s {r['vazao']:7.1f} "
+              f"{r['p50_s']:5.1f}s {r['p95_s']:5.1f}s {r['max_s']:5.1f}s {r['threads']:7d} {r['memoria_mb']:7.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# Compara o DOCX formatado run por run (salvar_em_docx) com o motor que
+# parte do modelo ABNT (salvar_em_docx_rapido) em artigos longos: tempo de
+# geração, tamanho do arquivo e tamanho do document.xml.
+#
+# Uso: python -m benchmarks.bench_docx [paragrafos_por_secao ...]
+import sys
+import timeit
+import zipfile
+from io import BytesIO
+
+from parser_artigo import analisar_artigo
+from renderizadores import obter_modelo_docx, salvar_em_docx, salvar_em_docx_rapido
+from artigo_sintetico import gerar_artigo
+
+
+def medir(funcao, repeticoes):
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=3)) / repeticoes
+
+def tamanhos(motor, texto, conteudo):
+    buffer = BytesIO()
+    motor("Artigo Sintético", texto, "Autor Teste", conteudo, buffer)
+    with zipfile.ZipFile(buffer) as pacote:
+        xml = pacote.getinfo("word/document.xml").file_size
+    return len(buffer.getvalue()), xml
+
+
+def main(tamanhos_artigo):
+    obter_modelo_docx()  # o modelo é montado uma vez por processo; fora da medição
+    print(f"{'parágr./seção':>13} {'motor':>9} {'tempo':>10} {'arquivo':>10} {'document.xml':>13}")
+    for paragrafos_por_secao in tamanhos_artigo:
+        texto = gerar_artigo(paragrafos_por_secao)
+        conteudo = analisar_artigo(texto)
+        resultados = {}
+        for nome, motor in (("clássico", salvar_em_docx), ("rápido", salvar_em_docx_rapido)):
+            repeticoes = max(1, 40 // paragrafos_por_secao)
+            tempo = medir(lambda: motor("Artigo Sintético", texto, "Autor Teste", conteudo, BytesIO()), repeticoes)
+            arquivo, xml = tamanhos(motor, texto, conteudo)
+            resultados[nome] = tempo
+            print(f"{paragrafos_por_secao:>13} {nome:>9} {tempo * 1e3:>7.1f} ms {arquivo / 1024:>7.1f} KB {xml / 1024:>10.1f} KB")
+        print(f"{'':>13} {'ganho':>9} {resultados['clássico'] / resultados['rápido']:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [4, 20, 60])
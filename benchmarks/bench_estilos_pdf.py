@@ -0,0 +1,62 @@
+# Mede quanto cada geração de PDF economiza usando os estilos e o modelo de
+# página pré-calculados em vez de montá-los a cada chamada.
+#
+# Uso: python -m benchmarks.bench_estilos_pdf [paragrafos_por_secao]
+import sys
+import timeit
+from io import BytesIO
+
+from reportlab.lib.enums import TA_JUSTIFY
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate
+
+from parser_artigo import analisar_artigo
+from renderizadores import ESTILOS_PDF, obter_modelo_pdf, salvar_em_pdf
+from artigo_sintetico import gerar_artigo
+
+
+# Preparação que salvar_em_pdf fazia a cada chamada
+def preparar_legado():
+    doc = SimpleDocTemplate(BytesIO(), pagesize=A4,
+                            rightMargin=2*cm, leftMargin=3*cm,
+                            topMargin=3*cm, bottomMargin=2*cm)
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Titulo', fontSize=12, fontName='Times-Roman', alignment=1,
+                              spaceAfter=12, spaceBefore=12, leading=14, allowHTML=True))
+    styles.add(ParagraphStyle(name='Secao', fontSize=12, fontName='Times-Roman', alignment=0,
+                              spaceAfter=12, spaceBefore=12, leading=14, firstLineIndent=0, allowHTML=True))
+    styles.add(ParagraphStyle(name='Texto', fontSize=12, fontName='Times-Roman', alignment=TA_JUSTIFY,
+                              firstLineIndent=1.25 * cm, spaceAfter=10, leading=18, allowHTML=True))
+    styles.add(ParagraphStyle(name='TextoSemRecuo', fontSize=12, fontName='Times-Roman', alignment=TA_JUSTIFY,
+                              firstLineIndent=0, spaceAfter=10, leading=18, allowHTML=True))
+    ParagraphStyle('AutorDireita', parent=styles['TextoSemRecuo'], alignment=2,
+                   spaceAfter=12, fontName='Times-Roman', fontSize=12)
+    return doc, styles
+
+def preparar_registro():
+    modelo = obter_modelo_pdf("abnt")
+    return SimpleDocTemplate(BytesIO(), **modelo.argumentos), ESTILOS_PDF
+
+
+def medir(funcao, repeticoes):
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=5)) / repeticoes
+
+
+def main(paragrafos_por_secao):
+    texto = gerar_artigo(paragrafos_por_secao)
+    conteudo = analisar_artigo(texto)
+
+    legado = medir(preparar_legado, 500)
+    registro = medir(preparar_registro, 500)
+    render = medir(lambda: salvar_em_pdf("Artigo Sintético", texto, "Autor Teste", conteudo, BytesIO()), 10)
+
+    print(f"preparação antiga:    {legado * 1e6:10.1f} µs")
+    print(f"preparação com cache: {registro * 1e6:10.1f} µs")
+    print(f"economia por PDF:     {(legado - registro) * 1e6:10.1f} µs "
+          f"({100 * (legado - registro) / (render + legado - registro):.1f}% de uma geração de {render * 1e3:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
@@ -0,0 +1,38 @@
+# Compara o tempo de ponta a ponta do artigo pedido num único prompt com o
+# modo por seções (esboço + seções em paralelo), usando o modelo falso com
+# latência proporcional ao tamanho da resposta, como a da API.
+#
+# Uso: python -m benchmarks.bench_geracao_secoes [segundos_por_mil_caracteres]
+import os
+import sys
+import time
+
+os.environ.setdefault("GEMINI_FALSO", "1")
+
+import gerador_artigos
+from cliente_gemini import ClienteGemini
+from modelo_falso import ModeloFalso
+from parser_artigo import analisar_artigo
+
+
+def main(segundos_por_mil_caracteres):
+    falso = ModeloFalso(latencia=0.3, paragrafos_por_secao=4,
+                        segundos_por_mil_caracteres=segundos_por_mil_caracteres)
+    gerador_artigos.modelo = ClienteGemini(falso, requisicoes_por_minuto=10_000, max_simultaneas=8)
+
+    inicio = time.perf_counter()
+    completo = gerador_artigos.modelo.generate_content(gerador_artigos.montar_prompt("Artigo", "Tema")).text
+    tempo_completo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    por_secoes = "".join(gerador_artigos.gerar_por_secoes("Artigo", "Tema"))
+    tempo_secoes = time.perf_counter() - inicio
+
+    for nome, texto, tempo in (("prompt único", completo, tempo_completo), ("por seções", por_secoes, tempo_secoes)):
+        conteudo = analisar_artigo(texto)
+        print(f"{nome:>13}: {tempo:6.2f} s  {len(texto):6d} caracteres  seções: {', '.join(conteudo)}")
+    print(f"{'ganho':>13}: {tempo_completo / tempo_secoes:6.1f}x")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.5)
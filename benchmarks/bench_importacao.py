@@ -0,0 +1,43 @@
+# Relatório de tempo de importação (python -X importtime) dos módulos de
+# entrada, com os pacotes que mais pesam em cada um. Cada módulo é
+# importado num processo novo, como numa partida a frio.
+#
+# Uso: python -m benchmarks.bench_importacao [modulo ...]
+import os
+import subprocess
+import sys
+
+MODULOS = ["App", "gerador_artigos", "renderizadores", "servico_banco", "gerar_lote"]
+
+
+# Devolve [(modulo, acumulado_us)] das linhas de -X importtime
+def medir(modulo):
+    ambiente = dict(os.environ, GEMINI_FALSO=os.environ.get("GEMINI_FALSO", ""))
+    saida = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                           capture_output=True, text=True, env=ambiente).stderr
+    tempos = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, acumulado, nome = linha.split("|")
+        if acumulado.strip().isdigit():
+            tempos.append((nome.rstrip(), int(acumulado)))
+    return tempos
+
+
+def main(modulos):
+    for modulo in modulos:
+        tempos = medir(modulo)
+        total = next((us for nome, us in tempos if nome.strip() == modulo), None)
+        if total is None:
+            print(f"{modulo}: falhou ao importar")
+            continue
+        print(f"{modulo}: {total / 1000:.1f} ms")
+        # Pacotes de primeiro nível carregados por ele, dos mais caros aos mais baratos
+        diretos = [(nome.strip(), us) for nome, us in tempos if nome.startswith("  ") and not nome.startswith("   ")]
+        for nome, us in sorted(diretos, key=lambda item: -item[1])[:5]:
+            print(f"    {nome:<40} {us / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or MODULOS)
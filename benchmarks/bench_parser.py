@@ -0,0 +1,83 @@
+# Compara a leitura das seções antiga (dez regexes compiladas a cada chamada,
+# executada uma vez pelo PDF e outra pelo DOCX) com o parser único.
+#
+# Uso: python -m benchmarks.bench_parser [paragrafos_por_secao ...]
+import re
+import sys
+import timeit
+
+from parser_artigo import analisar_artigo
+from artigo_sintetico import gerar_artigo
+
+
+# Cópia fiel do laço que existia em salvar_em_pdf e salvar_em_docx
+def analisar_legado(texto):
+    padroes = {
+        "Resumo": re.compile(r"^\s*\d{0,2}\.?\s*resumo\s*:?\s*(.*)$", re.IGNORECASE),
+        "Palavras-chave": re.compile(r"^\s*\d{0,2}\.?\s*palavras-chave\s*:?\s*(.*)$", re.IGNORECASE),
+        "Abstract": re.compile(r"^\s*\d{0,2}\.?\s*abstract\s*:?\s*(.*)$", re.IGNORECASE),
+        "Keywords": re.compile(r"^\s*\d{0,2}\.?\s*keywords\s*:?\s*(.*)$", re.IGNORECASE),
+        "Introdução": re.compile(r"^\s*\d{0,2}\.?\s*introdução\s*:?\s*(.*)$", re.IGNORECASE),
+        "Revisão de Literatura": re.compile(r"^\s*\d{0,2}\.?\s*revis[aã]o de literatura\s*:?\s*(.*)$", re.IGNORECASE),
+        "Metodologia": re.compile(r"^\s*\d{0,2}\.?\s*metodologia\s*:?\s*(.*)$", re.IGNORECASE),
+        "Resultados e Discussão": re.compile(r"^\s*\d{0,2}\.?\s*resultados e discussão\s*:?\s*(.*)$", re.IGNORECASE),
+        "Conclusão": re.compile(r"^\s*\d{0,2}\.?\s*conclus[aã]o\s*:?\s*(.*)$", re.IGNORECASE),
+        "Referências": re.compile(r"^\s*\d{0,2}\.?\s*refer[eê]ncias\s*:?\s*(.*)$", re.IGNORECASE)
+    }
+
+    conteudo = {}
+    atual = None
+    aguardando_conteudo_direto = False
+    ultima_secao = None
+
+    for linha in texto.splitlines():
+        linha_limpa = re.sub(r"\*+", "", linha.strip())
+        if not linha_limpa:
+            continue
+
+        mudou_secao = False
+        for nome_secao, padrao in padroes.items():
+            match = padrao.match(linha_limpa)
+            if match:
+                atual = nome_secao
+                if atual not in conteudo:
+                    conteudo[atual] = []
+
+                inline = match.group(1).strip()
+                if inline:
+                    conteudo[atual].append(inline)
+                    aguardando_conteudo_direto = False
+                else:
+                    aguardando_conteudo_direto = True
+                    ultima_secao = atual
+                mudou_secao = True
+                break
+
+        if not mudou_secao:
+            if aguardando_conteudo_direto and ultima_secao:
+                conteudo[ultima_secao].append(linha_limpa)
+            elif atual:
+                conteudo[atual].append(linha_limpa)
+
+    return conteudo
+
+
+def medir(funcao, repeticoes):
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=5)) / repeticoes
+
+
+def main(tamanhos):
+    print(f"{'parágrafos/seção':>17} {'linhas':>7} {'antes (2x) µs':>15} {'agora (1x) µs':>15} {'ganho':>7}")
+    for tamanho in tamanhos:
+        texto = gerar_artigo(tamanho)
+        assert analisar_legado(texto) == analisar_artigo(texto)
+
+        repeticoes = max(10, 2000 // tamanho)
+        antes = medir(lambda: (analisar_legado(texto), analisar_legado(texto)), repeticoes)
+        agora = medir(lambda: analisar_artigo(texto), repeticoes)
+        linhas = len(texto.splitlines())
+        print(f"{tamanho:>17} {linhas:>7} {antes * 1e6:>15.1f} {agora * 1e6:>15.1f} {antes / agora:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(t) for t in sys.argv[1:]] or [4, 20, 100, 400])
@@ -0,0 +1,238 @@
+# Mede o parser de seções, o PDF e o DOCX (clássico e rápido) em artigos
+# sintéticos de vários tamanhos, de um artigo curto a uma monografia de
+# cerca de 60 páginas, e nos exemplos reais de output_files/. Para cada
+# etapa guarda o tempo (melhor de várias execuções) e o pico de memória.
+#
+# O pico de memória é o do RSS, medido num processo separado para cada caso
+# e etapa: o tracemalloc não enxerga o que o lxml (por trás do python-docx)
+# aloca em C, e o pico de um processo só cresce, então medir todos os casos
+# no mesmo processo daria sempre o maior deles.
+#
+# Roda offline: nenhum caso chama o Gemini, e o modelo falso fica ativado
+# caso algum módulo importado tente criar o cliente.
+#
+# Uso:
+#   python -m benchmarks.suite                  compara com benchmarks/base.json
+#   python -m benchmarks.suite --salvar-base    grava os resultados como nova base
+#   python -m benchmarks.suite --casos curto,medio --etapas parse,pdf --tolerancia 0.3
+#
+# Sai com código 1 se alguma etapa ficar mais lenta (ou usar mais memória)
+# que a base além da tolerância.
+import argparse
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, a suíte mede só o tempo
+    resource = None
+
+os.environ.setdefault("GEMINI_FALSO", "1")
+
+from docx import Document
+
+from parser_artigo import analisar_artigo
+from renderizadores import OUTPUT_DIR, salvar_em_pdf, salvar_em_docx, salvar_em_docx_rapido
+from artigo_sintetico import gerar_artigo
+
+ARQUIVO_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "base.json")
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Parágrafos por seção de cada caso sintético; 58 dá cerca de 60 páginas de PDF
+TAMANHOS_SINTETICOS = {"curto": 2, "medio": 8, "longo": 20, "monografia_60p": 58}
+
+# Arquivos gerados pelo armazém (nome = hash do conteúdo) não são exemplos
+PADRAO_ARTEFATO = re.compile(r"^[0-9a-f]{64}\.")
+
+
+# Remonta o texto de um DOCX gerado pelo sistema no formato lido pelo parser:
+# os títulos ("1 INTRODUÇÃO", "RESUMO: ...") continuam reconhecíveis
+def texto_de_docx(caminho):
+    paragrafos = [p.text for p in Document(caminho).paragraphs if p.text.strip()]
+    titulo = paragrafos[0] if paragrafos else ""
+    autor = paragrafos[1] if len(paragrafos) > 1 else ""
+    return titulo, "\n".join(paragrafos[2:]), autor
+
+def carregar_casos():
+    casos = {nome: ("Artigo Sintético", gerar_artigo(paragrafos), "Autor Teste")
+             for nome, paragrafos in TAMANHOS_SINTETICOS.items()}
+    for caminho in sorted(glob.glob(os.path.join(OUTPUT_DIR, "*.docx"))):
+        nome_arquivo = os.path.basename(caminho)
+        if PADRAO_ARTEFATO.match(nome_arquivo):
+            continue
+        try:
+            casos["real:" + os.path.splitext(nome_arquivo)[0]] = texto_de_docx(caminho)
+        except Exception as e:
+            print(f"⚠️  {nome_arquivo} ignorado: {e}")
+    return casos
+
+def etapas(titulo, texto, autor):
+    conteudo = analisar_artigo(texto)
+    return {
+        "parse": lambda: analisar_artigo(texto),
+        "pdf": lambda: salvar_em_pdf(titulo, texto, autor, conteudo, BytesIO()),
+        "docx": lambda: salvar_em_docx(titulo, texto, autor, conteudo, BytesIO()),
+        "docx_rapido": lambda: salvar_em_docx_rapido(titulo, texto, autor, conteudo, BytesIO()),
+    }
+
+# Melhor tempo entre várias execuções, repetindo até somar `orcamento` segundos
+def medir_tempo(funcao, orcamento=0.5, minimo=3):
+    tempos = []
+    inicio = time.perf_counter()
+    while len(tempos) < minimo or time.perf_counter() - inicio < orcamento:
+        antes = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - antes)
+        if len(tempos) >= 1000:
+            break
+    return min(tempos)
+
+# No Linux o ru_maxrss do getrusage sobrevive ao fork e ao exec: o filho
+# começa com o pico do processo da suíte, que já carregou todos os casos, e
+# nunca passaria dele. Lá o pico vem do VmHWM, que pode ser zerado.
+def zerar_pico_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as arquivo:
+            arquivo.write("5")
+    except OSError:
+        pass
+
+# Pico de RSS do processo, em KB (o macOS informa o ru_maxrss em bytes)
+def pico_rss_kb():
+    try:
+        with open("/proc/self/status") as arquivo:
+            for linha in arquivo:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 if sys.platform == "darwin" else pico
+
+# Roda no processo filho, que recebe o caso (titulo, texto, autor) em JSON
+# pela entrada padrão: aquece a etapa num artigo mínimo (fontes, estilos,
+# modelo do DOCX), para que só o que depende do tamanho do caso seja medido,
+# e devolve quanto o pico de RSS subiu ao rodar a etapa no caso
+def memoria_no_processo(etapa, caso):
+    etapas("Aquecimento", gerar_artigo(1), "Autor Teste")[etapa]()
+    funcao = etapas(*caso)[etapa]
+    zerar_pico_rss()
+    antes = pico_rss_kb()
+    funcao()
+    return pico_rss_kb() - antes
+
+def medir_memoria(caso, etapa):
+    processo = subprocess.run([sys.executable, "-m", "benchmarks.suite", "--memoria-de", etapa],
+                              input=json.dumps(caso), cwd=RAIZ, capture_output=True, text=True)
+    if processo.returncode != 0:
+        print(f"⚠️  Memória de {etapa} não medida: {processo.stderr.strip().splitlines()[-1:]}")
+        return None
+    return float(processo.stdout.strip().splitlines()[-1])
+
+def executar(casos, nomes_etapas, orcamento):
+    resultados = {}
+    for nome, (titulo, texto, autor) in casos.items():
+        funcoes = etapas(titulo, texto, autor)
+        for etapa in nomes_etapas:
+            funcao = funcoes[etapa]
+            funcao()  # aquecimento: caches de fontes, estilos e modelo do DOCX
+            resultados[f"{nome}/{etapa}"] = {"tempo_ms": round(medir_tempo(funcao, orcamento) * 1e3, 3),
+                                             "memoria_kb": None}
+
+    # Os processos de memória rodam depois dos tempos, para não disputar a CPU com eles
+    if resource is not None:
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            picos = executor.map(lambda chave: medir_memoria(casos[chave.rsplit("/", 1)[0]], chave.rsplit("/", 1)[1]),
+                                 list(resultados))
+            for chave, pico in zip(list(resultados), picos):
+                resultados[chave]["memoria_kb"] = None if pico is None else round(pico, 1)
+    return resultados
+
+
+# Diferença absoluta mínima para acusar regressão; abaixo disso é ruído de medida
+FOLGA = {"tempo_ms": 1.0, "memoria_kb": 512}
+
+# Devolve as medidas que pioraram além da tolerância em relação à base
+def comparar(resultados, base, tolerancia):
+    regressoes = []
+    for chave, atual in resultados.items():
+        anterior = base.get(chave)
+        if not anterior:
+            continue
+        for medida in ("tempo_ms", "memoria_kb"):
+            if atual[medida] is None or anterior.get(medida) is None:
+                continue
+            if (anterior[medida] and atual[medida] > anterior[medida] * (1 + tolerancia)
+                    and atual[medida] - anterior[medida] > FOLGA[medida]):
+                regressoes.append((chave, medida, anterior[medida], atual[medida]))
+    return regressoes
+
+def imprimir(resultados, base):
+    print(f"{'caso/etapa':<56} {'tempo':>11} {'base':>11} {'pico mem.':>11} {'base':>11}")
+    for chave, atual in resultados.items():
+        anterior = base.get(chave, {})
+        memoria = atual["memoria_kb"] if atual["memoria_kb"] is not None else float("nan")
+        memoria_base = anterior.get("memoria_kb") if anterior.get("memoria_kb") is not None else float("nan")
+        print(f"{chave[:56]:<56} {atual['tempo_ms']:>8.2f} ms {anterior.get('tempo_ms', float('nan')):>8.2f} ms "
+              f"{memoria:>8.0f} KB {memoria_base:>8.0f} KB")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do parser e dos geradores de PDF e DOCX.")
+    parser.add_argument("--casos", help="casos separados por vírgula (padrão: todos); 'sinteticos' ou 'reais' filtram o grupo")
+    parser.add_argument("--etapas", default="parse,pdf,docx,docx_rapido", help="etapas separadas por vírgula")
+    parser.add_argument("--base", default=ARQUIVO_BASE, help="arquivo JSON com os resultados de referência")
+    parser.add_argument("--salvar-base", action="store_true", help="grava os resultados como nova base")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="piora aceita antes de acusar regressão (0.25 = 25%%)")
+    parser.add_argument("--orcamento", type=float, default=0.5, help="segundos de repetição por medida de tempo")
+    parser.add_argument("--memoria-de", metavar="ETAPA", help=argparse.SUPPRESS)  # uso interno: processo filho de medir_memoria
+    args = parser.parse_args(argumentos)
+
+    if args.memoria_de:
+        print(memoria_no_processo(args.memoria_de, json.load(sys.stdin)))
+        return 0
+
+    casos = carregar_casos()
+    if args.casos:
+        filtros = set(args.casos.split(","))
+        casos = {nome: caso for nome, caso in casos.items()
+                 if nome in filtros
+                 or ("reais" in filtros and nome.startswith("real:"))
+                 or ("sinteticos" in filtros and nome in TAMANHOS_SINTETICOS)}
+    nomes_etapas = [etapa for etapa in args.etapas.split(",") if etapa]
+
+    base = {}
+    if os.path.exists(args.base):
+        with open(args.base, encoding="utf-8") as arquivo:
+            base = json.load(arquivo).get("resultados", {})
+
+    resultados = executar(casos, nomes_etapas, args.orcamento)
+    imprimir(resultados, base)
+
+    if args.salvar_base:
+        with open(args.base, "w", encoding="utf-8") as arquivo:
+            json.dump({"python": sys.version.split()[0], "gerado_em": time.strftime("%Y-%m-%d"),
+                       "resultados": {**base, **resultados}},
+                      arquivo, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"✅ Base gravada em {args.base}")
+        return 0
+
+    regressoes = comparar(resultados, base, args.tolerancia)
+    for chave, medida, anterior, atual in regressoes:
+        print(f"❌ Regressão em {chave} ({medida}): {anterior} -> {atual} (+{(atual / anterior - 1) * 100:.0f}%)")
+    if not base:
+        print("ℹ️  Nenhuma base encontrada; rode com --salvar-base para criar uma.")
+    elif not regressoes:
+        print(f"✅ Nenhuma regressão acima de {args.tolerancia:.0%}.")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+# Normaliza título/tema para que variações de caixa, acentos compostos e
+# espaços repetidos caiam na mesma chave
+def normalizar(texto):
+    texto = unicodedata.normalize("NFC", texto or "")
+    return " ".join(texto.lower().split())
+
+def versao_prompt(template):
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+
+def gerar_chave(titulo, tema, modelo, versao):
+    partes = [normalizar(titulo), normalizar(tema), modelo, versao]
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+
+# Primeiro nível: LRU em memória com limite de tamanho e expiração por TTL
+class CacheLRU:
+    def __init__(self, tamanho_maximo=256, ttl=3600):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.remocoes = 0
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            valor, criado_em = item
+            if time.time() - criado_em > self.ttl:
+                del self._itens[chave]
+                self.remocoes += 1
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, valor, criado_em=None):
+        with self._lock:
+            self._itens[chave] = (valor, criado_em or time.time())
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+                self.remocoes += 1
+
+    def __len__(self):
+        return len(self._itens)
+
+
+# Segundo nível: SQLite em disco, compartilhado entre os processos do servidor
+class CacheDisco:
+    def __init__(self, caminho, ttl=3600):
+        self.caminho = caminho
+        self.ttl = ttl
+        self._local = threading.local()
+        self.remocoes = 0
+
+    def _conexao(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.caminho, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS artigos (
+                    chave TEXT PRIMARY KEY,
+                    texto TEXT NOT NULL,
+                    criado_em REAL NOT NULL
+                )
+            """)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def obter(self, chave):
+        try:
+            conn = self._conexao()
+            linha = conn.execute("SELECT texto, criado_em FROM artigos WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                return None
+            texto, criado_em = linha
+            if time.time() - criado_em > self.ttl:
+                with conn:
+                    conn.execute("DELETE FROM artigos WHERE chave = ?", (chave,))
+                self.remocoes += 1
+                return None
+            return texto, criado_em
+        except sqlite3.Error as e:
+            print("❌ Erro ao ler o cache em disco:", e)
+            return None
+
+    def guardar(self, chave, texto):
+        try:
+            conn = self._conexao()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO artigos (chave, texto, criado_em) VALUES (?, ?, ?)",
+                             (chave, texto, time.time()))
+        except sqlite3.Error as e:
+            print("❌ Erro ao gravar no cache em disco:", e)
+
+    def limpar_expirados(self):
+        try:
+            conn = self._conexao()
+            with conn:
+                cur = conn.execute("DELETE FROM artigos WHERE criado_em < ?", (time.time() - self.ttl,))
+            self.remocoes += cur.rowcount
+        except sqlite3.Error as e:
+            print("❌ Erro ao limpar o cache em disco:", e)
+
+
+class CacheArtigos:
+    def __init__(self, caminho, tamanho_maximo=256, ttl=3600, limpeza_a_cada=100):
+        self.memoria = CacheLRU(tamanho_maximo, ttl)
+        self.disco = CacheDisco(caminho, ttl)
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self._limpeza_a_cada = limpeza_a_cada
+        self._gravacoes = 0
+        self._lock = threading.Lock()
+        self._em_andamento = {}
+        self._em_andamento_async = {}
+
+    def obter(self, chave):
+        texto = self.memoria.obter(chave)
+        if texto is not None:
+            self.acertos_memoria += 1
+            return texto
+
+        item = self.disco.obter(chave)
+        if item is not None:
+            texto, criado_em = item
+            self.memoria.guardar(chave, texto, criado_em)
+            self.acertos_disco += 1
+            return texto
+
+        self.falhas += 1
+        return None
+
+    def guardar(self, chave, texto):
+        self.memoria.guardar(chave, texto)
+        self.disco.guardar(chave, texto)
+        self._gravacoes += 1
+        if self._gravacoes % self._limpeza_a_cada == 0:
+            self.disco.limpar_expirados()
+
+    # Busca no cache ou gera o texto; pedidos simultâneos para a mesma chave
+    # (por exemplo, um clique duplo) esperam a primeira geração terminar
+    def obter_ou_gerar(self, chave, gerar):
+        texto = self.obter(chave)
+        if texto is not None:
+            return texto
+
+        with self._lock:
+            evento = self._em_andamento.get(chave)
+            primeiro = evento is None
+            if primeiro:
+                evento = self._em_andamento[chave] = threading.Event()
+
+        if not primeiro:
+            evento.wait()
+            texto = self.obter(chave)
+            if texto is not None:
+                return texto
+            return gerar()
+
+        try:
+            texto = gerar()
+            self.guardar(chave, texto)
+            return texto
+        finally:
+            with self._lock:
+                del self._em_andamento[chave]
+            evento.set()
+
+    # Versão assíncrona de obter_ou_gerar, em que `gerar` é uma corrotina. O
+    # SQLite é lido e gravado numa thread para não parar o loop de eventos.
+    async def obter_ou_gerar_async(self, chave, gerar):
+        texto = await asyncio.to_thread(self.obter, chave)
+        if texto is not None:
+            return texto
+
+        evento = self._em_andamento_async.get(chave)
+        if evento is not None:
+            await evento.wait()
+            texto = self.memoria.obter(chave)
+            if texto is not None:
+                return texto
+            return await gerar()
+
+        evento = self._em_andamento_async[chave] = asyncio.Event()
+        try:
+            texto = await gerar()
+            await asyncio.to_thread(self.guardar, chave, texto)
+            return texto
+        finally:
+            del self._em_andamento_async[chave]
+            evento.set()
+
+    def estatisticas(self):
+        return {
+            "acertos_memoria": self.acertos_memoria,
+            "acertos_disco": self.acertos_disco,
+            "falhas": self.falhas,
+            "remocoes_memoria": self.memoria.remocoes,
+            "remocoes_disco": self.disco.remocoes,
+            "itens_memoria": len(self.memoria),
+        }
@@ -0,0 +1,343 @@
+import asyncio
+import random
+import threading
+import time
+import metricas
+
+# Códigos HTTP que valem uma nova tentativa: cota estourada e falhas do lado do servidor
+CODIGOS_RETENTAVEIS = {408, 429, 500, 502, 503, 504}
+
+
+class DisjuntorAberto(Exception):
+    pass
+
+
+class LimiteExcedido(Exception):
+    pass
+
+
+# Balde de fichas: enche continuamente até `capacidade` à razão de
+# `capacidade` fichas por minuto. reservar() desconta as fichas na hora e
+# devolve quantos segundos o chamador precisa esperar antes de usá-las, então
+# serve tanto para quem dorme com time.sleep quanto para quem usa asyncio.sleep.
+class BaldeFichas:
+    def __init__(self, por_minuto):
+        self.capacidade = float(por_minuto)
+        self.taxa = self.capacidade / 60.0
+        self._fichas = self.capacidade
+        self._atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self, quantidade=1):
+        with self._lock:
+            agora = time.monotonic()
+            self._fichas = min(self.capacidade, self._fichas + (agora - self._atualizado) * self.taxa)
+            self._atualizado = agora
+            # Um pedido maior que o balde inteiro esperaria para sempre; ele passa
+            # a custar o balde cheio
+            self._fichas -= min(quantidade, self.capacidade)
+            if self._fichas >= 0:
+                return 0.0
+            return -self._fichas / self.taxa
+
+    # Corrige a reserva quando o custo real fica conhecido (por exemplo, os
+    # tokens efetivamente usados na resposta)
+    def ajustar(self, diferenca):
+        with self._lock:
+            self._fichas = min(self.capacidade, self._fichas - diferenca)
+
+
+# Limite de requisições e de tokens por minuto
+class LimitadorTaxa:
+    def __init__(self, requisicoes_por_minuto=15, tokens_por_minuto=1_000_000):
+        self.requisicoes = BaldeFichas(requisicoes_por_minuto)
+        self.tokens = BaldeFichas(tokens_por_minuto)
+
+    def reservar(self, tokens):
+        return max(self.requisicoes.reservar(1), self.tokens.reservar(tokens))
+
+    def ajustar_tokens(self, diferenca):
+        self.tokens.ajustar(diferenca)
+
+    # Devolve uma reserva que não vai ser usada
+    def devolver(self, tokens):
+        self.requisicoes.ajustar(-1)
+        self.tokens.ajustar(-tokens)
+
+
+# Depois de `limite_falhas` falhas seguidas o disjuntor abre e as chamadas
+# falham na hora, sem chegar à API. Passado `tempo_aberto`, uma única chamada
+# de teste é liberada: se der certo o disjuntor fecha, se a API cair de novo
+# ele abre de novo. Se a chamada de teste terminar de qualquer outro jeito
+# (cota, pedido inválido, limite de taxa, cancelamento), a vaga de teste é
+# devolvida e a próxima chamada testa a API no lugar dela.
+class Disjuntor:
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio_aberto"
+
+    def __init__(self, limite_falhas=5, tempo_aberto=30.0):
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self.estado = self.FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._lock = threading.Lock()
+
+    # Devolve True se esta for a chamada de teste; ela precisa terminar em
+    # registrar_sucesso, registrar_falha ou liberar_teste
+    def permitir(self):
+        with self._lock:
+            if self.estado == self.FECHADO:
+                return False
+            if self.estado == self.ABERTO and time.monotonic() - self._aberto_em >= self.tempo_aberto:
+                self.estado = self.MEIO_ABERTO
+                return True
+            restante = max(0.0, self.tempo_aberto - (time.monotonic() - self._aberto_em))
+            raise DisjuntorAberto(f"API do Gemini indisponível; nova tentativa em {restante:.0f} s")
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self._falhas = 0
+            self.estado = self.FECHADO
+
+    def registrar_falha(self):
+        with self._lock:
+            self._falhas += 1
+            if self.estado == self.MEIO_ABERTO or self._falhas >= self.limite_falhas:
+                self.estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+
+    # A chamada de teste terminou sem dizer se a API voltou: o disjuntor volta
+    # a aberto, já vencido, para que a próxima chamada seja o novo teste
+    def liberar_teste(self):
+        with self._lock:
+            if self.estado == self.MEIO_ABERTO:
+                self.estado = self.ABERTO
+
+
+def retentavel(erro):
+    if isinstance(erro, (TimeoutError, ConnectionError)):
+        return True
+    codigo = getattr(erro, "code", None)
+    try:
+        return int(codigo) in CODIGOS_RETENTAVEIS
+    except (TypeError, ValueError):
+        return False
+
+# Só falhas do lado da API contam para o disjuntor; cota estourada (429) e
+# pedidos inválidos não significam que ela esteja fora do ar
+def indica_queda(erro):
+    return retentavel(erro) and getattr(erro, "code", None) != 429
+
+# Estimativa grosseira de tokens (cerca de 4 caracteres por token em português)
+def estimar_tokens(texto):
+    return len(texto) // 4 + 1
+
+
+# Envolve o `modelo` do Gemini (ou um modelo falso com o mesmo
+# generate_content) com limite de taxa, limite de chamadas simultâneas,
+# novas tentativas com espera exponencial e disjuntor.
+class ClienteGemini:
+    def __init__(self, modelo, requisicoes_por_minuto=15, tokens_por_minuto=1_000_000,
+                 max_simultaneas=4, tentativas=4, espera_base=1.0, espera_maxima=30.0,
+                 timeout=120.0, tokens_resposta=4000, limite_falhas=5, tempo_aberto=30.0,
+                 espera_maxima_limite=60.0):
+        self.modelo = modelo
+        self.limitador = LimitadorTaxa(requisicoes_por_minuto, tokens_por_minuto)
+        self.disjuntor = Disjuntor(limite_falhas, tempo_aberto)
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.timeout = timeout
+        self.tokens_resposta = tokens_resposta
+        self.espera_maxima_limite = espera_maxima_limite
+        self.max_simultaneas = max_simultaneas
+        self._simultaneas = threading.BoundedSemaphore(max_simultaneas)
+        self._simultaneas_async = None
+        self._lock = threading.Lock()
+        self._estatisticas = {"chamadas": 0, "sucessos": 0, "falhas": 0, "retentativas": 0,
+                              "rejeitadas_disjuntor": 0, "espera_limite_s": 0.0}
+
+    def _contar(self, nome, valor=1):
+        with self._lock:
+            self._estatisticas[nome] += valor
+
+    # Espera exponencial com jitter completo: um valor aleatório entre zero e o teto
+    def espera_tentativa(self, tentativa):
+        return random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** tentativa))
+
+    def _aguardar_limite(self, tokens):
+        espera = self.limitador.reservar(tokens)
+        if espera > self.espera_maxima_limite:
+            self.limitador.devolver(tokens)
+            raise LimiteExcedido(f"Limite de uso do Gemini atingido; tente novamente em {espera:.0f} s")
+        if espera > 0:
+            self._contar("espera_limite_s", espera)
+            time.sleep(espera)
+
+    def _opcoes(self, kwargs):
+        if self.timeout and "request_options" not in kwargs:
+            kwargs["request_options"] = {"timeout": self.timeout}
+        return kwargs
+
+    # Faz a chamada com as novas tentativas; devolve o resultado e os tokens reservados.
+    # Com `medir`, a duração de cada tentativa vai para o histograma de latência.
+    def _executar(self, prompt, chamada, medir=True):
+        self._contar("chamadas")
+        tokens = estimar_tokens(prompt) + self.tokens_resposta
+        tentativa = 0
+        while True:
+            try:
+                teste = self.disjuntor.permitir()
+            except DisjuntorAberto:
+                self._contar("rejeitadas_disjuntor")
+                raise
+            try:
+                self._aguardar_limite(tokens)
+                inicio = time.perf_counter()
+                try:
+                    resultado = chamada()
+                except Exception as e:
+                    if medir:
+                        metricas.GEMINI_LATENCIA.observar(time.perf_counter() - inicio, modo="unico", resultado="erro")
+                    if indica_queda(e):
+                        self.disjuntor.registrar_falha()
+                        teste = False
+                    if not retentavel(e) or tentativa + 1 >= self.tentativas:
+                        self._contar("falhas")
+                        raise
+                else:
+                    if medir:
+                        metricas.GEMINI_LATENCIA.observar(time.perf_counter() - inicio, modo="unico", resultado="ok")
+                    self.disjuntor.registrar_sucesso()
+                    self._contar("sucessos")
+                    return resultado, tokens
+            finally:
+                if teste:
+                    self.disjuntor.liberar_teste()
+            self._contar("retentativas")
+            time.sleep(self.espera_tentativa(tentativa))
+            tentativa += 1
+
+    def _corrigir_tokens(self, resposta, reservados):
+        uso = getattr(resposta, "usage_metadata", None)
+        total = getattr(uso, "total_token_count", None)
+        if total:
+            self.limitador.ajustar_tokens(total - reservados)
+            metricas.GEMINI_TOKENS.observar(getattr(uso, "prompt_token_count", 0) or 0, tipo="prompt")
+            metricas.GEMINI_TOKENS.observar(getattr(uso, "candidates_token_count", 0) or 0, tipo="resposta")
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        kwargs = self._opcoes(kwargs)
+        if stream:
+            return self._gerar_stream(prompt, kwargs)
+        with self._simultaneas, metricas.GEMINI_EM_ANDAMENTO.em_andamento():
+            resposta, tokens = self._executar(prompt, lambda: self.modelo.generate_content(prompt, **kwargs))
+        self._corrigir_tokens(resposta, tokens)
+        return resposta
+
+    # No modo streaming a vaga de chamada simultânea fica ocupada até o fim do
+    # stream, e a latência medida é a do stream inteiro
+    def _gerar_stream(self, prompt, kwargs):
+        with self._simultaneas, metricas.GEMINI_EM_ANDAMENTO.em_andamento():
+            inicio = time.perf_counter()
+            resultado = "erro"
+            try:
+                resposta, tokens = self._executar(
+                    prompt, lambda: self.modelo.generate_content(prompt, stream=True, **kwargs), medir=False)
+                yield from resposta
+                resultado = "ok"
+            finally:
+                metricas.GEMINI_LATENCIA.observar(time.perf_counter() - inicio, modo="stream", resultado=resultado)
+            self._corrigir_tokens(resposta, tokens)
+
+    # Versão assíncrona, para o servidor ASGI (servidor_async.py): usa o
+    # generate_content_async do SDK e espera com asyncio.sleep, então uma
+    # chamada aguardando a rede, a cota ou uma nova tentativa não ocupa uma
+    # thread. O limite de chamadas simultâneas é um semáforo do asyncio,
+    # separado do usado pelas chamadas síncronas.
+    def _semaforo_async(self):
+        if self._simultaneas_async is None:
+            self._simultaneas_async = asyncio.Semaphore(self.max_simultaneas)
+        return self._simultaneas_async
+
+    async def _aguardar_limite_async(self, tokens):
+        espera = self.limitador.reservar(tokens)
+        if espera > self.espera_maxima_limite:
+            self.limitador.devolver(tokens)
+            raise LimiteExcedido(f"Limite de uso do Gemini atingido; tente novamente em {espera:.0f} s")
+        if espera > 0:
+            self._contar("espera_limite_s", espera)
+            await asyncio.sleep(espera)
+
+    async def _executar_async(self, prompt, chamada, medir=True):
+        self._contar("chamadas")
+        tokens = estimar_tokens(prompt) + self.tokens_resposta
+        tentativa = 0
+        while True:
+            try:
+                teste = self.disjuntor.permitir()
+            except DisjuntorAberto:
+                self._contar("rejeitadas_disjuntor")
+                raise
+            try:
+                await self._aguardar_limite_async(tokens)
+                inicio = time.perf_counter()
+                try:
+                    resultado = await chamada()
+                except Exception as e:
+                    if medir:
+                        metricas.GEMINI_LATENCIA.observar(time.perf_counter() - inicio, modo="unico", resultado="erro")
+                    if indica_queda(e):
+                        self.disjuntor.registrar_falha()
+                        teste = False
+                    if not retentavel(e) or tentativa + 1 >= self.tentativas:
+                        self._contar("falhas")
+                        raise
+                else:
+                    if medir:
+                        metricas.GEMINI_LATENCIA.observar(time.perf_counter() - inicio, modo="unico", resultado="ok")
+                    self.disjuntor.registrar_sucesso()
+                    self._contar("sucessos")
+                    return resultado, tokens
+            finally:
+                if teste:
+                    self.disjuntor.liberar_teste()
+            self._contar("retentativas")
+            await asyncio.sleep(self.espera_tentativa(tentativa))
+            tentativa += 1
+
+    async def generate_content_async(self, prompt, **kwargs):
+        kwargs = self._opcoes(kwargs)
+        async with self._semaforo_async():
+            with metricas.GEMINI_EM_ANDAMENTO.em_andamento():
+                resposta, tokens = await self._executar_async(
+                    prompt, lambda: self.modelo.generate_content_async(prompt, **kwargs))
+        self._corrigir_tokens(resposta, tokens)
+        return resposta
+
+    # Gerador assíncrono dos trechos da resposta em streaming
+    async def gerar_stream_async(self, prompt, **kwargs):
+        kwargs = self._opcoes(kwargs)
+        async with self._semaforo_async():
+            with metricas.GEMINI_EM_ANDAMENTO.em_andamento():
+                inicio = time.perf_counter()
+                resultado = "erro"
+                try:
+                    resposta, tokens = await self._executar_async(
+                        prompt, lambda: self.modelo.generate_content_async(prompt, stream=True, **kwargs),
+                        medir=False)
+                    async for trecho in resposta:
+                        yield trecho
+                    resultado = "ok"
+                finally:
+                    metricas.GEMINI_LATENCIA.observar(time.perf_counter() - inicio, modo="stream", resultado=resultado)
+        self._corrigir_tokens(resposta, tokens)
+
+    def estatisticas(self):
+        with self._lock:
+            dados = dict(self._estatisticas)
+        dados["espera_limite_s"] = round(dados["espera_limite_s"], 3)
+        dados["disjuntor"] = self.disjuntor.estado
+        return dados
@@ -1,19 +1,153 @@
-import psycopg2
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import os
+import threading
+import time
 
 load_dotenv()
 
+def _parametros_conexao():
+    return dict(
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT")
+    )
+
+# O driver só é importado quando o banco é usado pela primeira vez
+def _driver():
+    import psycopg2
+    import psycopg2.pool
+    return psycopg2
+
 def conectar():
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT")
-        )
+        conn = _driver().connect(**_parametros_conexao())
         return conn
     except Exception as e:
         print("Erro na conexão com o banco:", e)
         return None
+
+
+class PoolEsgotado(Exception):
+    pass
+
+
+# Pool de conexões compartilhado pelas threads do processo. Cada conexão é
+# validada com um SELECT 1 antes de ser entregue, então conexões mortas
+# (por exemplo, após um restart do Postgres) são descartadas e refeitas.
+class PoolConexoes:
+    def __init__(self, minimo=1, maximo=10, timeout=10.0):
+        self.minimo = minimo
+        self.maximo = maximo
+        self.timeout = timeout
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._vagas = threading.BoundedSemaphore(maximo)
+        self._esperas = 0
+        self._espera_total = 0.0
+        self._espera_maxima = 0.0
+        self._timeouts = 0
+        self._reconexoes = 0
+
+    def _obter_pool(self):
+        if self._pid == os.getpid() and self._pool is not None:
+            return self._pool
+        with self._lock:
+            if self._pid != os.getpid() or self._pool is None:
+                # Depois de um fork as conexões herdadas pertencem ao processo pai
+                # e não podem ser fechadas aqui; basta abandonar a referência
+                self._pool = _driver().pool.ThreadedConnectionPool(self.minimo, self.maximo, **_parametros_conexao())
+                self._vagas = threading.BoundedSemaphore(self.maximo)
+                self._pid = os.getpid()
+        return self._pool
+
+    def _valida(self, conn):
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except _driver().Error:
+            return False
+
+    def _retirar(self):
+        pool = self._obter_pool()
+        # No pior caso todas as conexões ociosas estão mortas
+        for _ in range(self.maximo + 1):
+            conn = pool.getconn()
+            if self._valida(conn):
+                return conn
+            pool.putconn(conn, close=True)
+            self._reconexoes += 1
+        raise _driver().OperationalError("Não foi possível obter uma conexão válida com o banco.")
+
+    @contextmanager
+    def conexao(self):
+        self._obter_pool()
+        vagas = self._vagas
+        inicio = time.monotonic()
+        if not vagas.acquire(timeout=self.timeout):
+            self._timeouts += 1
+            raise PoolEsgotado("Tempo esgotado esperando uma conexão livre no pool.")
+        espera = time.monotonic() - inicio
+        self._esperas += 1
+        self._espera_total += espera
+        self._espera_maxima = max(self._espera_maxima, espera)
+
+        try:
+            conn = self._retirar()
+        except Exception:
+            vagas.release()
+            raise
+
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except _driver().Error:
+                    pass
+            raise
+        finally:
+            try:
+                self._pool.putconn(conn, close=bool(conn.closed))
+            finally:
+                vagas.release()
+
+    def fechar(self):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.closeall()
+            self._pool = None
+            self._pid = None
+
+    def estatisticas(self):
+        pool = self._pool if self._pid == os.getpid() else None
+        return {
+            "minimo": self.minimo,
+            "maximo": self.maximo,
+            "em_uso": len(pool._used) if pool else 0,
+            "ociosas": len(pool._pool) if pool else 0,
+            "esperas": self._esperas,
+            "espera_media_ms": round(1000 * self._espera_total / self._esperas, 3) if self._esperas else 0.0,
+            "espera_maxima_ms": round(1000 * self._espera_maxima, 3),
+            "timeouts": self._timeouts,
+            "reconexoes": self._reconexoes,
+        }
+
+
+pool = PoolConexoes(
+    minimo=int(os.getenv("DB_POOL_MIN", "1")),
+    maximo=int(os.getenv("DB_POOL_MAX", "10")),
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", "10"))
+)
+
+# Uso: with conexao() as conn: ...
+conexao = pool.conexao
+estatisticas_pool = pool.estatisticas
@@ -0,0 +1,52 @@
+import mimetypes
+import os
+from flask import request, send_file
+from werkzeug.utils import send_file as send_file_werkzeug
+from renderizadores import OUTPUT_DIR
+from armazem_artefatos import PADRAO_ARTEFATO, marcar_acesso
+
+# Quem entrega os bytes dos downloads:
+#   ""           o próprio worker Python (padrão)
+#   "x-sendfile" o servidor na frente (Apache mod_xsendfile, lighttpd), pelo cabeçalho X-Sendfile
+#   "x-accel"    o nginx, pelo cabeçalho X-Accel-Redirect: ACCEL_PREFIXO é um location
+#                interno com alias para OUTPUT_DIR
+ENVIO_ARQUIVOS = os.getenv("ENVIO_ARQUIVOS", "").strip().lower()
+ACCEL_PREFIXO = os.getenv("ACCEL_PREFIXO", "/arquivos_internos/")
+
+
+# ETag forte a partir do hash do artefato. O PDF e o DOCX guardam a data de
+# criação, então um arquivo apagado e gerado de novo tem bytes diferentes
+# com o mesmo hash; o instante da gravação entra no ETag para que um
+# download retomado nunca junte pedaços de duas gerações.
+def etag_artefato(caminho, estado=None):
+    correspondencia = PADRAO_ARTEFATO.match(os.path.basename(caminho))
+    if not correspondencia:
+        return None
+    estado = estado or os.stat(caminho)
+    return f"{correspondencia.group(1)}-{estado.st_mtime_ns:x}"
+
+# Envia um arquivo do disco como anexo. If-None-Match e If-Modified-Since
+# devolvem 304 e os pedidos com Range (downloads retomados) devolvem 206.
+# Com ENVIO_ARQUIVOS configurado, o Python só responde os cabeçalhos e o
+# servidor na frente envia os bytes (e atende o Range).
+def enviar_arquivo(caminho, nome_download, mimetype=None):
+    estado = os.stat(caminho)
+    marcar_acesso(caminho, estado)
+    etag = etag_artefato(caminho, estado) or True
+    mimetype = mimetype or mimetypes.guess_type(nome_download)[0] or "application/octet-stream"
+
+    if ENVIO_ARQUIVOS not in ("x-sendfile", "x-accel"):
+        return send_file(caminho, mimetype=mimetype, as_attachment=True, download_name=nome_download,
+                         etag=etag, last_modified=estado.st_mtime)
+
+    resposta = send_file_werkzeug(caminho, request.environ, mimetype=mimetype, as_attachment=True,
+                                  download_name=nome_download, etag=etag, last_modified=estado.st_mtime,
+                                  use_x_sendfile=True, conditional=False)
+    # O corpo vai vazio; o tamanho real é informado pelo servidor que envia o arquivo
+    resposta.content_length = 0
+    if ENVIO_ARQUIVOS == "x-accel":
+        del resposta.headers["X-Sendfile"]
+        relativo = os.path.relpath(caminho, OUTPUT_DIR).replace(os.sep, "/")
+        resposta.headers["X-Accel-Redirect"] = ACCEL_PREFIXO.rstrip("/") + "/" + relativo
+    # Sem accept_ranges: o Range fica com o servidor, que tem o arquivo inteiro
+    return resposta.make_conditional(request)
@@ -0,0 +1,126 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import metricas
+
+# Quantidade de processos usados para gerar PDF e DOCX (padrão: um por núcleo)
+WORKERS_RENDERIZACAO = int(os.getenv("WORKERS_RENDERIZACAO", "0")) or os.cpu_count() or 1
+# "rapido" usa os estilos do modelo ABNT; "classico" formata run por run
+MOTOR_DOCX = os.getenv("MOTOR_DOCX", "rapido")
+
+_executor = None
+_pid = None
+_lock = threading.Lock()
+
+
+# O forkserver evita copiar as threads do servidor web para os processos
+# filhos; no Windows só existe o spawn
+def _contexto():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context("forkserver")
+        # Os filhos já nascem com o ReportLab e o python-docx carregados
+        contexto.set_forkserver_preload(["renderizador_pdf", "renderizador_docx"])
+        return contexto
+    return multiprocessing.get_context("spawn")
+
+# O pool é criado no primeiro uso e recriado se o processo tiver sido
+# duplicado por fork (por exemplo, pelos workers do servidor de produção)
+def obter_executor():
+    global _executor, _pid
+    if _pid == os.getpid():
+        return _executor
+    with _lock:
+        if _pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=WORKERS_RENDERIZACAO, mp_context=_contexto())
+            _pid = os.getpid()
+    return _executor
+
+def encerrar():
+    global _executor, _pid
+    with _lock:
+        if _executor is not None and _pid == os.getpid():
+            _executor.shutdown(wait=True)
+        _executor = None
+        _pid = None
+
+
+# Executada em cada processo do pool ao aquecer. O PDF já vem pronto do
+# forkserver (os estilos são montados na importação); o modelo do DOCX é
+# montado no primeiro uso.
+def _aquecer_processo():
+    from renderizador_docx import obter_modelo_docx
+    obter_modelo_docx()
+    return os.getpid()
+
+# Sobe os processos do pool antes da primeira geração; devolve quantos responderam
+def aquecer():
+    executor = obter_executor()
+    futuros = [executor.submit(_aquecer_processo) for _ in range(WORKERS_RENDERIZACAO)]
+    return len({futuro.result() for futuro in futuros})
+
+
+# Executada dentro dos processos do pool
+def _renderizar(formato, titulo, texto, autor, conteudo, destino):
+    if formato == "pdf":
+        from renderizador_pdf import salvar_em_pdf
+        return salvar_em_pdf(titulo, texto, autor, conteudo, destino)
+
+    from renderizador_docx import salvar_em_docx, salvar_em_docx_rapido
+    if MOTOR_DOCX == "classico":
+        return salvar_em_docx(titulo, texto, autor, conteudo, destino)
+    return salvar_em_docx_rapido(titulo, texto, autor, conteudo, destino)
+
+# Também executada no pool: devolve o resultado com o tempo gasto e o tamanho
+# do arquivo, que o processo principal registra nas métricas
+def _renderizar_medido(formato, titulo, texto, autor, conteudo, destino):
+    inicio = time.perf_counter()
+    resultado = _renderizar(formato, titulo, texto, autor, conteudo, destino)
+    return resultado, time.perf_counter() - inicio, os.path.getsize(resultado)
+
+# Gera o arquivo num buffer dentro do processo do pool e devolve só os bytes
+def _renderizar_em_bytes(formato, titulo, texto, autor, conteudo):
+    from io import BytesIO
+
+    inicio = time.perf_counter()
+    buffer = BytesIO()
+    _renderizar(formato, titulo, texto, autor, conteudo, buffer)
+    return buffer.getvalue(), time.perf_counter() - inicio
+
+def _registrar(formato, duracao, tamanho):
+    metricas.RENDERIZACAO_TEMPO.observar(duracao, formato=formato)
+    metricas.ARQUIVO_TAMANHO.observar(tamanho, formato=formato)
+
+def renderizar_em_bytes(formato, titulo, texto, autor, conteudo=None):
+    dados, duracao = obter_executor().submit(_renderizar_em_bytes, formato, titulo, texto, autor, conteudo).result()
+    _registrar(formato, duracao, len(dados))
+    return dados
+
+# Para o servidor ASGI: espera o processo do pool sem ocupar uma thread
+async def renderizar_em_bytes_async(formato, titulo, texto, autor, conteudo=None):
+    futuro = obter_executor().submit(_renderizar_em_bytes, formato, titulo, texto, autor, conteudo)
+    dados, duracao = await asyncio.wrap_future(futuro)
+    _registrar(formato, duracao, len(dados))
+    return dados
+
+def renderizar(formato, titulo, texto, autor, conteudo=None, destino=None):
+    resultado, duracao, tamanho = obter_executor().submit(
+        _renderizar_medido, formato, titulo, texto, autor, conteudo, destino).result()
+    _registrar(formato, duracao, tamanho)
+    return resultado
+
+# Gera os formatos pedidos em paralelo; o tempo total passa a ser o do
+# formato mais lento em vez da soma de todos. `destinos` mapeia cada
+# formato para o caminho onde o arquivo deve ser gravado.
+def renderizar_formatos(titulo, texto, autor, conteudo=None, formatos=("docx", "pdf"), destinos=None):
+    destinos = destinos or {}
+    executor = obter_executor()
+    futuros = {formato: executor.submit(_renderizar_medido, formato, titulo, texto, autor, conteudo, destinos.get(formato))
+               for formato in formatos}
+    resultados = {}
+    for formato, futuro in futuros.items():
+        resultados[formato], duracao, tamanho = futuro.result()
+        _registrar(formato, duracao, tamanho)
+    return resultados
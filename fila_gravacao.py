@@ -0,0 +1,348 @@
+# Gravação dos trabalhos no banco em segundo plano (write-behind). Quem gera
+# o artigo só coloca o trabalho na fila e segue; uma thread junta o que
+# chegou em lotes e grava cada lote num único INSERT.
+#
+# Se o banco estiver fora do ar, o lote vai para um arquivo na pasta de
+# espera (SPOOL_GRAVACAO) e é reenviado quando o banco voltar, inclusive por
+# outro processo ou depois de um restart. Cada trabalho leva uma chave
+# (chave_gravacao) gerada aqui, então reenviar um lote já gravado não
+# duplica nada.
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+import metricas
+from database import PoolEsgotado
+from servico_banco import inserir_trabalhos
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava, só um processo deve reenviar a pasta de espera
+    fcntl = None
+
+PASTA_ESPERA = os.getenv("SPOOL_GRAVACAO", "spool_gravacao")
+
+GRAVACAO_ITENS = metricas.Contador("gravacao_trabalhos_total", "Trabalhos tratados pela gravação em segundo plano.",
+                                   ["destino"])
+GRAVACAO_ESPERA = metricas.Histograma("gravacao_espera_segundos",
+                                      "Tempo entre a entrada do trabalho na fila e a gravação no banco.")
+
+
+# Erros que indicam banco fora do alcance (e não um problema no próprio lote)
+def banco_indisponivel(erro):
+    if isinstance(erro, (PoolEsgotado, ConnectionError, TimeoutError)):
+        return True
+    return type(erro).__name__ in ("OperationalError", "InterfaceError")
+
+
+class FilaGravacao:
+    def __init__(self, gravar_lote=inserir_trabalhos, pasta_espera=PASTA_ESPERA, tamanho_lote=50,
+                 espera_lote=0.05, capacidade=10000, espera_minima=1.0, espera_maxima=60.0):
+        self._gravar_lote = gravar_lote
+        self.pasta_espera = pasta_espera
+        self.tamanho_lote = tamanho_lote
+        self.espera_lote = espera_lote
+        self.capacidade = capacidade
+        self.espera_minima = espera_minima
+        self.espera_maxima = espera_maxima
+        self._lock = threading.Lock()
+        self._fila = None
+        self._pid = None
+        self._futuros = {}
+        self._thread = None
+        self._parar = threading.Event()
+        self._lote_atual = None
+        self._em_gravacao = None
+        self._proxima_tentativa = 0.0
+        self._espera_atual = espera_minima
+        self._estatisticas = {"gravados": 0, "lotes": 0, "enviados_espera": 0, "reenviados": 0,
+                              "rejeitados": 0, "falhas_banco": 0}
+
+    # Inicia a thread de gravação no processo atual (e de novo após um fork);
+    # ao iniciar, ela já reenvia o que outro processo deixou na pasta de espera
+    def iniciar(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._fila = queue.Queue(maxsize=self.capacidade)
+            self._futuros = {}
+            self._parar = threading.Event()
+            self._lote_atual = None
+            self._thread = threading.Thread(target=self._trabalhar, args=(self._fila, self._parar),
+                                            name="gravacao-trabalhos", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _contar(self, nome, valor=1):
+        with self._lock:
+            self._estatisticas[nome] += valor
+
+    # Coloca o trabalho na fila e devolve um Future com o id do trabalho, que
+    # fica pronto quando ele for gravado. Com a fila cheia (ou depois de
+    # esvaziar), o trabalho vai direto para a pasta de espera. Um trabalho
+    # guardado na pasta de espera pode ser reenviado por outro processo, então
+    # o Future dele termina na hora com None: o id fica desconhecido. Quem já
+    # tentou gravar o trabalho por outro caminho passa a mesma `chave`, para
+    # que ele não seja duplicado.
+    def enviar(self, titulo, tema, autor, texto, artefatos=None, chave=None):
+        self.iniciar()
+        item = {"chave": chave or str(uuid.uuid4()), "titulo": titulo, "tema": tema, "autor": autor, "texto": texto,
+                "artefatos": artefatos or {}, "enfileirado_em": time.time()}
+        futuro = Future()
+        with self._lock:
+            self._futuros[item["chave"]] = futuro
+        if self._parar.is_set():
+            self._guardar([item])
+            return futuro
+        try:
+            self._fila.put_nowait(item)
+        except queue.Full:
+            self._guardar([item])
+        return futuro
+
+    def _proximo_lote(self, fila):
+        try:
+            # O lote fica visível para esvaziar() desde o primeiro item tirado da fila
+            lote = self._lote_atual = [fila.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+        limite = time.monotonic() + self.espera_lote
+        while len(lote) < self.tamanho_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(fila.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _trabalhar(self, fila, parar):
+        while not parar.is_set():
+            lote = self._proximo_lote(fila)
+            try:
+                if lote:
+                    self._em_gravacao = lote[0]["enfileirado_em"]
+                    self._gravar(lote)
+                if not parar.is_set():
+                    self._reenviar_espera()
+            except Exception as e:
+                print("❌ Erro na gravação em segundo plano:", e)
+            finally:
+                self._lote_atual = None
+                self._em_gravacao = None
+                for _ in lote:
+                    fila.task_done()
+
+    def _resolver(self, itens, ids):
+        with self._lock:
+            futuros = [self._futuros.pop(item["chave"], None) for item in itens]
+        for item, futuro, id_trabalho in zip(itens, futuros, ids):
+            GRAVACAO_ESPERA.observar(time.time() - item["enfileirado_em"])
+            if futuro is not None:
+                futuro.set_result(id_trabalho)
+
+    # Grava o lote; se o banco estiver fora do ar, guarda em disco para depois
+    def _gravar(self, lote):
+        if time.monotonic() < self._proxima_tentativa:
+            self._guardar(lote)
+            return
+        try:
+            ids = self._gravar_lote(lote)
+        except Exception as e:
+            if banco_indisponivel(e):
+                self._falhou(e)
+                self._guardar(lote)
+                return
+            # Um item com problema não pode travar os outros: grava um a um
+            self._gravar_individualmente(lote, e)
+            return
+        self._recuperou()
+        self._contar("lotes")
+        self._contar("gravados", len(lote))
+        GRAVACAO_ITENS.somar(len(lote), destino="banco")
+        self._resolver(lote, ids)
+
+    # Devolve quantos itens foram gravados; os que o banco recusa vão para a
+    # pasta de espera como rejeitados, e os que não chegam a ele, como pendentes
+    def _gravar_individualmente(self, lote, erro_lote, destino="banco"):
+        print("⚠️  Lote recusado pelo banco, gravando um a um:", erro_lote)
+        gravados = 0
+        for item in lote:
+            if time.monotonic() < self._proxima_tentativa:
+                self._guardar([item])
+                continue
+            try:
+                ids = self._gravar_lote([item])
+            except Exception as e:
+                if banco_indisponivel(e):
+                    self._falhou(e)
+                    self._guardar([item])
+                    continue
+                print(f"❌ Trabalho {item['titulo']!r} recusado pelo banco:", e)
+                self._guardar([item], rejeitado=True)
+                with self._lock:
+                    futuro = self._futuros.pop(item["chave"], None)
+                if futuro is not None:
+                    futuro.set_exception(e)
+                continue
+            self._recuperou()
+            gravados += 1
+            self._contar("gravados")
+            GRAVACAO_ITENS.somar(1, destino=destino)
+            self._resolver([item], ids)
+        return gravados
+
+    # Espera exponencial entre tentativas enquanto o banco está fora do ar
+    def _falhou(self, erro):
+        if self._proxima_tentativa == 0.0:
+            print("⚠️  Banco indisponível; os trabalhos serão guardados em disco:", erro)
+        self._contar("falhas_banco")
+        self._proxima_tentativa = time.monotonic() + self._espera_atual
+        self._espera_atual = min(self.espera_maxima, self._espera_atual * 2)
+
+    def _recuperou(self):
+        if self._proxima_tentativa:
+            print("✅ Banco disponível de novo; reenviando os trabalhos guardados.")
+        self._proxima_tentativa = 0.0
+        self._espera_atual = self.espera_minima
+
+    # Cada lote guardado é um arquivo próprio, gravado com fsync e renomeado
+    # no fim, então um arquivo da pasta de espera está sempre completo. O nome
+    # começa pelo instante do item mais antigo, para reenviar na ordem de
+    # chegada. Os rejeitados pelo banco ficam com outra extensão, para
+    # conferência manual.
+    def _guardar(self, itens, rejeitado=False):
+        os.makedirs(self.pasta_espera, exist_ok=True)
+        inicio = min(item["enfileirado_em"] for item in itens)
+        nome = f"{inicio:017.6f}-{uuid.uuid4().hex}.{'rejeitado' if rejeitado else 'json'}"
+        caminho = os.path.join(self.pasta_espera, nome)
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(itens, arquivo, ensure_ascii=False)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho)
+        if rejeitado:
+            self._contar("rejeitados", len(itens))
+            GRAVACAO_ITENS.somar(len(itens), destino="rejeitado")
+            return
+        self._contar("enviados_espera", len(itens))
+        GRAVACAO_ITENS.somar(len(itens), destino="espera")
+        with self._lock:
+            futuros = [self._futuros.pop(item["chave"], None) for item in itens]
+        for futuro in futuros:
+            if futuro is not None:
+                futuro.set_result(None)
+
+    def _arquivos_espera(self):
+        return sorted(glob.glob(os.path.join(self.pasta_espera, "*.json")))
+
+    def lotes_em_espera(self):
+        return len(self._arquivos_espera())
+
+    # Reenvia os lotes guardados, do mais antigo ao mais novo. A trava de
+    # cada arquivo impede que dois processos reenviem o mesmo lote ao mesmo tempo.
+    def _reenviar_espera(self):
+        if time.monotonic() < self._proxima_tentativa:
+            return
+        for caminho in self._arquivos_espera():
+            try:
+                arquivo = open(caminho, "r+", encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            with arquivo:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                if not os.path.exists(caminho):
+                    continue  # outro processo acabou de reenviar
+                itens = json.load(arquivo)
+                try:
+                    ids = self._gravar_lote(itens)
+                except Exception as e:
+                    if banco_indisponivel(e):
+                        self._falhou(e)
+                        return
+                    # Grava um a um: só os itens recusados ficam como
+                    # rejeitados, e os que o banco não chegar a receber
+                    # voltam à pasta de espera em outro arquivo
+                    gravados = self._gravar_individualmente(itens, e, destino="reenvio")
+                    os.remove(caminho)
+                    self._contar("reenviados", gravados)
+                    if time.monotonic() < self._proxima_tentativa:
+                        return
+                    continue
+                os.remove(caminho)
+            self._recuperou()
+            self._contar("reenviados", len(itens))
+            self._contar("gravados", len(itens))
+            GRAVACAO_ITENS.somar(len(itens), destino="reenvio")
+            self._resolver(itens, ids)
+
+    # Antes de o processo terminar: para a thread, espera até `timeout`
+    # segundos o lote que ela estiver gravando e grava o que sobrou na fila;
+    # o que não couber no banco vai para a pasta de espera. Se a thread não
+    # terminar a tempo, o lote dela também vai para a pasta de espera (a
+    # chave evita a duplicata caso ela ainda consiga gravá-lo). Depois disso,
+    # novos trabalhos vão direto para a pasta de espera.
+    def esvaziar(self, timeout=10.0):
+        if self._pid != os.getpid():
+            return
+        self._parar.set()
+        self._thread.join(timeout)
+        lote = []
+        while True:
+            try:
+                lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        if self._thread.is_alive():
+            em_andamento = self._lote_atual
+            pendentes = (em_andamento or []) + lote
+            if pendentes:
+                print(f"⚠️  Gravação não terminou em {timeout:.0f} s; {len(pendentes)} trabalho(s) guardado(s) em disco.")
+                self._guardar(pendentes)
+            self._lote_atual = None
+            return
+        for inicio in range(0, len(lote), self.tamanho_lote):
+            self._gravar(lote[inicio:inicio + self.tamanho_lote])
+
+    def tamanho(self):
+        return self._fila.qsize() if self._fila and self._pid == os.getpid() else 0
+
+    # Idade, em segundos, do trabalho mais antigo ainda não gravado (no lote
+    # sendo gravado, na fila deste processo ou na pasta de espera)
+    def idade_pendente_mais_antiga(self):
+        instantes = []
+        em_gravacao = self._em_gravacao
+        if em_gravacao is not None:
+            instantes.append(em_gravacao)
+        if self._fila is not None and self._pid == os.getpid():
+            with self._fila.mutex:
+                if self._fila.queue:
+                    instantes.append(self._fila.queue[0]["enfileirado_em"])
+        arquivos = self._arquivos_espera()
+        if arquivos:
+            try:
+                instantes.append(float(os.path.basename(arquivos[0]).split("-", 1)[0]))
+            except ValueError:
+                pass
+        return max(0.0, time.time() - min(instantes)) if instantes else 0.0
+
+    def estatisticas(self):
+        with self._lock:
+            dados = dict(self._estatisticas)
+        dados["na_fila"] = self.tamanho()
+        dados["lotes_em_espera"] = self.lotes_em_espera()
+        dados["pendente_mais_antiga_s"] = round(self.idade_pendente_mais_antiga(), 3)
+        dados["banco_disponivel"] = self._proxima_tentativa == 0.0
+        return dados
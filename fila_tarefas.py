@@ -0,0 +1,280 @@
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from metricas import TAREFA_ETAPA
+
+# Etapas pelas quais uma tarefa de geração passa
+NA_FILA = "na_fila"
+GERANDO = "gerando"
+SALVANDO = "salvando"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+
+DESCRICOES = {
+    NA_FILA: "Aguardando na fila...",
+    GERANDO: "Gerando artigo com a IA...",
+    SALVANDO: "Salvando no banco de dados...",
+    CONCLUIDO: "Trabalho concluído!",
+    FALHOU: "Erro ao gerar o trabalho.",
+}
+
+
+class FilaCheia(Exception):
+    pass
+
+
+class Tarefa:
+    def __init__(self, dados):
+        self.id = uuid.uuid4().hex
+        self.dados = dados
+        self.etapa = NA_FILA
+        self.erro = None
+        self.resultado = None
+        self.criada_em = time.time()
+        self.atualizada_em = self.criada_em
+        self.registro = None
+
+    def avancar(self, etapa):
+        agora = time.time()
+        TAREFA_ETAPA.observar(agora - self.atualizada_em, etapa=self.etapa)
+        self.etapa = etapa
+        self.atualizada_em = agora
+        if self.registro is not None:
+            self.registro.gravar(self)
+
+    @property
+    def finalizada(self):
+        return self.etapa in (CONCLUIDO, FALHOU)
+
+    def para_dict(self):
+        return {
+            "id": self.id,
+            "etapa": self.etapa,
+            "descricao": DESCRICOES.get(self.etapa, self.etapa),
+            "erro": self.erro,
+            "criada_em": self.criada_em,
+            "atualizada_em": self.atualizada_em,
+        }
+
+
+# Cópia das tarefas num SQLite compartilhado pelos processos do servidor.
+# Com vários workers (gunicorn.conf.py), a consulta de status pode chegar a
+# um processo diferente do que está gerando o trabalho; pelo registro
+# qualquer um deles responde.
+class RegistroTarefas:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._local = threading.local()
+
+    def _conexao(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.caminho, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tarefas (
+                    id TEXT PRIMARY KEY,
+                    dados TEXT NOT NULL,
+                    etapa TEXT NOT NULL,
+                    erro TEXT,
+                    resultado TEXT,
+                    criada_em REAL NOT NULL,
+                    atualizada_em REAL NOT NULL
+                )
+            """)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def gravar(self, tarefa):
+        try:
+            conn = self._conexao()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO tarefas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (tarefa.id, json.dumps(tarefa.dados), tarefa.etapa, tarefa.erro,
+                              json.dumps(tarefa.resultado), tarefa.criada_em, tarefa.atualizada_em))
+        except sqlite3.Error as e:
+            print("❌ Erro ao gravar a tarefa no registro:", e)
+
+    def obter(self, id_tarefa):
+        try:
+            linha = self._conexao().execute(
+                "SELECT dados, etapa, erro, resultado, criada_em, atualizada_em FROM tarefas WHERE id = ?",
+                (id_tarefa,)).fetchone()
+        except sqlite3.Error as e:
+            print("❌ Erro ao ler a tarefa do registro:", e)
+            return None
+        if linha is None:
+            return None
+        tarefa = Tarefa(json.loads(linha[0]))
+        tarefa.id = id_tarefa
+        tarefa.etapa, tarefa.erro = linha[1], linha[2]
+        tarefa.resultado = json.loads(linha[3])
+        tarefa.criada_em, tarefa.atualizada_em = linha[4], linha[5]
+        return tarefa
+
+    def limpar(self, limite):
+        try:
+            conn = self._conexao()
+            with conn:
+                conn.execute("DELETE FROM tarefas WHERE etapa IN (?, ?) AND atualizada_em < ?",
+                             (CONCLUIDO, FALHOU, limite))
+        except sqlite3.Error as e:
+            print("❌ Erro ao limpar o registro de tarefas:", e)
+
+
+# Fila limitada atendida por um conjunto de threads. As threads só são
+# criadas no primeiro envio (e recriadas após um fork), para que importar
+# o módulo não tenha efeitos colaterais.
+class FilaTarefas:
+    def __init__(self, processador, workers=4, capacidade=32, retencao=3600, registro=None):
+        self._processador = processador
+        self._workers = max(1, workers)
+        self._capacidade = capacidade
+        self._retencao = retencao
+        self._registro = registro
+        self._limpo_em = 0.0
+        self._lock = threading.Lock()
+        self._tarefas = {}
+        self._fila = None
+        self._pid = None
+
+    def _garantir_workers(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._fila = queue.Queue(maxsize=self._capacidade)
+            for i in range(self._workers):
+                thread = threading.Thread(target=self._trabalhar, args=(self._fila,),
+                                          name=f"worker-geracao-{i}", daemon=True)
+                thread.start()
+            self._pid = os.getpid()
+
+    def _limpar_expiradas(self):
+        limite = time.time() - self._retencao
+        with self._lock:
+            expiradas = [id_tarefa for id_tarefa, tarefa in self._tarefas.items()
+                         if tarefa.finalizada and tarefa.atualizada_em < limite]
+            for id_tarefa in expiradas:
+                del self._tarefas[id_tarefa]
+        # O registro é compartilhado; basta limpá-lo de vez em quando
+        if self._registro is not None and time.time() - self._limpo_em > 60:
+            self._limpo_em = time.time()
+            self._registro.limpar(limite)
+
+    def enviar(self, **dados):
+        self._garantir_workers()
+        self._limpar_expiradas()
+
+        tarefa = Tarefa(dados)
+        with self._lock:
+            self._tarefas[tarefa.id] = tarefa
+        # Gravada antes de entrar na fila, para não sobrescrever uma etapa posterior
+        if self._registro is not None:
+            tarefa.registro = self._registro
+            self._registro.gravar(tarefa)
+        try:
+            self._fila.put_nowait(tarefa)
+        except queue.Full:
+            with self._lock:
+                del self._tarefas[tarefa.id]
+            if self._registro is not None:
+                tarefa.erro = "A fila de geração está cheia."
+                tarefa.etapa = FALHOU
+                self._registro.gravar(tarefa)
+            raise FilaCheia("A fila de geração está cheia.")
+        return tarefa
+
+    # Tarefas de outro processo vêm do registro (uma cópia, só para leitura)
+    def obter(self, id_tarefa):
+        with self._lock:
+            tarefa = self._tarefas.get(id_tarefa)
+        if tarefa is None and self._registro is not None:
+            tarefa = self._registro.obter(id_tarefa)
+        return tarefa
+
+    # Espera as tarefas da fila terminarem, por até `timeout` segundos (ao
+    # encerrar um worker do servidor)
+    def encerrar(self, timeout=30.0):
+        if self._pid != os.getpid():
+            return
+        limite = time.monotonic() + timeout
+        while self._fila.unfinished_tasks and time.monotonic() < limite:
+            time.sleep(0.1)
+
+    def tamanho(self):
+        return self._fila.qsize() if self._fila else 0
+
+    def _trabalhar(self, fila):
+        while True:
+            tarefa = fila.get()
+            try:
+                tarefa.resultado = self._processador(tarefa)
+                tarefa.avancar(CONCLUIDO)
+            except Exception as e:
+                print(f"❌ Erro ao processar tarefa {tarefa.id}:", e)
+                tarefa.erro = str(e)
+                tarefa.avancar(FALHOU)
+            finally:
+                fila.task_done()
+
+
+# Versão para o servidor ASGI (servidor_async.py): cada tarefa é uma
+# corrotina no loop de eventos, sem fila nem threads, então uma tarefa
+# esperando o Gemini custa só a memória dela. `limite` é quantas tarefas
+# podem estar em andamento ao mesmo tempo; acima dele o envio levanta FilaCheia.
+class FilaTarefasAsync:
+    def __init__(self, processador, limite=500, retencao=3600):
+        self._processador = processador
+        self._limite = limite
+        self._retencao = retencao
+        self._tarefas = {}
+        self._em_andamento = set()
+
+    def _limpar_expiradas(self):
+        limite = time.time() - self._retencao
+        expiradas = [id_tarefa for id_tarefa, tarefa in self._tarefas.items()
+                     if tarefa.finalizada and tarefa.atualizada_em < limite]
+        for id_tarefa in expiradas:
+            del self._tarefas[id_tarefa]
+
+    # Precisa ser chamado de dentro do loop de eventos
+    def enviar(self, **dados):
+        self._limpar_expiradas()
+        if len(self._em_andamento) >= self._limite:
+            raise FilaCheia("Limite de gerações em andamento atingido.")
+
+        tarefa = Tarefa(dados)
+        self._tarefas[tarefa.id] = tarefa
+        execucao = asyncio.create_task(self._executar(tarefa))
+        # O loop só guarda uma referência fraca às tasks
+        self._em_andamento.add(execucao)
+        execucao.add_done_callback(self._em_andamento.discard)
+        return tarefa
+
+    def obter(self, id_tarefa):
+        return self._tarefas.get(id_tarefa)
+
+    def tamanho(self):
+        return len(self._em_andamento)
+
+    async def _executar(self, tarefa):
+        try:
+            tarefa.resultado = await self._processador(tarefa)
+            tarefa.avancar(CONCLUIDO)
+        except Exception as e:
+            print(f"❌ Erro ao processar tarefa {tarefa.id}:", e)
+            tarefa.erro = str(e)
+            tarefa.avancar(FALHOU)
+
+    # Espera as tarefas em andamento terminarem, por até `timeout` segundos
+    async def encerrar(self, timeout=30.0):
+        if self._em_andamento:
+            await asyncio.wait(list(self._em_andamento), timeout=timeout)
@@ -0,0 +1,323 @@
+# Geração do texto dos artigos com o Gemini, usada pelo servidor web e
+# pela geração em lote (gerar_lote.py)
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import cache_artigos
+from cache_artigos import CacheArtigos
+from cliente_gemini import ClienteGemini
+from parser_artigo import PADRAO_SECAO, EXTRAS
+
+# Carregar a chave de API do arquivo .env
+load_dotenv()
+
+# Configuração da API Gemini
+MODELO_GEMINI = "gemini-2.0-flash"
+
+# O cliente (e o pacote google.generativeai, que é pesado) só é criado na
+# primeira geração. Atribuir `modelo` antes disso, como fazem os benchmarks,
+# substitui o cliente.
+modelo = None
+_lock_modelo = threading.Lock()
+
+
+def _criar_modelo():
+    if os.getenv("GEMINI_FALSO"):
+        from modelo_falso import ModeloFalso
+        modelo_base = ModeloFalso(latencia=float(os.getenv("GEMINI_FALSO_LATENCIA", "0")))
+    else:
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("API_KEY"))
+        modelo_base = genai.GenerativeModel(model_name=MODELO_GEMINI)
+
+    # Todas as chamadas passam pelo cliente, que respeita a cota da API, limita
+    # as chamadas simultâneas, tenta de novo em erros temporários e deixa de
+    # chamar a API por um tempo quando ela está fora do ar
+    return ClienteGemini(modelo_base,
+                         requisicoes_por_minuto=int(os.getenv("GEMINI_RPM", "15")),
+                         tokens_por_minuto=int(os.getenv("GEMINI_TPM", "1000000")),
+                         max_simultaneas=int(os.getenv("GEMINI_SIMULTANEAS", "4")),
+                         tentativas=int(os.getenv("GEMINI_TENTATIVAS", "4")),
+                         timeout=float(os.getenv("GEMINI_TIMEOUT", "120")),
+                         limite_falhas=int(os.getenv("GEMINI_DISJUNTOR_FALHAS", "5")),
+                         tempo_aberto=float(os.getenv("GEMINI_DISJUNTOR_ESPERA", "30")))
+
+def obter_modelo():
+    global modelo
+    if modelo is None:
+        with _lock_modelo:
+            if modelo is None:
+                modelo = _criar_modelo()
+    return modelo
+
+# Cache dos artigos gerados (memória + SQLite compartilhado entre processos)
+cache = CacheArtigos(os.getenv("CACHE_ARTIGOS_ARQUIVO", "cache_artigos.sqlite3"),
+                     tamanho_maximo=int(os.getenv("CACHE_ARTIGOS_TAMANHO", "256")),
+                     ttl=int(os.getenv("CACHE_ARTIGOS_TTL", "86400")))
+
+# Função para formatar o título com a primeira letra de cada palavra em maiúscula
+def formatar_titulo(titulo):
+    return titulo.title()
+
+# Modelo do prompt enviado ao Gemini
+PROMPT_ARTIGO = """
+    Gere um artigo acadêmico completo e bem estruturado sobre **"{tema}"** com o título **"{titulo}"**, seguindo rigorosamente as normas da ABNT. O artigo deve conter as seguintes seções obrigatórias, com seus respectivos conteúdos e tamanhos mínimos:
+
+    **1. Título**
+    - Deve aparecer centralizado no início.
+
+    **2. Resumo (em português)**
+    - Um parágrafo entre 150 a 250 palavras que sintetize os principais pontos do artigo.
+    
+    **3. Palavras-chave (em português)**
+    - De 3 a 5 palavras separadas por ponto e vírgula (;).
+
+    **4. Abstract (em inglês)**
+    - Um parágrafo com a tradução do resumo, entre 150 a 250 palavras.
+    - Sintetize os principais pontos do artigo em inglês.
+    
+    **5. Keywords (em inglês)**
+    - Tradução das palavras-chave, entre 3 e 5 termos separados por ponto e vírgula (;).
+
+    **6. Introdução**
+    - Apresente o tema, justificativa, problema e objetivo da pesquisa.
+    - Mínimo de 200 palavras.
+
+    **7. Revisão de Literatura**
+    - Discorra sobre conceitos teóricos importantes sobre o tema.
+    - Utilize ao menos 2 citações no estilo ABNT: (SOBRENOME, ano, p.xx).
+    - Mínimo de 300 palavras.
+
+    **8. Metodologia**
+    - Descreva os métodos e procedimentos adotados para desenvolver o trabalho.
+    - Pode incluir abordagem qualitativa/quantitativa, revisão bibliográfica, etc.
+    - Mínimo de 200 palavras.
+
+    **9. Resultados e Discussão**
+    - Apresente os principais resultados esperados ou obtidos.
+    - Relacione com a literatura citada.
+    - Mínimo de 300 palavras.
+
+    **10. Conclusão**
+    - Retome os objetivos, destaque as contribuições e proponha trabalhos futuros.
+    - Mínimo de 150 palavras.
+
+    **11. Referências**
+    - Liste pelo menos **3 referências no formato ABNT.**
+    - Exemplo: SOBRENOME, Nome. *Título do Livro ou Artigo*. Local: Editora, Ano.
+    """
+
+# Prompts do modo por seções: primeiro um esboço curto com o resumo, depois
+# cada seção do corpo em paralelo, todas partindo do mesmo esboço
+PROMPT_ESBOCO = """
+    Vamos escrever, seguindo as normas da ABNT, um artigo acadêmico sobre **"{tema}"** com o título **"{titulo}"**. Nesta etapa, gere apenas:
+
+    **Esboço**
+    - Um roteiro curto (no máximo 15 linhas) com o objetivo, o problema de pesquisa, a ideia central de cada seção (Introdução, Revisão de Literatura, Metodologia, Resultados e Discussão, Conclusão) e de 3 a 5 obras que serão citadas, no formato (SOBRENOME, ano).
+
+    Em seguida, exatamente nesta ordem e com estes rótulos:
+
+    **Resumo:** um parágrafo entre 150 a 250 palavras que sintetize os principais pontos do artigo.
+
+    **Palavras-chave:** de 3 a 5 palavras separadas por ponto e vírgula (;).
+
+    **Abstract:** a tradução do resumo para o inglês.
+
+    **Keywords:** a tradução das palavras-chave, separadas por ponto e vírgula (;).
+    """
+
+PROMPT_SECAO = """
+    Estamos escrevendo, seguindo as normas da ABNT, um artigo acadêmico sobre **"{tema}"** com o título **"{titulo}"**. Este é o esboço combinado para o artigo:
+
+    {esboco}
+
+    Escreva somente a seção **{secao}**, em parágrafos corridos, sem repetir o título da seção e sem escrever nenhuma outra seção.
+    {instrucoes}
+    """
+
+# Seções geradas em paralelo: (rótulo no texto final, nome no prompt, instruções)
+SECOES_PARALELAS = [
+    ("1. Introdução", "Introdução",
+     "- Apresente o tema, justificativa, problema e objetivo da pesquisa.\n    - Mínimo de 200 palavras."),
+    ("2. Revisão de Literatura", "Revisão de Literatura",
+     "- Discorra sobre conceitos teóricos importantes sobre o tema.\n"
+     "    - Utilize ao menos 2 das citações do esboço no estilo ABNT: (SOBRENOME, ano, p.xx).\n"
+     "    - Mínimo de 300 palavras."),
+    ("3. Metodologia", "Metodologia",
+     "- Descreva os métodos e procedimentos adotados para desenvolver o trabalho.\n"
+     "    - Pode incluir abordagem qualitativa/quantitativa, revisão bibliográfica, etc.\n"
+     "    - Mínimo de 200 palavras."),
+    ("4. Resultados e Discussão", "Resultados e Discussão",
+     "- Apresente os principais resultados esperados ou obtidos.\n"
+     "    - Relacione com as obras do esboço.\n    - Mínimo de 300 palavras."),
+    ("5. Conclusão", "Conclusão",
+     "- Retome os objetivos, destaque as contribuições e proponha trabalhos futuros.\n"
+     "    - Mínimo de 150 palavras."),
+    ("Referências", "Referências",
+     "- Liste, uma por linha, as obras citadas no esboço no formato ABNT (pelo menos 3).\n"
+     "    - Exemplo: SOBRENOME, Nome. *Título do Livro ou Artigo*. Local: Editora, Ano."),
+]
+
+# "completo" pede o artigo inteiro num único prompt; "secoes" usa o esboço e
+# gera as seções do corpo em paralelo, então o tempo total fica perto do da
+# seção mais longa
+MODO_COMPLETO = "completo"
+MODO_SECOES = "secoes"
+MODO_GERACAO = os.getenv("MODO_GERACAO", MODO_COMPLETO)
+
+# Qualquer alteração no prompt muda a versão e invalida o cache antigo
+VERSAO_PROMPT = cache_artigos.versao_prompt(PROMPT_ARTIGO)
+VERSAO_PROMPT_SECOES = cache_artigos.versao_prompt(
+    PROMPT_ESBOCO + PROMPT_SECAO + repr(SECOES_PARALELAS))
+
+def montar_prompt(titulo, tema):
+    return PROMPT_ARTIGO.format(titulo=formatar_titulo(titulo), tema=tema)
+
+def chave_cache(titulo, tema, modo=None):
+    versao = VERSAO_PROMPT_SECOES if (modo or MODO_GERACAO) == MODO_SECOES else VERSAO_PROMPT
+    return cache_artigos.gerar_chave(titulo, tema, MODELO_GEMINI, versao)
+
+# Separa a resposta do esboço em (esboço, resumo e palavras-chave). Só as
+# seções de abertura são aproveitadas; o corpo vem das chamadas em paralelo.
+def separar_esboco(texto):
+    esboco = []
+    abertura = []
+    atual = None
+    for linha in texto.strip().splitlines():
+        match = PADRAO_SECAO.match(linha.strip().replace("*", ""))
+        if match:
+            nome = match.group(1).casefold()
+            atual = next((secao for secao in EXTRAS if secao.casefold() == nome), None)
+        if atual:
+            abertura.append(linha)
+        elif not abertura:
+            esboco.append(linha)
+    return "\n".join(esboco).strip(), "\n".join(abertura).strip()
+
+# Tira o título da seção caso o modelo o tenha repetido e coloca o rótulo padrão
+def montar_secao(rotulo, texto):
+    linhas = texto.strip().splitlines()
+    if linhas:
+        match = PADRAO_SECAO.match(linhas[0].strip().replace("*", ""))
+        if match:
+            linhas[0] = match.group(2)
+    return f"**{rotulo}**\n\n" + "\n".join(linhas).strip()
+
+# Gera o artigo por seções, devolvendo cada parte assim que ela e as
+# anteriores estão prontas, já no formato lido por parser_artigo
+def gerar_por_secoes(titulo, tema):
+    titulo_formatado = formatar_titulo(titulo)
+    resposta = obter_modelo().generate_content(PROMPT_ESBOCO.format(titulo=titulo_formatado, tema=tema))
+    esboco, abertura = separar_esboco(resposta.text)
+    yield f"## {titulo_formatado}\n\n{abertura}"
+
+    def gerar_secao(nome, instrucoes):
+        prompt = PROMPT_SECAO.format(titulo=titulo_formatado, tema=tema, esboco=esboco,
+                                     secao=nome, instrucoes=instrucoes)
+        return obter_modelo().generate_content(prompt).text
+
+    with ThreadPoolExecutor(max_workers=len(SECOES_PARALELAS)) as executor:
+        futuros = [(rotulo, executor.submit(gerar_secao, nome, instrucoes))
+                   for rotulo, nome, instrucoes in SECOES_PARALELAS]
+        try:
+            for rotulo, futuro in futuros:
+                yield "\n\n" + montar_secao(rotulo, futuro.result())
+        finally:
+            for _, futuro in futuros:
+                futuro.cancel()
+
+# Função para gerar o artigo
+def gerar_artigo_abnt(titulo, tema, autor, modo=None):
+    def gerar():
+        if (modo or MODO_GERACAO) == MODO_SECOES:
+            return "".join(gerar_por_secoes(titulo, tema))
+        resposta = obter_modelo().generate_content(montar_prompt(titulo, tema))
+        return resposta.text
+    return cache.obter_ou_gerar(chave_cache(titulo, tema, modo), gerar)
+
+def _trechos_stream(titulo, tema):
+    resposta = obter_modelo().generate_content(montar_prompt(titulo, tema), stream=True)
+    for parte in resposta:
+        try:
+            texto = parte.text
+        except ValueError:
+            # Trechos sem conteúdo (por exemplo, o de encerramento) não têm texto
+            continue
+        if texto:
+            yield texto
+
+# Função para gerar o artigo em modo streaming, devolvendo os trechos à medida que chegam.
+# No modo por seções cada trecho é uma seção inteira, enviada na ordem do artigo.
+def gerar_artigo_abnt_stream(titulo, tema, autor, modo=None):
+    chave = chave_cache(titulo, tema, modo)
+    texto = cache.obter(chave)
+    if texto is not None:
+        yield texto
+        return
+
+    partes = []
+    trechos = gerar_por_secoes(titulo, tema) if (modo or MODO_GERACAO) == MODO_SECOES else _trechos_stream(titulo, tema)
+    for texto in trechos:
+        partes.append(texto)
+        yield texto
+    cache.guardar(chave, "".join(partes))
+
+
+# Versões assíncronas, usadas pelo servidor ASGI (servidor_async.py). Cada
+# chamada ao Gemini é uma corrotina, então um único processo mantém
+# centenas de gerações esperando a API ao mesmo tempo.
+async def gerar_por_secoes_async(titulo, tema):
+    titulo_formatado = formatar_titulo(titulo)
+    resposta = await obter_modelo().generate_content_async(PROMPT_ESBOCO.format(titulo=titulo_formatado, tema=tema))
+    esboco, abertura = separar_esboco(resposta.text)
+    yield f"## {titulo_formatado}\n\n{abertura}"
+
+    async def gerar_secao(nome, instrucoes):
+        prompt = PROMPT_SECAO.format(titulo=titulo_formatado, tema=tema, esboco=esboco,
+                                     secao=nome, instrucoes=instrucoes)
+        return (await obter_modelo().generate_content_async(prompt)).text
+
+    tarefas = [(rotulo, asyncio.create_task(gerar_secao(nome, instrucoes)))
+               for rotulo, nome, instrucoes in SECOES_PARALELAS]
+    try:
+        for rotulo, tarefa in tarefas:
+            yield "\n\n" + montar_secao(rotulo, await tarefa)
+    finally:
+        for _, tarefa in tarefas:
+            tarefa.cancel()
+
+async def gerar_artigo_abnt_async(titulo, tema, autor, modo=None):
+    async def gerar():
+        if (modo or MODO_GERACAO) == MODO_SECOES:
+            return "".join([parte async for parte in gerar_por_secoes_async(titulo, tema)])
+        resposta = await obter_modelo().generate_content_async(montar_prompt(titulo, tema))
+        return resposta.text
+    return await cache.obter_ou_gerar_async(chave_cache(titulo, tema, modo), gerar)
+
+async def _trechos_stream_async(titulo, tema):
+    async for parte in obter_modelo().gerar_stream_async(montar_prompt(titulo, tema)):
+        try:
+            texto = parte.text
+        except ValueError:
+            continue
+        if texto:
+            yield texto
+
+async def gerar_artigo_abnt_stream_async(titulo, tema, autor, modo=None):
+    chave = chave_cache(titulo, tema, modo)
+    texto = await asyncio.to_thread(cache.obter, chave)
+    if texto is not None:
+        yield texto
+        return
+
+    partes = []
+    if (modo or MODO_GERACAO) == MODO_SECOES:
+        trechos = gerar_por_secoes_async(titulo, tema)
+    else:
+        trechos = _trechos_stream_async(titulo, tema)
+    async for texto in trechos:
+        partes.append(texto)
+        yield texto
+    await asyncio.to_thread(cache.guardar, chave, "".join(partes))
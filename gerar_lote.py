@@ -0,0 +1,180 @@
+# Gera artigos em lote a partir de um CSV ou JSONL com as colunas titulo, tema e autor.
+#
+# Uso: python gerar_lote.py entrada.csv [--workers 4] [--formatos pdf,docx]
+#                                       [--lote 20] [--manifesto resultado.jsonl]
+#
+# Cada linha concluída é registrada no manifesto (JSONL). Rodar de novo com a
+# mesma entrada pula as linhas que já estão concluídas no manifesto, então um
+# lote interrompido continua de onde parou.
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import armazem_artefatos
+import executor_renderizacao
+from gerador_artigos import gerar_artigo_abnt, MODO_GERACAO, MODO_COMPLETO, MODO_SECOES
+from servico_banco import salvar_trabalhos
+
+OK = "ok"
+FALHOU = "falhou"
+
+# Base da chave de gravação (chave_gravacao) de cada linha: a mesma linha
+# gera sempre a mesma chave, então rodar o lote de novo depois de o banco
+# já ter gravado uma linha (mas antes de o manifesto registrá-la) não a duplica
+NAMESPACE_LOTE = uuid.UUID("6f1d3c52-8a4e-4b0e-9d7a-2c5e8f3b1a90")
+
+
+def ler_entrada(caminho):
+    with open(caminho, encoding="utf-8-sig", newline="") as arquivo:
+        if caminho.lower().endswith(".jsonl"):
+            linhas = [json.loads(linha) for linha in arquivo if linha.strip()]
+        else:
+            linhas = list(csv.DictReader(arquivo))
+    return [{campo: (linha.get(campo) or "").strip() for campo in ("titulo", "tema", "autor")}
+            for linha in linhas]
+
+# Identifica a linha pelo conteúdo, então reordenar a entrada não gera duplicatas
+def chave_linha(linha):
+    partes = json.dumps([linha["titulo"], linha["tema"], linha["autor"]], ensure_ascii=False)
+    return hashlib.sha256(partes.encode("utf-8")).hexdigest()[:16]
+
+def ler_concluidas(caminho_manifesto):
+    concluidas = set()
+    if not os.path.exists(caminho_manifesto):
+        return concluidas
+    with open(caminho_manifesto, encoding="utf-8") as arquivo:
+        for linha in arquivo:
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                # Última linha cortada por uma interrupção no meio da escrita
+                continue
+            if registro.get("status") == OK:
+                concluidas.add(registro["chave"])
+    return concluidas
+
+# Executada nas threads do lote: gera o texto e os arquivos de uma linha
+def processar_linha(linha, formatos, modo=None):
+    if not linha["titulo"] or not linha["tema"]:
+        raise ValueError("Título e Tema são obrigatórios")
+    texto = gerar_artigo_abnt(linha["titulo"], linha["tema"], linha["autor"], modo=modo)
+    artefatos = {}
+    if formatos:
+        artefatos = armazem_artefatos.obter_ou_renderizar(linha["titulo"], texto, linha["autor"],
+                                                          formatos=formatos)
+    return texto, artefatos
+
+
+class Manifesto:
+    def __init__(self, caminho):
+        self.arquivo = open(caminho, "a", encoding="utf-8")
+
+    def registrar(self, linha, status, **extras):
+        registro = {"chave": chave_linha(linha), "status": status, **linha, **extras}
+        self.arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self.arquivo.flush()
+
+    def fechar(self):
+        self.arquivo.close()
+
+
+# Grava no banco, num único INSERT, as linhas geradas desde o último lote
+def salvar_pendentes(pendentes, manifesto, contagem):
+    if not pendentes:
+        return
+    ids = salvar_trabalhos([{**linha, "texto": texto, "artefatos": artefatos,
+                             "chave": str(uuid.uuid5(NAMESPACE_LOTE, chave_linha(linha)))}
+                            for linha, texto, artefatos in pendentes])
+    for i, (linha, _, artefatos) in enumerate(pendentes):
+        if ids is None:
+            manifesto.registrar(linha, FALHOU, erro="Erro ao salvar no banco")
+            contagem[FALHOU] += 1
+        else:
+            manifesto.registrar(linha, OK, id_trabalho=ids[i],
+                                artefatos={formato: hash_artefato for formato, (hash_artefato, _) in artefatos.items()})
+            contagem[OK] += 1
+    pendentes.clear()
+
+def gerar_lote(entrada, manifesto_caminho, workers=4, formatos=armazem_artefatos.FORMATOS, tamanho_lote=20,
+               modo=None):
+    linhas = ler_entrada(entrada)
+    concluidas = ler_concluidas(manifesto_caminho)
+    a_fazer = []
+    vistas = set()
+    for linha in linhas:
+        chave = chave_linha(linha)
+        if chave not in concluidas and chave not in vistas:
+            a_fazer.append(linha)
+            vistas.add(chave)
+
+    print(f"➡️  {len(linhas)} linhas na entrada, {len(linhas) - len(a_fazer)} já concluídas ou repetidas, "
+          f"{len(a_fazer)} a gerar com {workers} workers.")
+
+    contagem = {OK: 0, FALHOU: 0}
+    pendentes = []
+    manifesto = Manifesto(manifesto_caminho)
+    inicio = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futuros = {executor.submit(processar_linha, linha, formatos, modo): linha for linha in a_fazer}
+        for futuro in as_completed(futuros):
+            linha = futuros[futuro]
+            try:
+                texto, artefatos = futuro.result()
+            except Exception as e:
+                print(f"❌ {linha['titulo'] or '(sem título)'}: {e}")
+                manifesto.registrar(linha, FALHOU, erro=str(e))
+                contagem[FALHOU] += 1
+                continue
+            pendentes.append((linha, texto, artefatos))
+            if len(pendentes) >= tamanho_lote:
+                salvar_pendentes(pendentes, manifesto, contagem)
+                print(f"✅ {contagem[OK]}/{len(a_fazer)} concluídas, {contagem[FALHOU]} falhas")
+    except KeyboardInterrupt:
+        print("⚠️  Interrompido; salvando o que já foi gerado. Rode de novo para continuar.")
+        executor.shutdown(wait=False, cancel_futures=True)
+    finally:
+        salvar_pendentes(pendentes, manifesto, contagem)
+        manifesto.fechar()
+        executor.shutdown(wait=False)
+        executor_renderizacao.encerrar()
+
+    duracao = time.monotonic() - inicio
+    por_minuto = contagem[OK] / duracao * 60 if duracao > 0 else 0.0
+    print(f"🏁 {contagem[OK]} artigos gerados e {contagem[FALHOU]} falhas em {duracao:.1f} s "
+          f"({por_minuto:.1f} artigos/minuto). Manifesto: {manifesto_caminho}")
+    return contagem
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Gera artigos em lote a partir de um CSV ou JSONL.")
+    parser.add_argument("entrada", help="arquivo .csv ou .jsonl com as colunas titulo, tema e autor")
+    parser.add_argument("--manifesto", help="arquivo JSONL de resultados (padrão: <entrada>.manifesto.jsonl)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS_GERACAO", "4")),
+                        help="artigos gerados ao mesmo tempo")
+    parser.add_argument("--formatos", default=",".join(armazem_artefatos.FORMATOS),
+                        help="formatos a gerar, separados por vírgula; vazio para só salvar o texto")
+    parser.add_argument("--lote", type=int, default=20, help="linhas por INSERT no banco")
+    parser.add_argument("--modo", choices=(MODO_COMPLETO, MODO_SECOES), default=MODO_GERACAO,
+                        help="secoes gera as seções de cada artigo em paralelo")
+    args = parser.parse_args(argumentos)
+
+    formatos = tuple(formato for formato in args.formatos.split(",") if formato)
+    invalidos = set(formatos) - set(armazem_artefatos.FORMATOS)
+    if invalidos:
+        parser.error(f"formatos inválidos: {', '.join(sorted(invalidos))}")
+
+    manifesto = args.manifesto or os.path.splitext(args.entrada)[0] + ".manifesto.jsonl"
+    contagem = gerar_lote(args.entrada, manifesto, workers=max(args.workers, 1),
+                          formatos=formatos, tamanho_lote=max(args.lote, 1), modo=args.modo)
+    return 0 if contagem[FALHOU] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# Servidor de produção. Rode com:
+#   gunicorn -c gunicorn.conf.py
+# ou, para o servidor assíncrono (servidor_async.py, requer pip install uvicorn-worker):
+#   gunicorn -c gunicorn.conf.py -k uvicorn_worker.UvicornWorker servidor_async:app
+#
+# O app é carregado uma vez no processo mestre (preload_app) e herdado
+# pelos workers no fork. Cada worker atende MAX_REQUESTS requisições e é
+# trocado por um novo, o que limita o efeito de vazamentos de memória.
+#
+# Recarga sem derrubar requisições: kill -HUP <pid do mestre> sobe workers
+# novos e encerra os antigos depois que terminam o que estão fazendo. Como
+# o código fica carregado no mestre, uma versão nova do código exige um
+# mestre novo: kill -USR2 <pid do mestre> e, quando ele estiver de pé,
+# kill -QUIT no mestre antigo.
+import multiprocessing
+import os
+
+NUCLEOS = multiprocessing.cpu_count()
+
+wsgi_app = "App:app"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# Cada geração espera o Gemini numa thread, então os workers usam threads;
+# o número de processos segue o número de núcleos
+workers = int(os.getenv("WEB_CONCURRENCY", str(NUCLEOS * 2 + 1)))
+worker_class = "gthread"
+threads = int(os.getenv("THREADS", "8"))
+
+preload_app = True
+max_requests = int(os.getenv("MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "100"))
+timeout = int(os.getenv("TIMEOUT", "120"))
+# Tempo para um worker terminar as requisições e as gerações em andamento ao ser encerrado
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "60"))
+keepalive = 5
+accesslog = "-"
+
+# Cada worker tem o seu pool de renderização; os núcleos são divididos
+# entre eles em vez de cada um abrir um processo por núcleo
+os.environ.setdefault("WORKERS_RENDERIZACAO", str(max(1, NUCLEOS // workers)))
+
+
+# No mestre, depois de carregar o app e antes do primeiro fork
+def when_ready(server):
+    import App
+    import aquecimento
+    aquecimento.antes_do_fork(App.app)
+
+# Em cada worker, logo depois do fork: abre o banco, o Gemini e o pool de
+# renderização em segundo plano; /pronto responde 503 até terminar
+def post_worker_init(worker):
+    import aquecimento
+    aquecimento.iniciar()
+
+# Ao encerrar um worker (recarga, MAX_REQUESTS ou desligamento): espera as
+# gerações em andamento, grava o que estiver na fila de gravação e fecha o
+# pool de renderização
+def worker_exit(server, worker):
+    import App
+    App.fila.encerrar(timeout=graceful_timeout / 2)
+    App.gravacao.esvaziar()
+    App.executor_renderizacao.encerrar()
@@ -0,0 +1,182 @@
+# Limpeza de output_files/. Os arquivos do armazém (nome = hash) podem ser
+# apagados a qualquer momento: no próximo download eles são trazidos do
+# armazenamento compartilhado (armazenamento.py) ou gerados de novo a partir
+# de trabalhos.texto_gerado. A limpeza remove:
+#   - arquivos temporários esquecidos por uma geração interrompida;
+#   - artefatos sem download há mais de ARTEFATOS_IDADE_MAXIMA_DIAS;
+#   - os artefatos menos usados, enquanto a pasta passar de ARTEFATOS_LIMITE_MB.
+# Outros arquivos da pasta (exemplos, arquivos antigos com o nome do título)
+# contam para o limite, mas nunca são apagados.
+import os
+import shutil
+import threading
+import time
+import armazem_artefatos
+import metricas
+from renderizadores import OUTPUT_DIR
+
+LIMITE_BYTES = int(float(os.getenv("ARTEFATOS_LIMITE_MB", "1024")) * 1024 * 1024)
+IDADE_MAXIMA = float(os.getenv("ARTEFATOS_IDADE_MAXIMA_DIAS", "30")) * 86400
+INTERVALO = float(os.getenv("ARTEFATOS_INTERVALO_LIMPEZA", "600"))
+
+# Ao passar do limite, remove até sobrar esta fração dele, para não
+# voltar a limpar a cada novo arquivo
+FRACAO_ALVO = 0.9
+# Arquivos baixados ou gerados há menos que isso nunca são removidos
+CARENCIA = 300
+# Temporários mais antigos que isso pertencem a uma geração que já morreu
+IDADE_TEMPORARIO = 3600
+
+_estatisticas = {"varreduras": 0, "removidos_idade": 0, "removidos_cota": 0, "temporarios_removidos": 0,
+                 "bytes_liberados": 0, "ultima_varredura": None, "duracao_ultima_s": None,
+                 "arquivos": 0, "bytes_total": 0, "bytes_artefatos": 0}
+_lock = threading.Lock()
+_pid = None
+
+ARTEFATOS_REMOVIDOS = metricas.Contador("artefatos_removidos_total", "Arquivos removidos de output_files pela limpeza.",
+                                        ["motivo"])
+ARTEFATOS_BYTES = metricas.Medidor("artefatos_bytes", "Espaço ocupado por output_files na última varredura.")
+
+
+def _listar():
+    artefatos = []
+    temporarios = []
+    total = 0
+    quantidade = 0
+    try:
+        entradas = list(os.scandir(OUTPUT_DIR))
+    except FileNotFoundError:
+        return artefatos, temporarios, total, quantidade
+    for entrada in entradas:
+        try:
+            if not entrada.is_file(follow_symlinks=False):
+                continue
+            estado = entrada.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+        total += estado.st_size
+        quantidade += 1
+        if entrada.name.endswith(".tmp"):
+            temporarios.append((entrada.path, estado))
+        elif armazem_artefatos.PADRAO_ARTEFATO.match(entrada.name):
+            artefatos.append((entrada.path, estado))
+    return artefatos, temporarios, total, quantidade
+
+# Apaga o artefato se ele continuar sem uso desde a listagem e devolve o
+# tamanho liberado (None se não apagou). A trava do prefixo evita apagar um
+# arquivo que outro processo está gerando agora.
+def _remover(caminho, limite_acesso):
+    prefixo = os.path.basename(caminho)[:2]
+    with armazem_artefatos._trava_entre_processos(prefixo, bloquear=False) as travado:
+        if not travado:
+            return None
+        try:
+            estado = os.stat(caminho)
+            if max(estado.st_atime, estado.st_mtime) > limite_acesso:
+                return None
+            os.remove(caminho)
+        except FileNotFoundError:
+            return None
+    return estado.st_size
+
+# Uma rodada de limpeza; devolve o que foi removido nela
+def varrer(limite_bytes=None, idade_maxima=None):
+    limite_bytes = LIMITE_BYTES if limite_bytes is None else limite_bytes
+    idade_maxima = IDADE_MAXIMA if idade_maxima is None else idade_maxima
+    inicio = time.perf_counter()
+    agora = time.time()
+    removidos = {"idade": 0, "cota": 0, "temporario": 0}
+    liberados = 0
+
+    artefatos, temporarios, total, quantidade = _listar()
+    bytes_artefatos = sum(estado.st_size for _, estado in artefatos)
+
+    for caminho, estado in temporarios:
+        if estado.st_mtime < agora - IDADE_TEMPORARIO:
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                continue
+            removidos["temporario"] += 1
+            liberados += estado.st_size
+            total -= estado.st_size
+
+    # Do menos usado para o mais usado
+    artefatos.sort(key=lambda item: max(item[1].st_atime, item[1].st_mtime))
+    restantes = []
+    for caminho, estado in artefatos:
+        if idade_maxima and max(estado.st_atime, estado.st_mtime) < agora - idade_maxima:
+            tamanho = _remover(caminho, agora - idade_maxima)
+            if tamanho is not None:
+                removidos["idade"] += 1
+                liberados += tamanho
+                total -= tamanho
+                bytes_artefatos -= tamanho
+                continue
+        restantes.append((caminho, estado))
+
+    if limite_bytes and total > limite_bytes:
+        alvo = limite_bytes * FRACAO_ALVO
+        for caminho, estado in restantes:
+            if total <= alvo:
+                break
+            tamanho = _remover(caminho, agora - CARENCIA)
+            if tamanho is not None:
+                removidos["cota"] += 1
+                liberados += tamanho
+                total -= tamanho
+                bytes_artefatos -= tamanho
+
+    with _lock:
+        _estatisticas["varreduras"] += 1
+        _estatisticas["removidos_idade"] += removidos["idade"]
+        _estatisticas["removidos_cota"] += removidos["cota"]
+        _estatisticas["temporarios_removidos"] += removidos["temporario"]
+        _estatisticas["bytes_liberados"] += liberados
+        _estatisticas["ultima_varredura"] = agora
+        _estatisticas["duracao_ultima_s"] = round(time.perf_counter() - inicio, 4)
+        _estatisticas["arquivos"] = quantidade - sum(removidos.values())
+        _estatisticas["bytes_total"] = total
+        _estatisticas["bytes_artefatos"] = bytes_artefatos
+    for motivo, contagem in removidos.items():
+        if contagem:
+            ARTEFATOS_REMOVIDOS.somar(contagem, motivo=motivo)
+    ARTEFATOS_BYTES.definir(total)
+    return {"removidos": removidos, "bytes_liberados": liberados, "bytes_total": total}
+
+# Com vários workers, só um deles varre por vez; os outros pulam a rodada
+def _varrer_entre_processos():
+    with armazem_artefatos._trava_entre_processos("limpeza", bloquear=False) as travado:
+        if travado:
+            varrer()
+
+def _executar_varredor():
+    while True:
+        try:
+            _varrer_entre_processos()
+        except Exception as e:
+            print("❌ Erro na limpeza de output_files:", e)
+        time.sleep(INTERVALO)
+
+# Inicia a thread de limpeza no processo atual (e de novo após um fork).
+# Não faz nada com ARTEFATOS_INTERVALO_LIMPEZA=0.
+def iniciar_varredor():
+    global _pid
+    if _pid == os.getpid() or not INTERVALO:
+        return
+    with _lock:
+        if _pid == os.getpid():
+            return
+        threading.Thread(target=_executar_varredor, name="limpeza-artefatos", daemon=True).start()
+        _pid = os.getpid()
+
+def estatisticas():
+    with _lock:
+        dados = dict(_estatisticas)
+    dados["limite_bytes"] = LIMITE_BYTES
+    dados["idade_maxima_dias"] = IDADE_MAXIMA / 86400
+    try:
+        dados["disco_livre_bytes"] = shutil.disk_usage(OUTPUT_DIR).free
+    except FileNotFoundError:
+        dados["disco_livre_bytes"] = None
+    return dados
@@ -0,0 +1,208 @@
+# Métricas do processo no formato de texto do Prometheus, servidas em /metrics.
+#
+# Implementação mínima e sem dependências: cada observação é uma busca
+# binária nos limites do histograma e uma soma sob um lock, então o custo
+# no caminho de uma requisição fica na casa de um microssegundo. As séries
+# de cada combinação de rótulos são criadas uma vez e reaproveitadas.
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Limites (em segundos) para latências, do milissegundo ao minuto
+LIMITES_TEMPO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Limites para tamanhos de arquivo, de 1 KB a 16 MB
+LIMITES_BYTES = tuple(1024 * 4 ** i for i in range(8))
+# Limites para quantidade de tokens
+LIMITES_TOKENS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+_registro = []
+_lock_registro = threading.Lock()
+
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, descricao, rotulos=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._series = {}
+        self._lock = threading.Lock()
+        with _lock_registro:
+            _registro.append(self)
+
+    # Série de uma combinação de rótulos; guarde o retorno para evitar a busca no dicionário
+    def serie(self, **rotulos):
+        chave = tuple(str(rotulos[nome]) for nome in self.rotulos)
+        serie = self._series.get(chave)
+        if serie is None:
+            with self._lock:
+                serie = self._series.setdefault(chave, self._nova_serie())
+        return serie
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+        for chave, serie in sorted(self._series.items()):
+            linhas.extend(serie.exportar(self.nome, self.rotulos, chave))
+        return linhas
+
+
+class _SerieValor:
+    def __init__(self):
+        self.valor = 0
+        self._lock = threading.Lock()
+
+    def somar(self, quantidade=1):
+        with self._lock:
+            self.valor += quantidade
+
+    def definir(self, valor):
+        self.valor = valor
+
+    def exportar(self, nome, rotulos, chave):
+        return [f"{nome}{_formatar_rotulos(rotulos, chave)} {_numero(self.valor)}"]
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def _nova_serie(self):
+        return _SerieValor()
+
+    def somar(self, quantidade=1, **rotulos):
+        self.serie(**rotulos).somar(quantidade)
+
+
+# Valor instantâneo. Com `funcao`, o valor é lido só na hora da coleta.
+class Medidor(_Metrica):
+    tipo = "gauge"
+
+    def __init__(self, nome, descricao, rotulos=(), funcao=None):
+        super().__init__(nome, descricao, rotulos)
+        self.funcao = funcao
+
+    def _nova_serie(self):
+        return _SerieValor()
+
+    def somar(self, quantidade=1, **rotulos):
+        self.serie(**rotulos).somar(quantidade)
+
+    def definir(self, valor, **rotulos):
+        self.serie(**rotulos).definir(valor)
+
+    # Soma 1 enquanto o bloco executa (por exemplo, requisições em andamento)
+    @contextmanager
+    def em_andamento(self, **rotulos):
+        serie = self.serie(**rotulos)
+        serie.somar(1)
+        try:
+            yield
+        finally:
+            serie.somar(-1)
+
+    def exportar(self):
+        if self.funcao is not None:
+            try:
+                self.definir(self.funcao())
+            except Exception:
+                pass
+        return super().exportar()
+
+
+class _SerieHistograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+        self._lock = threading.Lock()
+
+    def observar(self, valor):
+        posicao = bisect_left(self.limites, valor)
+        with self._lock:
+            self.contagens[posicao] += 1
+            self.soma += valor
+
+    @contextmanager
+    def medir(self):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio)
+
+    def exportar(self, nome, rotulos, chave):
+        with self._lock:
+            contagens = list(self.contagens)
+            soma = self.soma
+        linhas = []
+        acumulado = 0
+        for limite, contagem in zip(self.limites + (float("inf"),), contagens):
+            acumulado += contagem
+            rotulo_le = f'le="{_numero(limite)}"'
+            linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, chave, rotulo_le)} {acumulado}")
+        linhas.append(f"{nome}_sum{_formatar_rotulos(rotulos, chave)} {_numero(soma)}")
+        linhas.append(f"{nome}_count{_formatar_rotulos(rotulos, chave)} {acumulado}")
+        return linhas
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome, descricao, rotulos=(), limites=LIMITES_TEMPO):
+        super().__init__(nome, descricao, rotulos)
+        self.limites = tuple(sorted(limites))
+
+    def _nova_serie(self):
+        return _SerieHistograma(self.limites)
+
+    def observar(self, valor, **rotulos):
+        self.serie(**rotulos).observar(valor)
+
+    def medir(self, **rotulos):
+        return self.serie(**rotulos).medir()
+
+
+def exportar():
+    with _lock_registro:
+        metricas = list(_registro)
+    linhas = []
+    for metrica in metricas:
+        linhas.extend(metrica.exportar())
+    return "\n".join(linhas) + "\n"
+
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# Métricas usadas pelos módulos do sistema
+GEMINI_LATENCIA = Histograma("gemini_latencia_segundos", "Duração de cada chamada ao Gemini (por tentativa).",
+                             ["modo", "resultado"])
+GEMINI_TOKENS = Histograma("gemini_tokens", "Tokens por chamada ao Gemini.", ["tipo"], limites=LIMITES_TOKENS)
+GEMINI_EM_ANDAMENTO = Medidor("gemini_chamadas_em_andamento", "Chamadas ao Gemini em andamento.")
+
+BANCO_LATENCIA = Histograma("banco_latencia_segundos", "Duração das operações no Postgres.", ["operacao"])
+
+RENDERIZACAO_TEMPO = Histograma("renderizacao_segundos", "Tempo de geração de cada arquivo, dentro do processo do pool.",
+                                ["formato"])
+ARQUIVO_TAMANHO = Histograma("arquivo_bytes", "Tamanho dos arquivos gerados.", ["formato"], limites=LIMITES_BYTES)
+
+TAREFA_ETAPA = Histograma("tarefa_etapa_segundos", "Tempo que cada tarefa de geração passou em cada etapa.", ["etapa"])
+
+HTTP_LATENCIA = Histograma("http_requisicao_segundos", "Duração das requisições HTTP.", ["rota", "metodo"])
+HTTP_EM_ANDAMENTO = Medidor("http_requisicoes_em_andamento", "Requisições HTTP em andamento.", ["rota"])
@@ -0,0 +1,4 @@
+-- Índice usado pela paginação por chave em (data_criacao, id) da listagem de trabalhos.
+-- CONCURRENTLY evita bloquear escritas na tabela enquanto o índice é criado.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_trabalhos_data_criacao_id
+    ON trabalhos (data_criacao DESC, id DESC);
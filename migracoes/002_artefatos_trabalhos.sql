@@ -0,0 +1,6 @@
+-- Hash do conteúdo e tamanho em bytes dos arquivos gerados para cada trabalho.
+-- Colunas novas e sem valor padrão não reescrevem a tabela.
+ALTER TABLE trabalhos ADD COLUMN IF NOT EXISTS hash_pdf CHAR(64);
+ALTER TABLE trabalhos ADD COLUMN IF NOT EXISTS tamanho_pdf BIGINT;
+ALTER TABLE trabalhos ADD COLUMN IF NOT EXISTS hash_docx CHAR(64);
+ALTER TABLE trabalhos ADD COLUMN IF NOT EXISTS tamanho_docx BIGINT;
@@ -0,0 +1,9 @@
+-- Arquivos gerados guardados no próprio Postgres (ARMAZENAMENTO=postgres).
+-- O conteúdo fica num large object, lido e gravado em blocos; a chave é o
+-- nome do artefato ("<hash>.<formato>"), o mesmo de trabalhos.hash_pdf/hash_docx.
+CREATE TABLE IF NOT EXISTS artefatos_armazenados (
+    chave TEXT PRIMARY KEY,
+    oid OID NOT NULL,
+    tamanho BIGINT NOT NULL,
+    criado_em TIMESTAMP NOT NULL DEFAULT NOW()
+);
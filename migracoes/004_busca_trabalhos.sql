@@ -0,0 +1,46 @@
+-- Busca textual nos trabalhos: uma coluna tsvector com a configuração
+-- portuguesa (título pesa mais que o tema, que pesa mais que o texto),
+-- mantida por um gatilho e indexada com GIN.
+--
+-- A coluna nasce vazia e sem valor padrão, então o ALTER não reescreve a
+-- tabela. As linhas existentes são preenchidas em lotes por faixa de id,
+-- cada lote na sua própria transação, e o índice é criado com CONCURRENTLY:
+-- em nenhum momento a tabela fica bloqueada para escrita.
+ALTER TABLE trabalhos ADD COLUMN IF NOT EXISTS busca TSVECTOR;
+
+CREATE OR REPLACE FUNCTION trabalhos_montar_busca(titulo TEXT, tema TEXT, texto TEXT) RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('portuguese', coalesce(titulo, '')), 'A')
+        || setweight(to_tsvector('portuguese', coalesce(tema, '')), 'B')
+        || setweight(to_tsvector('portuguese', coalesce(texto, '')), 'C');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION trabalhos_atualizar_busca() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.busca := trabalhos_montar_busca(NEW.titulo, NEW.tema, NEW.texto_gerado);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trabalhos_busca ON trabalhos;
+CREATE TRIGGER trabalhos_busca
+    BEFORE INSERT OR UPDATE OF titulo, tema, texto_gerado ON trabalhos
+    FOR EACH ROW EXECUTE FUNCTION trabalhos_atualizar_busca();
+
+-- Preenche as linhas antigas em lotes de 2000 ids, com COMMIT a cada lote
+DO $$
+DECLARE
+    inicio BIGINT;
+    maximo BIGINT;
+BEGIN
+    SELECT min(id), max(id) INTO inicio, maximo FROM trabalhos;
+    WHILE inicio <= maximo LOOP
+        UPDATE trabalhos
+        SET busca = trabalhos_montar_busca(titulo, tema, texto_gerado)
+        WHERE id >= inicio AND id < inicio + 2000 AND busca IS NULL;
+        COMMIT;
+        inicio := inicio + 2000;
+    END LOOP;
+END;
+$$;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_trabalhos_busca ON trabalhos USING GIN (busca);
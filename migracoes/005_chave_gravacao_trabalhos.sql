@@ -0,0 +1,8 @@
+-- Identificador gerado pela aplicação antes de gravar o trabalho. A gravação
+-- em segundo plano pode repetir um INSERT (por exemplo, ao reenviar um lote
+-- guardado em disco depois de uma queda); com a chave única, a repetição é
+-- ignorada em vez de duplicar o trabalho. Linhas antigas ficam com NULL.
+ALTER TABLE trabalhos ADD COLUMN IF NOT EXISTS chave_gravacao UUID;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_trabalhos_chave_gravacao
+    ON trabalhos (chave_gravacao);
@@ -0,0 +1,75 @@
+# Aplica, em ordem, os arquivos .sql da pasta migracoes/ que ainda não foram aplicados.
+#
+# Uso: python migrar.py
+import os
+import sys
+from database import conectar
+
+PASTA_MIGRACOES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migracoes")
+
+
+# Divide o arquivo em comandos, respeitando blocos $$ ... $$ de funções.
+# Cada comando roda isolado porque CREATE INDEX CONCURRENTLY não pode
+# rodar dentro de uma transação.
+def dividir_comandos(sql):
+    comandos = []
+    atual = []
+    dentro_de_bloco = False
+    for linha in sql.splitlines():
+        if linha.strip().startswith("--") and not dentro_de_bloco:
+            continue
+        atual.append(linha)
+        if linha.count("$$") % 2 == 1:
+            dentro_de_bloco = not dentro_de_bloco
+        if not dentro_de_bloco and linha.rstrip().endswith(";"):
+            comando = "\n".join(atual).strip()
+            if comando.rstrip(";").strip():
+                comandos.append(comando)
+            atual = []
+    resto = "\n".join(atual).strip()
+    if resto:
+        comandos.append(resto)
+    return comandos
+
+def migracoes_pendentes(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS migracoes_aplicadas (
+            nome TEXT PRIMARY KEY,
+            aplicada_em TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+    cur.execute("SELECT nome FROM migracoes_aplicadas")
+    aplicadas = {linha[0] for linha in cur.fetchall()}
+    arquivos = sorted(nome for nome in os.listdir(PASTA_MIGRACOES) if nome.endswith(".sql"))
+    return [nome for nome in arquivos if nome not in aplicadas]
+
+def migrar():
+    conn = conectar()
+    if not conn:
+        print("❌ Conexão com o banco falhou.")
+        return False
+
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            pendentes = migracoes_pendentes(cur)
+            if not pendentes:
+                print("✅ Nenhuma migração pendente.")
+            for nome in pendentes:
+                with open(os.path.join(PASTA_MIGRACOES, nome), encoding="utf-8") as arquivo:
+                    comandos = dividir_comandos(arquivo.read())
+                print(f"➡️  Aplicando {nome}...")
+                for comando in comandos:
+                    cur.execute(comando)
+                cur.execute("INSERT INTO migracoes_aplicadas (nome) VALUES (%s)", (nome,))
+                print(f"✅ {nome} aplicada.")
+        return True
+    except Exception as e:
+        print("❌ Erro ao aplicar migração:", e)
+        return False
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if migrar() else 1)
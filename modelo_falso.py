@@ -0,0 +1,99 @@
+# Modelo local com o mesmo generate_content do Gemini, para testar o
+# ClienteGemini, a fila e a geração em lote sem chamar a API.
+# Ative no servidor com GEMINI_FALSO=1 (e GEMINI_FALSO_LATENCIA em segundos).
+import asyncio
+import random
+import threading
+import time
+from collections import namedtuple
+
+from artigo_sintetico import gerar_artigo, paragrafo
+
+UsoTokens = namedtuple("UsoTokens", ["prompt_token_count", "candidates_token_count", "total_token_count"])
+
+
+# Imita os erros da API: `code` é o status HTTP, como em google.api_core.exceptions
+class ErroApiFalso(Exception):
+    def __init__(self, code, mensagem=None):
+        super().__init__(mensagem or f"Erro {code} simulado")
+        self.code = code
+
+
+class RespostaFalsa:
+    def __init__(self, texto, tokens_prompt, trechos=None):
+        self.text = texto
+        self.usage_metadata = UsoTokens(tokens_prompt, len(texto) // 4, tokens_prompt + len(texto) // 4)
+        self._trechos = trechos
+
+    def __iter__(self):
+        for trecho in self._trechos or [self]:
+            yield trecho
+
+    async def __aiter__(self):
+        for trecho in self:
+            yield trecho
+
+
+# `erros` é uma sequência de códigos HTTP (ou None para sucesso) usada nas
+# primeiras chamadas, em ordem; depois dela vale `taxa_erro` (chance de 503).
+# `segundos_por_mil_caracteres` faz a resposta demorar conforme o tamanho do
+# texto, como acontece com a API.
+class ModeloFalso:
+    def __init__(self, latencia=0.0, erros=(), taxa_erro=0.0, paragrafos_por_secao=3, tamanho_trecho=200,
+                 segundos_por_mil_caracteres=0.0):
+        self.latencia = latencia
+        self.segundos_por_mil_caracteres = segundos_por_mil_caracteres
+        self.taxa_erro = taxa_erro
+        self.paragrafos_por_secao = paragrafos_por_secao
+        self.tamanho_trecho = tamanho_trecho
+        self._erros = list(erros)
+        self._lock = threading.Lock()
+        self.chamadas = 0
+
+    def _proximo_erro(self):
+        with self._lock:
+            self.chamadas += 1
+            if self._erros:
+                return self._erros.pop(0)
+        return 503 if self.taxa_erro and random.random() < self.taxa_erro else None
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if self.latencia:
+            time.sleep(self.latencia)
+        espera, resposta = self._responder(prompt, stream)
+        if espera:
+            time.sleep(espera)
+        return resposta
+
+    # Mesmo comportamento, esperando com asyncio.sleep (como o SDK, que não
+    # ocupa uma thread enquanto aguarda a rede)
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        espera, resposta = self._responder(prompt, stream)
+        if espera:
+            await asyncio.sleep(espera)
+        return resposta
+
+    # Devolve a espera proporcional ao tamanho do texto e a resposta
+    def _responder(self, prompt, stream):
+        codigo = self._proximo_erro()
+        if codigo:
+            raise ErroApiFalso(codigo)
+
+        if "somente a seção" in prompt:
+            # Pedido de uma única seção (modo por seções)
+            gerador = random.Random(prompt)
+            texto = "\n\n".join(paragrafo(gerador) for _ in range(self.paragrafos_por_secao))
+        elif "Nesta etapa" in prompt:
+            # Esboço e resumo do modo por seções: só a abertura do artigo
+            texto = "**Esboço**\n- " + gerar_artigo(self.paragrafos_por_secao, semente=prompt).split("\n1. ")[0]
+        else:
+            texto = gerar_artigo(self.paragrafos_por_secao, semente=prompt)
+        espera = len(texto) / 1000 * self.segundos_por_mil_caracteres
+        tokens_prompt = len(prompt) // 4
+        if not stream:
+            return espera, RespostaFalsa(texto, tokens_prompt)
+        trechos = [RespostaFalsa(texto[i:i + self.tamanho_trecho], 0)
+                   for i in range(0, len(texto), self.tamanho_trecho)]
+        return espera, RespostaFalsa(texto, tokens_prompt, trechos)
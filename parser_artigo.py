@@ -0,0 +1,72 @@
+import re
+import unicodedata
+
+# Seções numeradas do corpo do artigo, na ordem em que são montadas
+SECOES_NUMERADAS = [
+    ("1", "Introdução"),
+    ("2", "Revisão de Literatura"),
+    ("3", "Metodologia"),
+    ("4", "Resultados e Discussão"),
+    ("5", "Conclusão")
+]
+EXTRAS = ["Resumo", "Palavras-chave", "Abstract", "Keywords"]
+
+# Uma única regex com todas as seções, compilada uma vez por processo.
+# O grupo 1 é o nome da seção e o grupo 2 o conteúdo na mesma linha.
+PADRAO_SECAO = re.compile(
+    r"^\s*\d{0,2}\.?\s*("
+    r"resumo|palavras-chave|abstract|keywords|introdução|revis[aã]o de literatura|"
+    r"metodologia|resultados e discussão|conclus[aã]o|refer[eê]ncias"
+    r")\s*:?\s*(.*)$",
+    re.IGNORECASE
+)
+PADRAO_ASTERISCOS = re.compile(r"\*+")
+
+# Tabela para traduzir o nome encontrado (sem acentos e em casefold) para a seção
+NOMES_SECOES = {
+    "resumo": "Resumo",
+    "palavras-chave": "Palavras-chave",
+    "abstract": "Abstract",
+    "keywords": "Keywords",
+    "introducao": "Introdução",
+    "revisao de literatura": "Revisão de Literatura",
+    "metodologia": "Metodologia",
+    "resultados e discussao": "Resultados e Discussão",
+    "conclusao": "Conclusão",
+    "referencias": "Referências",
+}
+
+
+def _nome_secao(encontrado):
+    decomposto = unicodedata.normalize("NFKD", encontrado.casefold())
+    chave = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return NOMES_SECOES[chave]
+
+# Função para remover os asteriscos de qualquer parte do texto
+def remover_asteriscos(texto):
+    return PADRAO_ASTERISCOS.sub("", texto)
+
+# Lê o texto gerado uma única vez e devolve {seção: [parágrafos]},
+# estrutura consumida tanto pelo PDF quanto pelo DOCX
+def analisar_artigo(texto):
+    conteudo = {}
+    atual = None
+    busca = PADRAO_SECAO.match
+
+    for linha in texto.splitlines():
+        # Remover todos os asteriscos equivale a remover as sequências deles
+        linha_limpa = linha.strip().replace("*", "")
+        if not linha_limpa:
+            continue
+
+        match = busca(linha_limpa)
+        if match:
+            atual = _nome_secao(match.group(1))
+            paragrafos = conteudo.setdefault(atual, [])
+            inline = match.group(2).strip()
+            if inline:
+                paragrafos.append(inline)
+        elif atual:
+            conteudo[atual].append(linha_limpa)
+
+    return conteudo
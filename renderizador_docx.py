@@ -0,0 +1,288 @@
+# Geração do DOCX com o python-docx. Importado só quando um DOCX é gerado
+# (veja renderizadores.py).
+from io import BytesIO
+from types import MappingProxyType
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Pt, RGBColor
+from docx.shared import Cm
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from lxml.etree import SubElement
+from parser_artigo import analisar_artigo, SECOES_NUMERADAS, EXTRAS
+from renderizadores import caminho_saida, nome_seguro
+
+def adicionar_num_pagina_word(doc):
+    section = doc.sections[0]
+    header = section.header
+    par = header.paragraphs[0] if header.paragraphs else header.add_paragraph()
+    par.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+
+    # Inserir campo de número de página
+    run = par.add_run()
+    fldChar1 = OxmlElement('w:fldChar')
+    fldChar1.set(qn('w:fldCharType'), 'begin')
+    instrText = OxmlElement('w:instrText')
+    instrText.text = 'PAGE'
+    fldChar2 = OxmlElement('w:fldChar')
+    fldChar2.set(qn('w:fldCharType'), 'end')
+    run._r.append(fldChar1)
+    run._r.append(instrText)
+    run._r.append(fldChar2)
+    run.font.name = 'Times New Roman'
+    run.font.size = Pt(12)
+
+# Função para formatar parágrafos com recuo de 1,25 cm e espaçamento entre parágrafos de 1,5
+def formatar_paragrafos(doc):
+    for paragrafo in doc.paragraphs:
+        if not paragrafo.style.name.startswith('Heading'):
+            paragrafo.paragraph_format.left_indent = Cm(1.25)
+            paragrafo.paragraph_format.line_spacing = 1.5
+        else:
+            paragrafo.paragraph_format.left_indent = Cm(0)
+
+
+# Função para salvar no DOCX com formatação correta; `destino` funciona como no PDF
+def salvar_em_docx(titulo, texto, autor, conteudo=None, destino=None):
+    doc = Document()
+    titulo_original = titulo  # Para nome do arquivo
+
+    # Título principal
+    titulo_paragrafo = doc.add_paragraph()
+    titulo_paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    run_titulo = titulo_paragrafo.add_run(titulo.upper())
+    run_titulo.font.name = "Times New Roman"
+    run_titulo.font.size = Pt(12)
+    run_titulo.bold = True
+    run_titulo.font.color.rgb = RGBColor(0, 0, 0)
+
+    # Autor
+    par_autor = doc.add_paragraph(autor)
+    par_autor.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    par_autor.paragraph_format.space_after = Pt(20)
+    par_autor.paragraph_format.space_before = Pt(24)
+    run_autor = par_autor.runs[0]
+    run_autor.font.name = "Times New Roman"
+    run_autor.font.size = Pt(12)
+    run_autor.font.color.rgb = RGBColor(0, 0, 0)
+
+    if conteudo is None:
+        conteudo = analisar_artigo(texto)
+
+    # Monta o corpo do artigo
+    for entrada in EXTRAS + [nome for _, nome in SECOES_NUMERADAS]:
+        if entrada in EXTRAS:
+            titulo_secao = entrada.upper()
+        else:
+            numero = next(num for num, nome in SECOES_NUMERADAS if nome == entrada)
+            titulo_secao = f"{numero} {entrada.upper()}"
+
+        if entrada not in EXTRAS:
+            heading = doc.add_heading(level=1)
+            run_heading = heading.add_run(titulo_secao)
+            run_heading.bold = True
+            run_heading.font.name = "Times New Roman"
+            run_heading.font.size = Pt(12)
+            run_heading.font.color.rgb = RGBColor(0, 0, 0)
+            heading.paragraph_format.space_after = Pt(12)
+
+        if entrada in conteudo:
+            for i, paragrafo in enumerate(conteudo[entrada]):
+                if entrada in EXTRAS and i == 0:
+                    p = doc.add_paragraph()
+                    run_titulo = p.add_run(f"{entrada.upper()}: ")
+                    run_titulo.bold = True
+                    run_titulo.font.name = "Times New Roman"
+                    run_titulo.font.size = Pt(12)
+                    run_titulo.font.color.rgb = RGBColor(0, 0, 0)
+
+                    run_texto = p.add_run(paragrafo)
+                    run_texto.font.name = "Times New Roman"
+                    run_texto.font.size = Pt(12)
+                    run_texto.font.color.rgb = RGBColor(0, 0, 0)
+                    recuo = Cm(0)
+                else:
+                    p = doc.add_paragraph()
+                    run = p.add_run(paragrafo)
+                    run.font.name = "Times New Roman"
+                    run.font.size = Pt(12)
+                    run.font.color.rgb = RGBColor(0, 0, 0)
+                    recuo = Cm(0) if entrada in EXTRAS else Cm(1.25)
+
+                p.paragraph_format.first_line_indent = recuo
+                p.paragraph_format.line_spacing = 1.5
+                p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        else:
+            doc.add_paragraph("Conteúdo não disponível.")
+
+    # Adiciona Referências no final
+    if "Referências" in conteudo:
+        heading = doc.add_heading(level=1)
+        run_heading = heading.add_run("REFERÊNCIAS")
+        run_heading.bold = True
+        run_heading.font.name = "Times New Roman"
+        run_heading.font.size = Pt(12)
+        run_heading.font.color.rgb = RGBColor(0, 0, 0)
+        heading.paragraph_format.space_after = Pt(10)
+
+        for paragrafo in conteudo["Referências"]:
+            p = doc.add_paragraph()
+            run = p.add_run(paragrafo)
+            run.font.name = "Times New Roman"
+            run.font.size = Pt(12)
+            run.font.color.rgb = RGBColor(0, 0, 0)
+            p.paragraph_format.first_line_indent = Cm(0)
+            p.paragraph_format.line_spacing = 1.5
+            p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+
+    nome_arquivo = destino or caminho_saida(nome_seguro(titulo_original) + ".docx")
+
+    adicionar_num_pagina_word(doc)
+
+    doc.save(nome_arquivo)
+    return nome_arquivo
+
+# --- Motor rápido do DOCX ---
+#
+# Em vez de formatar cada run e cada parágrafo, o documento parte de um modelo
+# em que os estilos já carregam a formatação ABNT; os parágrafos só apontam
+# para o estilo. O resultado é visualmente igual ao de salvar_em_docx.
+
+W_P, W_PPR, W_PSTYLE, W_R, W_RPR, W_B, W_T = (qn(tag) for tag in (
+    "w:p", "w:pPr", "w:pStyle", "w:r", "w:rPr", "w:b", "w:t"))
+W_VAL = qn("w:val")
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+# Identificadores dos estilos criados no modelo
+ESTILOS_DOCX = MappingProxyType({
+    "Titulo": "ABNTTitulo",
+    "Autor": "ABNTAutor",
+    "Secao": "Heading1",
+    "SecaoReferencias": "ABNTReferencias",
+    "Texto": "ABNTTexto",
+    "TextoSemRecuo": "ABNTSemRecuo",
+    "Aviso": "Normal",
+})
+
+_modelo_docx = None
+
+
+# Tira as fontes do tema (Calibri/Cambria) para valer a Times New Roman
+def _remover_fontes_tema(rpr):
+    fontes = rpr.find(qn("w:rFonts"))
+    if fontes is not None:
+        for atributo in ("w:asciiTheme", "w:hAnsiTheme", "w:eastAsiaTheme", "w:cstheme"):
+            fontes.attrib.pop(qn(atributo), None)
+
+def _fonte_abnt(estilo, negrito=None):
+    estilo.font.name = "Times New Roman"
+    estilo.font.size = Pt(12)
+    estilo.font.color.rgb = RGBColor(0, 0, 0)
+    if negrito is not None:
+        estilo.font.bold = negrito
+    _remover_fontes_tema(estilo.element.get_or_add_rPr())
+
+def _criar_modelo_docx():
+    doc = Document()
+    estilos = doc.styles
+    _remover_fontes_tema(estilos.element.find(qn("w:docDefaults")).find(qn("w:rPrDefault")).find(qn("w:rPr")))
+
+    normal = estilos["Normal"]
+    _fonte_abnt(normal)
+
+    secao = estilos["Heading 1"]
+    _fonte_abnt(secao, negrito=True)
+    secao.paragraph_format.space_after = Pt(12)
+
+    def novo_estilo(nome, base):
+        estilo = estilos.add_style(nome, WD_STYLE_TYPE.PARAGRAPH)
+        estilo.base_style = base
+        estilo.quick_style = True
+        return estilo
+
+    referencias = novo_estilo("ABNT Referencias", secao)
+    referencias.paragraph_format.space_after = Pt(10)
+
+    titulo = novo_estilo("ABNT Titulo", normal)
+    titulo.font.bold = True
+    titulo.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    autor = novo_estilo("ABNT Autor", normal)
+    autor.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    autor.paragraph_format.space_before = Pt(24)
+    autor.paragraph_format.space_after = Pt(20)
+
+    texto = novo_estilo("ABNT Texto", normal)
+    texto.paragraph_format.first_line_indent = Cm(1.25)
+    texto.paragraph_format.line_spacing = 1.5
+    texto.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+
+    sem_recuo = novo_estilo("ABNT Sem Recuo", texto)
+    sem_recuo.paragraph_format.first_line_indent = Cm(0)
+
+    adicionar_num_pagina_word(doc)
+
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+# O modelo é montado no primeiro uso e reaproveitado pelo resto do processo
+def obter_modelo_docx():
+    global _modelo_docx
+    if _modelo_docx is None:
+        _modelo_docx = _criar_modelo_docx()
+    return _modelo_docx
+
+def _paragrafo_docx(corpo, estilo, texto, prefixo_negrito=None):
+    p = SubElement(corpo, W_P)
+    SubElement(SubElement(p, W_PPR), W_PSTYLE).set(W_VAL, estilo)
+    if prefixo_negrito:
+        run = SubElement(p, W_R)
+        SubElement(SubElement(run, W_RPR), W_B)
+        t = SubElement(run, W_T)
+        t.text = prefixo_negrito
+        t.set(XML_SPACE, "preserve")
+    t = SubElement(SubElement(p, W_R), W_T)
+    t.text = texto
+    t.set(XML_SPACE, "preserve")
+
+# Mesma saída de salvar_em_docx, escrevendo o WordprocessingML diretamente
+def salvar_em_docx_rapido(titulo, texto, autor, conteudo=None, destino=None):
+    doc = Document(BytesIO(obter_modelo_docx()))
+    corpo = doc.element.body
+    fim_secao = corpo.sectPr
+    estilos = ESTILOS_DOCX
+
+    _paragrafo_docx(corpo, estilos["Titulo"], titulo.upper())
+    _paragrafo_docx(corpo, estilos["Autor"], autor)
+
+    if conteudo is None:
+        conteudo = analisar_artigo(texto)
+
+    for entrada in EXTRAS:
+        for i, paragrafo in enumerate(conteudo.get(entrada, ())):
+            prefixo = f"{entrada.upper()}: " if i == 0 else None
+            _paragrafo_docx(corpo, estilos["TextoSemRecuo"], paragrafo, prefixo)
+        if entrada not in conteudo:
+            _paragrafo_docx(corpo, estilos["Aviso"], "Conteúdo não disponível.")
+
+    for numero, entrada in SECOES_NUMERADAS:
+        _paragrafo_docx(corpo, estilos["Secao"], f"{numero} {entrada.upper()}")
+        if entrada in conteudo:
+            for paragrafo in conteudo[entrada]:
+                _paragrafo_docx(corpo, estilos["Texto"], paragrafo)
+        else:
+            _paragrafo_docx(corpo, estilos["Aviso"], "Conteúdo não disponível.")
+
+    if "Referências" in conteudo:
+        _paragrafo_docx(corpo, estilos["SecaoReferencias"], "REFERÊNCIAS")
+        for paragrafo in conteudo["Referências"]:
+            _paragrafo_docx(corpo, estilos["TextoSemRecuo"], paragrafo)
+
+    # As propriedades da seção (cabeçalho com a paginação) ficam no fim do corpo
+    corpo.append(fim_secao)
+
+    nome_arquivo = destino or caminho_saida(nome_seguro(titulo) + ".docx")
+    doc.save(nome_arquivo)
+    return nome_arquivo
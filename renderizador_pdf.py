@@ -0,0 +1,121 @@
+# Geração do PDF com o ReportLab. Importado só quando um PDF é gerado
+# (veja renderizadores.py).
+from collections import namedtuple
+from types import MappingProxyType
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.lib.enums import TA_JUSTIFY
+from parser_artigo import analisar_artigo, SECOES_NUMERADAS, EXTRAS
+from renderizadores import caminho_saida
+
+# Estilos ABNT do PDF, criados uma única vez por processo e compartilhados
+# (somente leitura) por todas as gerações
+def _criar_estilos_pdf():
+    estilos = {
+        'Titulo': ParagraphStyle(name='Titulo', fontSize=12, fontName='Times-Roman', alignment=1,
+                                 spaceAfter=12, spaceBefore=12, leading=14, allowHTML=True),
+        'Secao': ParagraphStyle(name='Secao', fontSize=12, fontName='Times-Roman', alignment=0,
+                                spaceAfter=12, spaceBefore=12, leading=14, firstLineIndent=0, allowHTML=True),
+        'Texto': ParagraphStyle(name='Texto', fontSize=12, fontName='Times-Roman', alignment=TA_JUSTIFY,
+                                firstLineIndent=1.25 * cm, spaceAfter=10, leading=18, allowHTML=True),
+        'TextoSemRecuo': ParagraphStyle(name='TextoSemRecuo', fontSize=12, fontName='Times-Roman', alignment=TA_JUSTIFY,
+                                        firstLineIndent=0, spaceAfter=10, leading=18, allowHTML=True),
+    }
+    estilos['AutorDireita'] = ParagraphStyle('AutorDireita', parent=estilos['TextoSemRecuo'], alignment=2,
+                                             spaceAfter=12, fontName='Times-Roman', fontSize=12)
+    return MappingProxyType(estilos)
+
+ESTILOS_PDF = _criar_estilos_pdf()
+
+# Tamanho de página e margens de uma variante do PDF
+LayoutPDF = namedtuple("LayoutPDF", ["tamanho", "margem_esquerda", "margem_direita",
+                                     "margem_superior", "margem_inferior"])
+# Variante pronta para uso: layout, argumentos do SimpleDocTemplate e função de paginação
+ModeloPDF = namedtuple("ModeloPDF", ["layout", "argumentos", "paginacao"])
+
+_MODELOS_PDF = {}
+
+def _criar_paginacao(layout):
+    largura, altura = layout.tamanho
+    x = largura - layout.margem_direita
+    y = altura - 1.5 * cm
+
+    def adicionar_paginacao(canvas_obj, doc_obj):
+        canvas_obj.setFont("Times-Roman", 12)
+        canvas_obj.drawRightString(x, y, str(canvas_obj.getPageNumber()))
+    return adicionar_paginacao
+
+# Registra uma variante do layout ABNT (por exemplo, com outras margens).
+# Tudo é calculado aqui, então usar a variante depois não custa nada a mais.
+def registrar_modelo_pdf(nome, tamanho=A4, margem_esquerda=3 * cm, margem_direita=2 * cm,
+                         margem_superior=3 * cm, margem_inferior=2 * cm):
+    layout = LayoutPDF(tamanho, margem_esquerda, margem_direita, margem_superior, margem_inferior)
+    argumentos = MappingProxyType(dict(pagesize=tamanho,
+                                       rightMargin=margem_direita, leftMargin=margem_esquerda,
+                                       topMargin=margem_superior, bottomMargin=margem_inferior))
+    modelo = ModeloPDF(layout, argumentos, _criar_paginacao(layout))
+    _MODELOS_PDF[nome] = modelo
+    return modelo
+
+def obter_modelo_pdf(nome="abnt"):
+    return _MODELOS_PDF[nome]
+
+registrar_modelo_pdf("abnt")
+adicionar_paginacao = obter_modelo_pdf("abnt").paginacao
+
+
+# Função para salvar o texto no PDF com formatação correta
+# Se `destino` for informado (um caminho ou um buffer como BytesIO), o arquivo
+# é gravado nele em vez do nome derivado do título
+def salvar_em_pdf(titulo, texto, autor, conteudo=None, destino=None, variante="abnt"):
+    nome_arquivo = destino or caminho_saida(titulo.replace(" ", "_") + ".pdf")
+    modelo = obter_modelo_pdf(variante)
+    doc = SimpleDocTemplate(nome_arquivo, **modelo.argumentos)
+    styles = ESTILOS_PDF
+
+    elementos = []
+
+    # Título do trabalho
+    titulo_upper = titulo.upper()
+    elementos.append(Paragraph(f"<b>{titulo_upper}</b>", styles['Titulo']))
+    elementos.append(Spacer(1, 0.6*cm))
+
+    # Autor
+    autor_sem_quebra = autor.replace(" ", "\u00A0")
+    elementos.append(Paragraph(autor_sem_quebra, styles['AutorDireita']))
+    elementos.append(Spacer(1, 1.2 * cm))
+
+    if conteudo is None:
+        conteudo = analisar_artigo(texto)
+
+    for entrada in EXTRAS + [nome for _, nome in SECOES_NUMERADAS]:
+        if entrada in EXTRAS:
+            titulo = None
+        else:
+            numero = next((num for num, nome in SECOES_NUMERADAS if nome == entrada), "")
+            titulo = f"<b>{numero} {entrada.upper()}</b>"
+            elementos.append(Paragraph(titulo, styles['Secao']))
+
+        if entrada in conteudo and conteudo[entrada]:
+            for i, paragrafo in enumerate(conteudo[entrada]):
+                if entrada in EXTRAS and i == 0:
+                    texto_completo = f"<b>{entrada.upper()}:</b> {paragrafo}"
+                    estilo = styles['TextoSemRecuo']
+                else:
+                    texto_completo = paragrafo
+                    estilo = styles['Texto']
+                elementos.append(Paragraph(texto_completo, estilo))
+                elementos.append(Spacer(1, 0.4 * cm))
+        else:
+            elementos.append(Paragraph("Conteúdo não disponível.", styles['Texto']))
+
+    if "Referências" in conteudo:
+        elementos.append(Paragraph("<b>REFERÊNCIAS</b>", styles['Secao']))
+        for paragrafo in conteudo["Referências"]:
+            elementos.append(Paragraph(paragrafo, styles['TextoSemRecuo']))
+            elementos.append(Spacer(1, 0.4 * cm))
+
+    doc.build(elementos, onFirstPage=modelo.paginacao, onLaterPages=modelo.paginacao)
+    return nome_arquivo
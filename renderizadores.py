@@ -0,0 +1,41 @@
+import os
+import re
+from importlib import import_module
+
+# Os geradores de PDF (ReportLab) e DOCX (python-docx) ficam em
+# renderizador_pdf.py e renderizador_docx.py. Os nomes abaixo continuam
+# disponíveis aqui, mas cada módulo só é importado no primeiro uso, então
+# quem precisa apenas das constantes não paga pelas bibliotecas pesadas.
+_NOMES_ADIADOS = {
+    "renderizador_pdf": ("ESTILOS_PDF", "LayoutPDF", "ModeloPDF", "registrar_modelo_pdf",
+                         "obter_modelo_pdf", "adicionar_paginacao", "salvar_em_pdf"),
+    "renderizador_docx": ("adicionar_num_pagina_word", "formatar_paragrafos", "salvar_em_docx",
+                          "ESTILOS_DOCX", "obter_modelo_docx", "salvar_em_docx_rapido"),
+}
+_MODULO_DO_NOME = {nome: modulo for modulo, nomes in _NOMES_ADIADOS.items() for nome in nomes}
+
+# Diretório para salvar os arquivos gerados; é criado na primeira gravação
+OUTPUT_DIR = "output_files"
+
+TIPOS_MIME = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+# Nome de arquivo sem pontuação e com "_" no lugar dos espaços
+def nome_seguro(titulo):
+    nome_limpo = re.sub(r'[^\w\s-]', '', titulo).strip()
+    return "_".join(nome_limpo.split())
+
+# Caminho dentro de OUTPUT_DIR, criando o diretório se ainda não existir
+def caminho_saida(nome_arquivo):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    return os.path.join(OUTPUT_DIR, nome_arquivo)
+
+def __getattr__(nome):
+    modulo = _MODULO_DO_NOME.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(import_module(modulo), nome)
+    globals()[nome] = valor
+    return valor
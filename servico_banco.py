@@ -1,43 +1,229 @@
-from database import conectar
+from datetime import datetime, timedelta
+from database import conexao
+from metricas import BANCO_LATENCIA
 
-def salvar_trabalho(titulo, tema, autor, texto, pdf=True, docx=True):
-    conn = conectar()
-    if not conn:
-        print("❌ Conexão com o banco falhou.")
-        return False
+# Insere vários trabalhos num único INSERT e levanta a exceção do banco em
+# caso de erro. Cada item é um dicionário com titulo, tema, autor, texto,
+# chave (um UUID) e, opcionalmente, artefatos, no formato devolvido por
+# armazem_artefatos.obter_ou_renderizar: {formato: (hash, tamanho)}. Um item
+# cuja chave já está gravada não é inserido de novo, então repetir o mesmo
+# lote não duplica trabalhos. Devolve os ids na ordem dos itens.
+def inserir_trabalhos(itens):
+    if not itens:
+        return []
+    if not all(item.get("chave") for item in itens):
+        raise ValueError("Todo trabalho do lote precisa de uma chave")
+    from psycopg2.extras import execute_values
 
-    try:
+    linhas = []
+    for item in itens:
+        artefatos = item.get("artefatos") or {}
+        hash_pdf, tamanho_pdf = artefatos.get("pdf", (None, None))
+        hash_docx, tamanho_docx = artefatos.get("docx", (None, None))
+        linhas.append((item["titulo"], item["tema"], item["autor"], item["texto"], True, True,
+                       hash_pdf, tamanho_pdf, hash_docx, tamanho_docx, item["chave"]))
+    with BANCO_LATENCIA.medir(operacao="inserir_lote"), conexao() as conn:
         with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO trabalhos (titulo, tema, autor, texto_gerado, gerado_pdf, gerado_docx)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (titulo, tema, autor, texto, pdf, docx))
+            resultado = execute_values(cur, """
+                INSERT INTO trabalhos (titulo, tema, autor, texto_gerado, gerado_pdf, gerado_docx,
+                                       hash_pdf, tamanho_pdf, hash_docx, tamanho_docx, chave_gravacao)
+                VALUES %s
+                ON CONFLICT (chave_gravacao) DO NOTHING
+                RETURNING id, chave_gravacao
+            """, linhas, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::uuid)",
+                page_size=len(linhas), fetch=True)
+            # O RETURNING não traz as linhas que já existiam (um lote reenviado
+            # depois de gravado); os ids delas vêm de uma consulta pela chave
+            ids = {str(chave): id_trabalho for id_trabalho, chave in resultado}
+            faltando = [str(item["chave"]) for item in itens if str(item["chave"]) not in ids]
+            if faltando:
+                cur.execute("SELECT id, chave_gravacao FROM trabalhos WHERE chave_gravacao = ANY(%s::uuid[])",
+                            (faltando,))
+                ids.update((str(chave), id_trabalho) for id_trabalho, chave in cur.fetchall())
         conn.commit()
-        print("✅ Trabalho salvo com sucesso.")
+    return [ids.get(str(item["chave"])) for item in itens]
+
+# Como inserir_trabalhos, mas devolve None em caso de erro
+def salvar_trabalhos(itens):
+    try:
+        return inserir_trabalhos(itens)
+    except Exception as e:
+        print("❌ Erro ao salvar lote no banco:", e)
+        return None
+
+def obter_trabalho(id_trabalho):
+    try:
+        with BANCO_LATENCIA.medir(operacao="obter"), conexao() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT id, titulo, tema, autor, texto_gerado, hash_pdf, tamanho_pdf, hash_docx, tamanho_docx
+                    FROM trabalhos
+                    WHERE id = %s
+                """, (id_trabalho,))
+                linha = cur.fetchone()
+    except Exception as e:
+        print("❌ Erro ao buscar trabalho:", e)
+        return None
+
+    if not linha:
+        return None
+    colunas = ("id", "titulo", "tema", "autor", "texto_gerado",
+               "hash_pdf", "tamanho_pdf", "hash_docx", "tamanho_docx")
+    return dict(zip(colunas, linha))
+
+# Atualiza o hash e o tamanho de um formato depois que o arquivo foi (re)gerado
+def registrar_artefato(id_trabalho, formato, hash_artefato, tamanho):
+    coluna_hash, coluna_tamanho, coluna_gerado = {
+        "pdf": ("hash_pdf", "tamanho_pdf", "gerado_pdf"),
+        "docx": ("hash_docx", "tamanho_docx", "gerado_docx"),
+    }[formato]
+    try:
+        with BANCO_LATENCIA.medir(operacao="registrar_artefato"), conexao() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    UPDATE trabalhos
+                    SET {coluna_hash} = %s, {coluna_tamanho} = %s, {coluna_gerado} = TRUE
+                    WHERE id = %s
+                """, (hash_artefato, tamanho, id_trabalho))
+            conn.commit()
         return True
     except Exception as e:
-        print("❌ Erro ao salvar no banco:", e)
+        print("❌ Erro ao registrar arquivo do trabalho:", e)
         return False
-    finally:
-        conn.close()
 
-def listar_trabalhos():
-    conn = conectar()
-    if not conn:
-        print("❌ Erro ao conectar para listar trabalhos.")
-        return []
+# O cursor de paginação é a posição (data_criacao, id) de uma linha
+def codificar_cursor(linha):
+    return f"{linha[3].isoformat()}_{linha[0]}"
 
+def decodificar_cursor(cursor):
     try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT id, titulo, autor, data_criacao, gerado_pdf, gerado_docx 
-                FROM trabalhos 
-                ORDER BY data_criacao DESC
-            """)
-            resultados = cur.fetchall()
-            return resultados
+        data, id_trabalho = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(data), int(id_trabalho)
+    except (AttributeError, ValueError):
+        return None
+
+# Lista uma página de trabalhos usando paginação por chave em (data_criacao, id):
+# o custo de cada página não depende de quantas linhas vêm antes dela.
+# Com anteriores=True, devolve a página imediatamente antes do cursor.
+def listar_trabalhos(limite=20, cursor=None, anteriores=False, autor=None, data_inicio=None, data_fim=None):
+    condicoes = []
+    parametros = []
+
+    if autor:
+        condicoes.append("autor ILIKE %s")
+        parametros.append(f"%{autor}%")
+    if data_inicio:
+        condicoes.append("data_criacao >= %s")
+        parametros.append(data_inicio)
+    if data_fim:
+        condicoes.append("data_criacao < %s")
+        parametros.append(data_fim + timedelta(days=1))
+
+    posicao = decodificar_cursor(cursor) if cursor else None
+    if posicao:
+        condicoes.append("(data_criacao, id) > (%s, %s)" if anteriores else "(data_criacao, id) < (%s, %s)")
+        parametros.extend(posicao)
+
+    where = ("WHERE " + " AND ".join(condicoes)) if condicoes else ""
+    ordem = "ASC" if anteriores else "DESC"
+    parametros.append(limite + 1)
+
+    pagina = {"trabalhos": [], "anterior": None, "proximo": None}
+    try:
+        with BANCO_LATENCIA.medir(operacao="listar"), conexao() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    SELECT id, titulo, autor, data_criacao, gerado_pdf, gerado_docx 
+                    FROM trabalhos 
+                    {where}
+                    ORDER BY data_criacao {ordem}, id {ordem}
+                    LIMIT %s
+                """, parametros)
+                resultados = cur.fetchall()
     except Exception as e:
         print("❌ Erro ao buscar trabalhos:", e)
-        return []
-    finally:
-        conn.close()
+        return pagina
+
+    tem_mais = len(resultados) > limite
+    resultados = resultados[:limite]
+    if anteriores:
+        resultados.reverse()
+
+    pagina["trabalhos"] = resultados
+    if resultados:
+        # Quem chegou por um cursor sempre tem para onde voltar
+        if (tem_mais if anteriores else posicao is not None):
+            pagina["anterior"] = codificar_cursor(resultados[0])
+        if (posicao is not None if anteriores else tem_mais):
+            pagina["proximo"] = codificar_cursor(resultados[-1])
+    return pagina
+
+# Marcadores do trecho em destaque; o HTML é montado depois de escapar o texto
+INICIO_DESTAQUE = "\x02"
+FIM_DESTAQUE = "\x03"
+OPCOES_TRECHO = (f"MaxFragments=2, MinWords=8, MaxWords=20, FragmentDelimiter=\" … \", "
+                 f"StartSel={INICIO_DESTAQUE}, StopSel={FIM_DESTAQUE}")
+
+# Quantos resultados, no máximo, são ordenados por relevância. Um termo
+# comum casa com quase todas as linhas, e calcular a relevância de todas
+# custa segundos; com o limite, a ordenação considera as ocorrências mais
+# recentes e a busca fica na casa dos milissegundos em qualquer tamanho de
+# tabela. Quando o termo casa com mais linhas que isso, o resultado vem
+# marcado como truncado, para que a tela peça um termo mais específico.
+LIMITE_CANDIDATOS_BUSCA = 1000
+
+# Busca textual (coluna busca, índice GIN) com a sintaxe de buscador:
+# palavras soltas, "frase exata", OR e -excluir. Devolve a página pedida,
+# da mais para a menos relevante entre as LIMITE_CANDIDATOS_BUSCA
+# ocorrências mais recentes, com um trecho do texto em que os termos
+# aparecem. O trecho só é montado para as linhas da página. Cada linha tem
+# as colunas da listagem seguidas da relevância e do trecho. `total` é o
+# número de trabalhos ordenados e `truncado` indica que havia mais; uma
+# página além da última vira a última.
+def buscar_trabalhos(termo, limite=20, pagina=1):
+    resultado = {"trabalhos": [], "pagina": pagina, "tem_mais": False, "total": 0, "truncado": False}
+    try:
+        with BANCO_LATENCIA.medir(operacao="buscar"), conexao() as conn:
+            with conn.cursor() as cur:
+                # Contar só até uma linha além do limite é barato mesmo para um termo comum
+                cur.execute("""
+                    SELECT count(*) FROM (
+                        SELECT 1 FROM trabalhos
+                        WHERE busca @@ websearch_to_tsquery('portuguese', %s)
+                        LIMIT %s
+                    ) c
+                """, (termo, LIMITE_CANDIDATOS_BUSCA + 1))
+                encontrados = cur.fetchone()[0]
+                resultado["truncado"] = encontrados > LIMITE_CANDIDATOS_BUSCA
+                resultado["total"] = total = min(encontrados, LIMITE_CANDIDATOS_BUSCA)
+                pagina = resultado["pagina"] = max(1, min(pagina, -(-total // limite)))
+                cur.execute("""
+                    WITH candidatos AS (
+                        SELECT id
+                        FROM trabalhos
+                        WHERE busca @@ websearch_to_tsquery('portuguese', %(termo)s)
+                        ORDER BY id DESC
+                        LIMIT %(candidatos)s
+                    ), pagina AS (
+                        SELECT t.id, ts_rank_cd(t.busca, websearch_to_tsquery('portuguese', %(termo)s)) AS relevancia
+                        FROM candidatos c
+                        JOIN trabalhos t ON t.id = c.id
+                        ORDER BY relevancia DESC, t.id DESC
+                        LIMIT %(limite)s OFFSET %(deslocamento)s
+                    )
+                    SELECT t.id, t.titulo, t.autor, t.data_criacao, t.gerado_pdf, t.gerado_docx, p.relevancia,
+                           ts_headline('portuguese', t.texto_gerado,
+                                       websearch_to_tsquery('portuguese', %(termo)s), %(opcoes)s) AS trecho
+                    FROM pagina p
+                    JOIN trabalhos t ON t.id = p.id
+                    ORDER BY p.relevancia DESC, p.id DESC
+                """, {"termo": termo, "candidatos": LIMITE_CANDIDATOS_BUSCA, "limite": limite + 1,
+                      "deslocamento": (pagina - 1) * limite, "opcoes": OPCOES_TRECHO})
+                linhas = cur.fetchall()
+    except Exception as e:
+        print("❌ Erro na busca de trabalhos:", e)
+        return resultado
+
+    resultado["tem_mais"] = len(linhas) > limite
+    resultado["trabalhos"] = linhas[:limite]
+    return resultado
@@ -0,0 +1,194 @@
+# Servidor ASGI com as rotas de geração em versão assíncrona. Rode com:
+#   uvicorn servidor_async:app --host 0.0.0.0 --port 8000
+# Requer pip install starlette uvicorn a2wsgi python-multipart "psycopg[binary]" psycopg-pool
+#
+# No servidor Flask cada geração ocupa uma thread enquanto espera o Gemini.
+# Aqui a geração é uma corrotina: o Gemini é chamado pela API assíncrona do
+# SDK, o banco pelo pool assíncrono do psycopg 3 e o PDF/DOCX vai para o
+# pool de processos, então um único processo mantém centenas de gerações
+# em andamento. As demais rotas (histórico, busca, downloads, estatísticas)
+# continuam sendo as do App.py, montado por baixo via WSGI.
+import asyncio
+import os
+import uuid
+from contextlib import asynccontextmanager
+from urllib.parse import quote, urlencode
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.templating import Jinja2Templates
+import App
+import banco_async
+import executor_renderizacao
+import fila_tarefas
+import gerador_artigos
+import limpeza_artefatos
+import metricas
+from App import evento_sse
+from database import estatisticas_pool
+from fila_tarefas import FilaTarefasAsync, FilaCheia
+from renderizadores import TIPOS_MIME, nome_seguro
+
+# Gerações em andamento ao mesmo tempo neste processo
+TAREFAS_SIMULTANEAS = int(os.getenv("TAREFAS_SIMULTANEAS_ASYNC", "500"))
+# Threads que atendem as rotas do App.py montadas por baixo
+THREADS_WSGI = int(os.getenv("THREADS_WSGI", "10"))
+
+templates = Jinja2Templates(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "Templates"))
+
+
+# O trabalho é gravado direto pelo pool assíncrono. Se o banco falhar, ele
+# vai para a gravação em segundo plano do App.py (que guarda em disco e
+# reenvia) com a mesma chave, então nunca é perdido nem duplicado.
+async def salvar(titulo, tema, autor, trabalho):
+    chave = str(uuid.uuid4())
+    try:
+        return await banco_async.inserir_trabalho(titulo, tema, autor, trabalho, chave)
+    except Exception as e:
+        print("⚠️  Banco indisponível para o servidor assíncrono; gravando em segundo plano:", e)
+        App.gravacao.enviar(titulo, tema, autor, trabalho, chave=chave)
+        return None
+
+async def processar_tarefa(tarefa):
+    dados = tarefa.dados
+    trabalho = dados.get("trabalho")
+    if trabalho is None:
+        tarefa.avancar(fila_tarefas.GERANDO)
+        trabalho = await gerador_artigos.gerar_artigo_abnt_async(dados["titulo"], dados["tema"], dados["autor"],
+                                                                 modo=dados.get("modo"))
+
+    tarefa.avancar(fila_tarefas.SALVANDO)
+    id_trabalho = await salvar(dados["titulo"], dados["tema"], dados["autor"], trabalho)
+    return {"trabalho": trabalho, "id_trabalho": id_trabalho}
+
+tarefas = FilaTarefasAsync(processar_tarefa, limite=TAREFAS_SIMULTANEAS)
+metricas.Medidor("tarefas_async_em_andamento", "Gerações em andamento no servidor assíncrono.", funcao=tarefas.tamanho)
+
+
+async def home(request):
+    return templates.TemplateResponse(request, "index.html")
+
+async def gerar_trabalho(request):
+    formulario = await request.form()
+    titulo = formulario.get("titulo")
+    tema = formulario.get("tema")
+    if not titulo or not tema:
+        return PlainTextResponse("Erro: Título e Tema são obrigatórios", 400)
+
+    try:
+        tarefa = tarefas.enviar(titulo=titulo, tema=tema, autor=formulario.get("autor"), modo=formulario.get("modo"))
+    except FilaCheia:
+        return PlainTextResponse("Erro: Muitos trabalhos em geração, tente novamente em instantes", 503)
+
+    return JSONResponse({"id": tarefa.id,
+                         "status": app.url_path_for("status_tarefa", id_tarefa=tarefa.id),
+                         "resultado": app.url_path_for("resultado_tarefa", id_tarefa=tarefa.id)}, 202)
+
+async def status_tarefa(request):
+    tarefa = tarefas.obter(request.path_params["id_tarefa"])
+    if not tarefa:
+        return JSONResponse({"erro": "Tarefa não encontrada"}, 404)
+    return JSONResponse(tarefa.para_dict())
+
+async def resultado_tarefa(request):
+    tarefa = tarefas.obter(request.path_params["id_tarefa"])
+    if not tarefa:
+        return PlainTextResponse("Tarefa não encontrada", 404)
+    if tarefa.etapa == fila_tarefas.FALHOU:
+        return PlainTextResponse(f"Erro ao gerar o trabalho: {tarefa.erro}", 500)
+    if tarefa.etapa != fila_tarefas.CONCLUIDO:
+        return PlainTextResponse("Trabalho ainda em geração", 409)
+
+    resultado = tarefa.resultado
+    return templates.TemplateResponse(request, "download.html", {
+        "id_trabalho": resultado["id_trabalho"], "preview": resultado["trabalho"],
+        "titulo": tarefa.dados["titulo"], "autor": tarefa.dados["autor"]})
+
+async def previa(request):
+    argumentos = request.query_params
+    if not argumentos.get("titulo") or not argumentos.get("tema"):
+        return PlainTextResponse("Erro: Título e Tema são obrigatórios", 400)
+
+    parametros = {nome: argumentos.get(nome) for nome in ("titulo", "tema", "autor", "modo") if argumentos.get(nome)}
+    url_stream = app.url_path_for("gerar_trabalho_stream") + "?" + urlencode(parametros)
+    return templates.TemplateResponse(request, "download.html", {
+        "preview": "", "titulo": argumentos.get("titulo"), "autor": argumentos.get("autor"), "url_stream": url_stream})
+
+async def gerar_trabalho_stream(request):
+    argumentos = request.query_params
+    titulo = argumentos.get("titulo")
+    tema = argumentos.get("tema")
+    autor = argumentos.get("autor")
+    modo = argumentos.get("modo")
+    if not titulo or not tema:
+        return PlainTextResponse("Erro: Título e Tema são obrigatórios", 400)
+
+    async def eventos():
+        partes = []
+        try:
+            async for parte in gerador_artigos.gerar_artigo_abnt_stream_async(titulo, tema, autor, modo=modo):
+                partes.append(parte)
+                yield evento_sse("trecho", {"texto": parte})
+        except Exception as e:
+            print("❌ Erro durante o streaming do artigo:", e)
+            yield evento_sse("erro", {"erro": str(e)})
+            return
+
+        try:
+            tarefa = tarefas.enviar(titulo=titulo, tema=tema, autor=autor, trabalho="".join(partes))
+        except FilaCheia:
+            yield evento_sse("erro", {"erro": "Fila cheia: o trabalho não foi salvo, mas ainda pode ser baixado."})
+            return
+        yield evento_sse("fim", {"id": tarefa.id, "status": app.url_path_for("status_tarefa", id_tarefa=tarefa.id)})
+
+    return StreamingResponse(eventos(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# O PDF ou DOCX editado é gerado no pool de processos, sem parar o loop de eventos
+async def baixar_trabalho_editado(request):
+    formulario = await request.form()
+    texto = formulario.get("texto_editado")
+    titulo = formulario.get("titulo")
+    if not texto or not titulo:
+        return PlainTextResponse("Erro: Texto e Título são obrigatórios", 400)
+
+    formato = "pdf" if formulario.get("formato") == "pdf" else "docx"
+    dados = await executor_renderizacao.renderizar_em_bytes_async(formato, titulo, texto, formulario.get("autor"))
+    nome = f"{nome_seguro(titulo) or 'trabalho'}.{formato}"
+    return Response(dados, media_type=TIPOS_MIME[formato],
+                    headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(nome)}"})
+
+async def exportar_metricas(request):
+    return Response(metricas.exportar(), media_type=metricas.TIPO_CONTEUDO)
+
+async def estatisticas_banco(request):
+    return JSONResponse({"sincrono": estatisticas_pool(), "assincrono": banco_async.estatisticas()})
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    await banco_async.abrir()
+    # Cria o cliente do Gemini (e importa o SDK) antes da primeira requisição
+    await asyncio.to_thread(gerador_artigos.obter_modelo)
+    limpeza_artefatos.iniciar_varredor()
+    App.gravacao.iniciar()
+    try:
+        yield
+    finally:
+        await tarefas.encerrar()
+        await banco_async.fechar()
+
+
+app = Starlette(routes=[
+    Route("/", home),
+    Route("/gerar_trabalho", gerar_trabalho, methods=["POST"]),
+    Route("/tarefas/{id_tarefa}", status_tarefa),
+    Route("/tarefas/{id_tarefa}/resultado", resultado_tarefa),
+    Route("/previa", previa),
+    Route("/gerar_trabalho/stream", gerar_trabalho_stream),
+    Route("/baixar_trabalho_editado", baixar_trabalho_editado, methods=["POST"]),
+    Route("/metrics", exportar_metricas),
+    Route("/banco/estatisticas", estatisticas_banco),
+    Mount("/", WSGIMiddleware(App.app, workers=THREADS_WSGI)),
+], lifespan=ciclo_de_vida)
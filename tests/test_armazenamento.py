@@ -0,0 +1,74 @@
+import io
+import os
+
+import pytest
+
+import armazenamento
+from armazenamento import ArmazenamentoLocal, ArmazenamentoPostgres, ArmazenamentoS3
+
+# Maior que um bloco, para passar pela leitura e gravação em partes
+CONTEUDO = os.urandom(armazenamento.TAMANHO_BLOCO * 2 + 123)
+CHAVE = "ab" * 32 + ".pdf"
+
+
+def ida_e_volta(backend):
+    assert not backend.existe(CHAVE)
+    backend.gravar(CHAVE, io.BytesIO(CONTEUDO))
+    assert backend.existe(CHAVE)
+    with backend.abrir(CHAVE) as arquivo:
+        assert arquivo.read() == CONTEUDO
+
+    # Gravar de novo a mesma chave não duplica nem corrompe o arquivo
+    backend.gravar(CHAVE, io.BytesIO(CONTEUDO))
+    with backend.abrir(CHAVE) as arquivo:
+        assert arquivo.read() == CONTEUDO
+
+    backend.remover(CHAVE)
+    assert not backend.existe(CHAVE)
+    with pytest.raises(FileNotFoundError):
+        with backend.abrir(CHAVE):
+            pass
+    backend.remover(CHAVE)  # remover o que não existe não é erro
+
+
+def test_local(tmp_path):
+    backend = ArmazenamentoLocal(str(tmp_path))
+    assert not backend.serve_como_cache
+    ida_e_volta(backend)
+    assert os.listdir(tmp_path) == []  # nenhum temporário esquecido
+
+
+def test_s3(monkeypatch):
+    moto = pytest.importorskip("moto")
+    boto3 = pytest.importorskip("boto3")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "teste")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "teste")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        boto3.client("s3").create_bucket(Bucket="artefatos")
+        ida_e_volta(ArmazenamentoS3("artefatos", prefixo="testes/"))
+
+
+@pytest.fixture
+def banco():
+    pytest.importorskip("psycopg2")
+    from database import conectar
+    conn = conectar()
+    if conn is None:
+        pytest.skip("banco de dados indisponível (configure DB_* no .env)")
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('artefatos_armazenados')")
+            if cur.fetchone()[0] is None:
+                pytest.skip("tabela artefatos_armazenados ausente (rode python migrar.py)")
+    finally:
+        conn.close()
+
+
+def test_postgres(banco):
+    ida_e_volta(ArmazenamentoPostgres())
+
+
+def test_criar_armazenamento_desconhecido():
+    with pytest.raises(ValueError):
+        armazenamento.criar_armazenamento("ftp")
@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import pytest
+
+from cliente_gemini import ClienteGemini, Disjuntor, DisjuntorAberto, LimiteExcedido, LimitadorTaxa
+from modelo_falso import ErroApiFalso, ModeloFalso
+
+
+# Abre o disjuntor com cinco 503 seguidos e espera o tempo aberto passar
+def abrir_disjuntor(cliente):
+    for _ in range(5):
+        with pytest.raises(ErroApiFalso):
+            cliente.generate_content("prompt")
+    assert cliente.disjuntor.estado == Disjuntor.ABERTO
+    with pytest.raises(DisjuntorAberto):
+        cliente.generate_content("prompt")
+    time.sleep(0.15)
+
+
+def test_teste_com_429_e_4xx_nao_prende_o_disjuntor():
+    modelo = ModeloFalso(erros=[503] * 5 + [429] + [400])
+    cliente = ClienteGemini(modelo, tentativas=1, tempo_aberto=0.1)
+    abrir_disjuntor(cliente)
+
+    with pytest.raises(ErroApiFalso) as erro:
+        cliente.generate_content("prompt")
+    assert erro.value.code == 429
+    assert cliente.disjuntor.estado == Disjuntor.ABERTO
+
+    with pytest.raises(ErroApiFalso) as erro:
+        cliente.generate_content("prompt")
+    assert erro.value.code == 400
+    assert cliente.disjuntor.estado == Disjuntor.ABERTO
+
+    cliente.generate_content("prompt")
+    assert cliente.disjuntor.estado == Disjuntor.FECHADO
+    assert modelo.chamadas == 8
+
+
+def test_teste_barrado_pelo_limite_de_taxa_libera_a_vaga():
+    modelo = ModeloFalso(erros=[503] * 5)
+    cliente = ClienteGemini(modelo, tentativas=1, tempo_aberto=0.1, espera_maxima_limite=0)
+    abrir_disjuntor(cliente)
+
+    cliente.limitador.requisicoes.reservar(cliente.limitador.requisicoes.capacidade)
+    with pytest.raises(LimiteExcedido):
+        cliente.generate_content("prompt")
+    assert cliente.disjuntor.estado == Disjuntor.ABERTO
+
+    cliente.limitador = LimitadorTaxa(1000)
+    cliente.generate_content("prompt")
+    assert cliente.disjuntor.estado == Disjuntor.FECHADO
+
+
+def test_teste_com_503_reabre_o_disjuntor():
+    modelo = ModeloFalso(erros=[503] * 6)
+    cliente = ClienteGemini(modelo, tentativas=1, tempo_aberto=0.1)
+    abrir_disjuntor(cliente)
+
+    with pytest.raises(ErroApiFalso):
+        cliente.generate_content("prompt")
+    with pytest.raises(DisjuntorAberto):
+        cliente.generate_content("prompt")
+
+
+def test_teste_assincrono_com_429_e_4xx_nao_prende_o_disjuntor():
+    modelo = ModeloFalso(erros=[503] * 5 + [429] + [400])
+    cliente = ClienteGemini(modelo, tentativas=1, tempo_aberto=0.1)
+    abrir_disjuntor(cliente)
+
+    async def chamar():
+        for codigo in (429, 400):
+            with pytest.raises(ErroApiFalso) as erro:
+                await cliente.generate_content_async("prompt")
+            assert erro.value.code == codigo
+            assert cliente.disjuntor.estado == Disjuntor.ABERTO
+        await cliente.generate_content_async("prompt")
+
+    asyncio.run(chamar())
+    assert cliente.disjuntor.estado == Disjuntor.FECHADO
@@ -0,0 +1,127 @@
+import glob
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from fila_gravacao import FilaGravacao
+
+
+# Imita inserir_trabalhos: grava pela chave (sem duplicar), recusa o lote
+# inteiro se houver um item "ruim" e levanta ConnectionError fora do ar
+class BancoFalso:
+    def __init__(self, atraso=0.0):
+        self.disponivel = True
+        self.atraso = atraso
+        self.linhas = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, itens):
+        if self.atraso:
+            time.sleep(self.atraso)
+        if not self.disponivel:
+            raise ConnectionError("banco fora do ar")
+        if any(item["titulo"].startswith("ruim") for item in itens):
+            raise ValueError("linha recusada")
+        with self._lock:
+            for item in itens:
+                self.linhas.setdefault(item["chave"], len(self.linhas) + 1)
+            return [self.linhas[item["chave"]] for item in itens]
+
+
+def aguardar(condicao, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if condicao():
+            return True
+        time.sleep(0.02)
+    return False
+
+def itens_em_espera(pasta, extensao="json"):
+    itens = []
+    for caminho in glob.glob(os.path.join(pasta, f"*.{extensao}")):
+        with open(caminho, encoding="utf-8") as arquivo:
+            itens.extend(json.load(arquivo))
+    return itens
+
+@pytest.fixture
+def criar_fila(tmp_path):
+    filas = []
+
+    def criar(banco, **opcoes):
+        fila = FilaGravacao(gravar_lote=banco, pasta_espera=str(tmp_path), espera_lote=0.01,
+                            espera_minima=0.05, espera_maxima=0.2, **opcoes)
+        filas.append(fila)
+        return fila
+    yield criar
+    for fila in filas:
+        fila.esvaziar(timeout=5)
+
+
+def test_grava_em_lotes(criar_fila):
+    banco = BancoFalso()
+    fila = criar_fila(banco)
+    futuros = [fila.enviar(f"Trabalho {i}", "tema", "autor", "texto") for i in range(5)]
+    ids = [futuro.result(timeout=5) for futuro in futuros]
+    assert sorted(ids) == [1, 2, 3, 4, 5]
+    assert fila.estatisticas()["gravados"] == 5
+
+
+def test_queda_guarda_em_disco_e_reenvia_quando_o_banco_volta(criar_fila, tmp_path):
+    banco = BancoFalso()
+    banco.disponivel = False
+    fila = criar_fila(banco)
+    futuros = [fila.enviar(f"Trabalho {i}", "tema", "autor", "texto") for i in range(4)]
+
+    # Guardado em disco, o id fica desconhecido: o Future termina com None
+    assert [futuro.result(timeout=5) for futuro in futuros] == [None] * 4
+    assert len(itens_em_espera(tmp_path)) == 4
+    assert not fila.estatisticas()["banco_disponivel"]
+
+    banco.disponivel = True
+    assert aguardar(lambda: fila.lotes_em_espera() == 0)
+    assert len(banco.linhas) == 4
+    assert fila.estatisticas()["banco_disponivel"]
+
+
+def test_linha_recusada_no_reenvio_nao_leva_as_outras(criar_fila, tmp_path):
+    banco = BancoFalso()
+    banco.disponivel = False
+    fila = criar_fila(banco)
+    for titulo in ("bom 1", "ruim", "bom 2", "bom 3"):
+        fila.enviar(titulo, "tema", "autor", "texto").result(timeout=5)
+    # Um segundo arquivo na pasta de espera, reenviado na mesma passada
+    fila.enviar("bom 4", "tema", "autor", "texto").result(timeout=5)
+    assert len(itens_em_espera(tmp_path)) == 5
+
+    banco.disponivel = True
+    assert aguardar(lambda: fila.lotes_em_espera() == 0)
+    assert sorted(item["titulo"] for item in itens_em_espera(tmp_path, "rejeitado")) == ["ruim"]
+    assert len(banco.linhas) == 4
+    assert fila.estatisticas()["banco_disponivel"]
+
+
+def test_esvaziar_espera_o_lote_em_gravacao(criar_fila):
+    banco = BancoFalso(atraso=0.5)
+    fila = criar_fila(banco)
+    for i in range(3):
+        fila.enviar(f"Trabalho {i}", "tema", "autor", "texto")
+    assert aguardar(lambda: fila.tamanho() == 0)  # o lote já está com a thread
+    fila.esvaziar(timeout=5)
+    assert len(banco.linhas) == 3
+
+
+def test_esvaziar_guarda_em_disco_o_lote_que_nao_termina(criar_fila, tmp_path):
+    banco = BancoFalso(atraso=2.0)
+    fila = criar_fila(banco)
+    for i in range(3):
+        fila.enviar(f"Trabalho {i}", "tema", "autor", "texto")
+    assert aguardar(lambda: fila.tamanho() == 0)
+    fila.esvaziar(timeout=0.2)
+    assert sorted(item["titulo"] for item in itens_em_espera(tmp_path)) == ["Trabalho 0", "Trabalho 1", "Trabalho 2"]
+
+    # Depois de esvaziar, um trabalho novo vai direto para a pasta de espera
+    assert fila.enviar("Tardio", "tema", "autor", "texto").result(timeout=1) is None
+    assert "Tardio" in [item["titulo"] for item in itens_em_espera(tmp_path)]